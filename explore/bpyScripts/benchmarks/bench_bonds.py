@@ -0,0 +1,72 @@
+"""Bond inference: cell-list grid vs brute force
+
+Plain Python, no Blender needed:
+
+    python bench_bonds.py                     # synthetic atoms, 10^3..10^6
+    python bench_bonds.py 3wu2.cif.gz         # a real structure
+
+Up to --check-max atoms the grid result is compared against the O(n^2)
+brute-force search and the script exits non-zero on any mismatch.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import bonds, structure
+
+
+def synthetic_atoms(count, seed=0):
+    """Random atoms at roughly protein density (about one atom per 11 cubic Angstrom)"""
+    rng = np.random.default_rng(seed)
+    side = (count * 11.0) ** (1.0 / 3.0)
+    coords = rng.uniform(0, side, size=(count, 3))
+    elements = rng.choice(np.array(["C", "N", "O", "S"]), size=count, p=[0.62, 0.17, 0.2, 0.01])
+    return coords, elements
+
+
+def as_set(pairs):
+    return set(map(tuple, np.sort(pairs, axis=1).tolist()))
+
+
+def run(label, coords, elements, check_max):
+    start = time.perf_counter()
+    pairs = bonds.infer_bonds(coords, elements)
+    grid_time = time.perf_counter() - start
+    brute = "-"
+    if len(coords) <= check_max:
+        start = time.perf_counter()
+        expected = bonds.brute_force_bonds(coords, elements)
+        brute = "%.3f" % (time.perf_counter() - start)
+        if as_set(pairs) != as_set(expected) or len(pairs) != len(expected):
+            print("%s: MISMATCH grid %d bonds, brute force %d" % (label, len(pairs), len(expected)))
+            return False
+    print("%-24s %10d %10d %10.3f %10s %12.0f" % (label, len(coords), len(pairs), grid_time, brute,
+                                                  len(coords) / grid_time))
+    return True
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--counts", nargs="*", type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--check-max", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    print("%-24s %10s %10s %10s %10s %12s" % ("input", "atoms", "bonds", "grid (s)", "brute (s)", "atoms/sec"))
+    ok = True
+    for path in args.paths:
+        atoms = structure.load(path)
+        ok &= run(os.path.basename(path), atoms.coords, atoms.element, args.check_max)
+    if not args.paths:
+        for count in args.counts:
+            coords, elements = synthetic_atoms(count)
+            ok &= run("synthetic", coords, elements, args.check_max)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
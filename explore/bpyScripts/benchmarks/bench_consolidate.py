@@ -0,0 +1,87 @@
+"""Object/vertex/draw-call counts and viewport FPS before and after consolidate()
+
+Counts work in background mode; FPS needs a window, so run with the UI:
+
+    blender --factory-startup --python bench_consolidate.py -- 5000
+    blender --background --factory-startup --python bench_consolidate.py -- 5000
+    python bench_consolidate.py 5000                # fake bpy: counts and merge time only
+
+The scene is N linked-duplicate spheres spread over a few element materials.
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import bpy
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "fakebpy"))
+    import bpy
+
+import numpy as np
+
+sys.path.append(os.path.join(HERE, ".."))
+from molviz import consolidate, instancing, materials
+
+ELEMENTS = [("C", (0.3, 0.3, 0.3)), ("N", (0.19, 0.31, 0.97)), ("O", (1.0, 0.05, 0.05)), ("S", (1.0, 0.78, 0.2))]
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    instancing.library.clear()
+
+
+def build_scene(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-60, 60, size=(count, 3))
+    which = rng.integers(0, len(ELEMENTS), count)
+    objects = instancing.sphere_objects(["Atom_%d" % i for i in range(count)], centers, 1.0,
+                                        segments=12, ring_count=6)
+    mats = [materials.principled("Element_" + name, color) for name, color in ELEMENTS]
+    for obj, index in zip(objects, which):
+        materials.assign(obj, mats[index], per_object=True)
+
+
+def viewport_fps(iterations=20):
+    """Redraw the first 3D viewport repeatedly; None without a window"""
+    if bpy.app.background or bpy.context.window is None:
+        return None
+    for area in bpy.context.screen.areas:
+        if area.type == 'VIEW_3D':
+            region = next(r for r in area.regions if r.type == 'WINDOW')
+            with bpy.context.temp_override(area=area, region=region):
+                start = time.perf_counter()
+                bpy.ops.wm.redraw_timer(type='DRAW', iterations=iterations)
+                return iterations / (time.perf_counter() - start)
+    return None
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("count", nargs="?", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    clear_scene()
+    build_scene(args.count)
+    fps_before = viewport_fps()
+    start = time.perf_counter()
+    report = consolidate.consolidate()
+    elapsed = time.perf_counter() - start
+    fps_after = viewport_fps()
+
+    print("%-8s %10s %12s %12s %10s" % ("", "objects", "vertices", "draw calls", "fps"))
+    for label, counts, fps in (("before", report["before"], fps_before), ("after", report["after"], fps_after)):
+        print("%-8s %10d %12d %12d %10s" % (label, counts["objects"], counts["vertices"],
+                                            counts["draw_calls"], "-" if fps is None else "%.1f" % fps))
+    print("consolidate took %.3f s" % elapsed)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
@@ -0,0 +1,67 @@
+"""Buried-atom and view culling: time and the triangles/memory they save
+
+Plain Python, no Blender needed.  A protein-like globule (jittered 2.7
+Angstrom lattice, about one heavy atom per 20 cubic Angstrom) goes through
+culling.buried() and then culling.visible() under a 1920x1080 camera
+framing it.  Savings are for create_snowball's sphere budget (32x16,
+SUBSURF 2), as culling.savings() estimates them:
+
+    python bench_culling.py                           # 10^4, 10^5, 10^6 atoms, exact burial
+    python bench_culling.py --atoms 100000 --probe 1  # lossy: spheres grown by 1 Angstrom
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import culling, lod
+
+
+def globule(n, spacing=2.7, seed=0):
+    rng = np.random.default_rng(seed)
+    radius = (3.0 * n / (4.0 * np.pi)) ** (1 / 3.0) * spacing
+    side = int(np.ceil(radius / spacing)) + 1
+    span = np.arange(-side, side + 1) * spacing
+    points = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape(-1, 3)
+    points = points[np.linalg.norm(points, axis=1) < radius]
+    points += rng.normal(0, 0.35, points.shape)
+    return points, rng.choice([1.7, 1.55, 1.52, 1.8], len(points))
+
+
+def framing_camera(centers, resolution=(1920, 1080), fov=np.radians(39.6)):
+    """Camera on +z looking down at the globule, far enough back to fit it"""
+    extent = np.abs(centers).max()
+    matrix = np.eye(4)
+    matrix[:3, 3] = (0.0, 0.0, 1.2 * extent / np.tan(fov / 2.0) + extent)
+    return lod.Camera(matrix, fov, resolution)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atoms", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    parser.add_argument("--probe", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    print("%-9s %-8s %9s %10s %10s %10s %10s %7s" % ("atoms", "pass", "seconds", "kept", "Mtris", "MB before",
+                                                     "MB after", "smaller"))
+    for n in args.atoms:
+        centers, radii = globule(n)
+        start = time.perf_counter()
+        keep = ~culling.buried(centers, radii, probe=args.probe)
+        buried_seconds = time.perf_counter() - start
+        rows = [("buried", buried_seconds, keep.copy())]
+        start = time.perf_counter()
+        keep[keep] = culling.visible(centers[keep], radii[keep], framing_camera(centers))
+        rows.append(("+view", time.perf_counter() - start, keep))
+        for label, seconds, mask in rows:
+            report = culling.savings(mask)
+            print("%-9d %-8s %9.2f %10d %10.1f %10.0f %10.0f %6.1fx" % (
+                len(centers), label, seconds, report["kept"], report["triangles_after"] / 1e6,
+                report["bytes_before"] / 2**20, report["bytes_after"] / 2**20, report["ratio"]))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+"""GLB export: file size, export time, peak memory and load time of instanced atoms
+
+Plain Python, no Blender needed.  Random atoms are exported with
+gltf.export_atoms() as float32 and as quantized buffers; "load" reads the
+file back and decodes every accessor with NumPy, as a viewer's parser
+would.  "realized MB" is what one merged float mesh of all spheres would
+weigh (the size a plain exporter writes for a point-cloud object):
+
+    python bench_gltf.py                  # 10^4, 10^5, 10^6 atoms
+    python bench_gltf.py 10000 2000000
+
+Peak memory is traced Python/NumPy allocation during export only.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import geometry, gltf
+
+SEGMENTS, RING_COUNT = 16, 8
+
+
+def atoms(n, seed=0):
+    rng = np.random.default_rng(seed)
+    side = 3.0 * n ** (1 / 3.0)
+    centers = rng.uniform(0, side, (n, 3))
+    radii = rng.choice([1.7, 1.55, 1.52, 1.8], n)
+    colors = rng.uniform(0, 1, (n, 3))
+    return centers, radii, colors
+
+
+def load(path):
+    gltf_json, binary = gltf.read_glb(path)
+    for index in range(len(gltf_json["accessors"])):
+        gltf.accessor_array(gltf_json, binary, index)
+    return gltf_json
+
+
+def realized_bytes(n):
+    verts, loops, face_sizes = geometry.uv_sphere(SEGMENTS, RING_COUNT, 1.0)
+    triangles = int((face_sizes - 2).sum())
+    # float position + normal, uint32 indices
+    return n * (len(verts) * 24 + triangles * 12)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10**4, 10**5, 10**6]
+    directory = tempfile.mkdtemp(prefix="gltf-")
+    try:
+        print("%-9s %-9s %9s %9s %8s %9s %9s %12s" % ("atoms", "buffers", "export s", "MB", "B/atom", "peak MB",
+                                                       "load ms", "realized MB"))
+        for n in counts:
+            centers, radii, colors = atoms(n)
+            for quantize in (False, True):
+                path = os.path.join(directory, "atoms_%d_%d.glb" % (n, quantize))
+                tracemalloc.start()
+                start = time.perf_counter()
+                size = gltf.export_atoms(path, centers, radii, colors, SEGMENTS, RING_COUNT, quantize=quantize)
+                seconds = time.perf_counter() - start
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                start = time.perf_counter()
+                load(path)
+                loading = time.perf_counter() - start
+                print("%-9d %-9s %9.3f %9.2f %8.1f %9.1f %9.1f %12.1f" % (
+                    n, "int16" if quantize else "float32", seconds, size / 2**20, size / n, peak / 2**20,
+                    loading * 1e3, realized_bytes(n) / 2**20))
+                os.remove(path)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Sphere creation: bpy.ops primitives vs molviz.meshbuild bulk arrays
+
+Run inside Blender in background mode:
+
+    blender --background --factory-startup --python bench_meshbuild.py -- 1000 10000 100000
+
+The operator path gets slower with every object already in the scene, so it
+is only timed up to --max-ops spheres; larger counts are reported as skipped.
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import meshbuild
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+
+
+def random_atoms(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-50, 50, size=(count, 3))
+    radii = rng.choice([1.2, 1.55, 1.7, 1.8], size=count)
+    return centers, radii
+
+
+def ops_spheres(centers, radii, segments, ring_count):
+    for center, radius in zip(centers, radii):
+        bpy.ops.mesh.primitive_uv_sphere_add(segments=segments, ring_count=ring_count,
+                                             radius=radius, location=tuple(center))
+
+
+def bulk_spheres(centers, radii, segments, ring_count):
+    meshbuild.build_spheres(centers, radii, segments=segments, ring_count=ring_count)
+
+
+def timed(fn, *args):
+    clear_scene()
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("counts", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--segments", type=int, default=16)
+    parser.add_argument("--ring-count", type=int, default=8)
+    parser.add_argument("--max-ops", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    print("%10s %12s %12s %10s" % ("spheres", "ops (s)", "bulk (s)", "speedup"))
+    for count in args.counts:
+        centers, radii = random_atoms(count)
+        bulk = timed(bulk_spheres, centers, radii, args.segments, args.ring_count)
+        if count <= args.max_ops:
+            ops = timed(ops_spheres, centers, radii, args.segments, args.ring_count)
+            print("%10d %12.3f %12.3f %9.1fx" % (count, ops, bulk, ops / bulk))
+        else:
+            print("%10d %12s %12.3f %10s" % (count, "skipped", bulk, "-"))
+    clear_scene()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
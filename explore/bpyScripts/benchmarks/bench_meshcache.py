@@ -0,0 +1,50 @@
+"""Mesh cache: cold build vs warm (memory-mapped) load of evaluated arrays
+
+Plain Python, no Blender needed.  The "evaluation" is a NumPy UV sphere at
+the resolution SUBSURF level 3 would produce from a 32x16 sphere:
+
+    python bench_meshcache.py            # 20 lookups per size
+    python bench_meshcache.py 100
+
+The cache lives in a temporary directory and is removed afterward.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import geometry, meshcache
+
+
+def evaluate(radius, segments, ring_count):
+    verts, loops, face_sizes = geometry.uv_sphere(segments, ring_count, radius)
+    return {"verts": verts, "loops": loops, "face_sizes": face_sizes}
+
+
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    directory = tempfile.mkdtemp(prefix="meshcache-")
+    try:
+        cache = meshcache.MeshCache(directory)
+        print("%-12s %10s %12s %12s" % ("resolution", "MB", "build ms", "load ms"))
+        for segments, ring_count in ((32, 16), (128, 64), (256, 128), (1024, 512)):
+            params = {"primitive": "uv_sphere", "radius": 1.0, "segments": segments, "ring_count": ring_count}
+            start = time.perf_counter()
+            arrays = cache.get_or_build(params, lambda: evaluate(1.0, segments, ring_count))
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(lookups):
+                arrays = cache.get_or_build(params, lambda: evaluate(1.0, segments, ring_count))
+                arrays["verts"].sum()
+            load = (time.perf_counter() - start) / lookups
+            size = sum(array.nbytes for array in arrays.values()) / 2**20
+            print("%-12s %10.2f %12.2f %12.2f" % ("%dx%d" % (segments, ring_count), size, build * 1e3, load * 1e3))
+        print(cache.stats())
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
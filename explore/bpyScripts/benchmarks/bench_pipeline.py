@@ -0,0 +1,90 @@
+"""Process-pool geometry with a main-thread commit stage: scaling and stage overlap
+
+Two workloads go through meshbuild.build_parts() at each worker count:
+
+    chains      one sphere mesh per chain of a random structure
+    tiles       terrain tiles (noise heavy, little to commit)
+
+Workers = 1 is the serial baseline (no pool, no shared memory).  Per run:
+
+    wall        end to end
+    speedup     serial wall / wall
+    compute     summed worker seconds; "eff" is compute / (wall x workers)
+    commit      main thread inside the commit stage (bpy calls)
+    wait        main thread blocked on the pool; commit + wait ~ wall, so a
+                small wait means computing is hidden behind committing
+
+    python bench_pipeline.py --workers 1 2 4 8                     # fake bpy
+    blender --background --factory-startup --python bench_pipeline.py -- --workers 1 4 8
+
+Speedup is bounded by the CPUs present (reported) and, once workers keep up,
+by the commit stage, which is single threaded by design.
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import bpy
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "fakebpy"))
+    import bpy
+
+import numpy as np
+
+sys.path.append(os.path.join(HERE, ".."))
+from molviz import meshbuild, ownership, pipeline
+
+
+def chain_tasks(chains, atoms_per_chain, segments, seed=0):
+    rng = np.random.default_rng(seed)
+    tasks = []
+    for chain in range(chains):
+        centers = rng.uniform(0, 100, (atoms_per_chain, 3))
+        radii = rng.choice([1.7, 1.55, 1.52, 1.8], atoms_per_chain)
+        colors = rng.uniform(0, 1, (atoms_per_chain, 3))
+        tasks.append(("chain_%03d" % chain, pipeline.spheres, (centers, radii, colors, segments, segments // 2)))
+    return tasks
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--chains", type=int, default=32)
+    parser.add_argument("--atoms-per-chain", type=int, default=5000)
+    parser.add_argument("--segments", type=int, default=12)
+    parser.add_argument("--tiles", type=int, default=8, help="tiles per side")
+    parser.add_argument("--resolution", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    workloads = [
+        ("chains", lambda: chain_tasks(args.chains, args.atoms_per_chain, args.segments), False),
+        ("chains merged", lambda: chain_tasks(args.chains, args.atoms_per_chain, args.segments), True),
+        ("tiles", lambda: pipeline.tile_tasks(args.tiles * 100.0, 100.0, args.resolution, octaves=6), False),
+    ]
+    print("%d CPUs" % (os.cpu_count() or 1))
+    print("%-14s %7s %7s %8s %8s %5s %8s %8s %8s" % ("workload", "workers", "wall", "speedup", "compute", "eff",
+                                                      "commit", "wait", "objects"))
+    for label, tasks, merge in workloads:
+        serial = None
+        for workers in args.workers:
+            ownership.teardown()
+            start = time.perf_counter()
+            objects, report = meshbuild.build_parts(tasks(), workers=workers, merge=merge)
+            wall = time.perf_counter() - start
+            serial = serial or wall
+            print("%-14s %7d %7.2f %8.2f %8.2f %4.0f%% %8.2f %8.2f %8d" % (
+                label, workers, wall, serial / wall, report["compute"],
+                100 * report["compute"] / (wall * report["workers"]), report["consumer"], report["wait"],
+                len(objects)))
+            if report["fallback"]:
+                print("    fallback:", report["fallback"])
+    ownership.teardown()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
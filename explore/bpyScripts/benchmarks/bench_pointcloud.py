@@ -0,0 +1,68 @@
+"""Build time and peak memory of the point-cloud/instance-on-points path
+
+Run inside Blender in background mode:
+
+    blender --background --factory-startup --python bench_pointcloud.py -- 10000 100000 1000000
+
+"build" is the time to write the point mesh and attach the node group,
+"evaluate" the first depsgraph evaluation that actually instances the spheres.
+Peak RSS comes from getrusage and only ever grows, so run the counts in
+ascending order (or one per process) to read it per size.
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+
+import bpy
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import pointcloud
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def random_atoms(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-100, 100, size=(count, 3))
+    radii = rng.choice([1.2, 1.55, 1.7, 1.8], size=count)
+    colors = rng.uniform(0, 1, size=(count, 3))
+    return centers, radii, colors
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("counts", nargs="*", type=int, default=[10000, 100000, 1000000])
+    parser.add_argument("--segments", type=int, default=16)
+    parser.add_argument("--ring-count", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    print("%10s %10s %12s %10s %14s" % ("points", "build (s)", "evaluate (s)", "objects", "peak RSS (MB)"))
+    for count in args.counts:
+        clear_scene()
+        centers, radii, colors = random_atoms(count)
+        start = time.perf_counter()
+        pointcloud.build_atoms(centers, radii, colors, segments=args.segments, ring_count=args.ring_count)
+        built = time.perf_counter()
+        bpy.context.view_layer.update()
+        evaluated = time.perf_counter()
+        print("%10d %10.3f %12.3f %10d %14.1f" % (count, built - start, evaluated - built,
+                                                 len(bpy.data.objects), peak_rss_mb()))
+    clear_scene()
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
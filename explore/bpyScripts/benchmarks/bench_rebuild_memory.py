@@ -0,0 +1,59 @@
+"""Rebuild a scene 100 times and check bpy.data and memory hold steady
+
+    blender --background --factory-startup --python bench_rebuild_memory.py -- 100
+
+Each iteration tears down the previous build with ownership.teardown() and
+builds spheres, sticks, materials and a texture again.  Datablock counts
+must be identical every iteration and RSS should flatten after warm-up.
+"""
+import argparse
+import os
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import instancing, materials, meshbuild, ownership
+
+
+def current_rss_mb():
+    with open("/proc/self/statm") as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def build(count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-30, 30, size=(count, 3))
+    objects = instancing.sphere_objects(["Atom_%d" % i for i in range(count)], centers,
+                                        rng.choice([1.5, 1.7], size=count), segments=12, ring_count=6)
+    carbon = materials.principled("Carbon", (0.3, 0.3, 0.3, 1.0))
+    for obj in objects:
+        materials.assign(obj, carbon)
+    meshbuild.build_sticks(centers[:-1], centers[1:], 0.2, colors=rng.uniform(0, 1, (count - 1, 3)))
+    # a texture made outside the builders, picked up by the begin()/end() snapshot
+    bpy.data.textures.new(name="SnowDisplacement", type='CLOUDS')
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("iterations", nargs="?", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print("%10s %10s %10s %10s %10s %10s" % ("iteration", "objects", "meshes", "materials", "textures", "RSS (MB)"))
+    for iteration in range(args.iterations):
+        ownership.teardown()
+        with ownership.session():
+            build()
+        if iteration % 10 == 0 or iteration == args.iterations - 1:
+            rows = ownership.report()
+            print("%10d %10d %10d %10d %10d %10.1f" % (iteration, rows["objects"]["count"], rows["meshes"]["count"],
+                                                       rows["materials"]["count"], rows["textures"]["count"],
+                                                       current_rss_mb()))
+    print(ownership.format_report(ownership.report(only_tracked=True)))
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
@@ -0,0 +1,62 @@
+"""Incremental reconcile vs full rebuild on an N-atom description
+
+    blender --background --factory-startup --python bench_reconcile.py -- 10000
+
+Builds the scene once, re-runs reconcile with nothing changed, then with one
+atom recolored and one moved, and finally times a delete-everything rebuild.
+The "touched" column must stay at 0, 1, 1 regardless of N.
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import reconcile
+
+
+def description(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-60, 60, size=(count, 3)).round(3)
+    return {
+        "Atom_%d" % i: {"primitive": "sphere", "radius": 1.5, "segments": 12, "ring_count": 6,
+                        "location": tuple(centers[i]), "material": "Carbon",
+                        "color": (0.3, 0.3, 0.3, 1.0), "roughness": 0.4}
+        for i in range(count)
+    }
+
+
+def timed_reconcile(label, desc):
+    start = time.perf_counter()
+    report = reconcile.reconcile(desc)
+    print("%-12s %10.3f %10d" % (label, time.perf_counter() - start, reconcile.touched(report)))
+    return report
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("count", nargs="?", type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    desc = description(args.count)
+    print("%-12s %10s %10s" % ("step", "time (s)", "touched"))
+    timed_reconcile("initial", desc)
+    timed_reconcile("no change", desc)
+    desc["Atom_0"] = dict(desc["Atom_0"], material="Oxygen", color=(1.0, 0.05, 0.05, 1.0))
+    timed_reconcile("recolor 1", desc)
+    desc["Atom_1"] = dict(desc["Atom_1"], location=(0.0, 0.0, 0.0))
+    timed_reconcile("move 1", desc)
+
+    start = time.perf_counter()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    timed_reconcile("rebuild", desc)
+    print("(rebuild includes %.3f s of deleting)" % (time.perf_counter() - start))
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
@@ -0,0 +1,70 @@
+"""Render scheduling: static frame chunks vs the cost-balanced RenderFarm
+
+Plain Python with the fake renderer, so no Blender is needed:
+
+    python bench_renderfarm.py                 # 120 frames, 4 workers
+    python bench_renderfarm.py 240 8 --crash 25
+
+Frame cost follows a turntable where half the orbit looks at the heavy side
+of the scene.  The static split hands each worker a contiguous block of
+frames, as a shell loop would; the farm pulls the costliest pending frame.
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import renderfarm
+
+
+def static_split(tasks, workers, cost):
+    renderer = renderfarm.FakeRenderer(cost)
+    chunk = int(math.ceil(len(tasks) / float(workers)))
+
+    def run(block):
+        for task in block:
+            renderer.render(task)
+
+    threads = [threading.Thread(target=run, args=(tasks[i:i + chunk],)) for i in range(0, len(tasks), chunk)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("frames", nargs="?", type=int, default=120)
+    parser.add_argument("workers", nargs="?", type=int, default=4)
+    parser.add_argument("--scale", type=float, default=0.02, help="seconds for the cheapest frame")
+    parser.add_argument("--crash", type=int, default=0, help="crash every Nth render in the farm run")
+    args = parser.parse_args(argv)
+
+    def cost(task):
+        angle = 2 * math.pi * task["frame"] / args.frames
+        return args.scale * (1 + 4 * max(0.0, math.cos(angle)))
+
+    directory = tempfile.mkdtemp(prefix="renderfarm-")
+    try:
+        tasks = renderfarm.turntable_tasks(args.frames, directory)
+        wall = static_split(tasks, args.workers, cost)
+        print("static chunks: %.2f s (%.1f frames/min)" % (wall, 60 * args.frames / wall))
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+
+        farm = renderfarm.RenderFarm(renderfarm.FakeRenderer.factory(cost=cost, fail_every=args.crash),
+                                     workers=args.workers)
+        print(renderfarm.format_report(farm.run(tasks, directory)))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
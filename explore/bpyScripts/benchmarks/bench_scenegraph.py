@@ -0,0 +1,111 @@
+"""Scene graph transforms and BVH queries at 10^4 - 10^6 nodes
+
+Plain Python, no Blender needed.  A random structure of atoms (leaves with
+sphere bounds) sits under residue and chain group nodes.  Per size:
+
+    build       add_many for all nodes plus the first update()
+    move 1      rigid transform of one chain, update() of its subtree only
+    move all    transform of the root, update() of every node
+    loop        the same move done per object with 4x4 matmuls in Python,
+                as location/matrix_world edits would
+    bvh         BVH construction over the atoms' world boxes
+    refit       refit() after "move 1" (changed leaves and their ancestors)
+    rebuild     a new BVH after the same move
+    pick        rays through random pixels, exact sphere hit, per second
+    frustum     one frustum query under a camera framing the structure
+
+    python bench_scenegraph.py                      # 10^4, 10^5, 10^6 atoms
+    python bench_scenegraph.py --atoms 100000 --rays 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import lod, scenegraph
+
+
+def structure(graph, atoms, chains=20, residue_size=10, seed=0):
+    """Chains of residues of atoms; returns (chain nodes, atom nodes, atom radii)"""
+    rng = np.random.default_rng(seed)
+    extent = 10.0 * atoms ** (1 / 3.0)
+    root = graph.add()
+    chain_nodes = graph.add_many(scenegraph.translations(rng.uniform(-extent / 2, extent / 2, (chains, 3))),
+                                 parent=root)
+    residues = max(chains, atoms // residue_size)
+    residue_nodes = graph.add_many(scenegraph.translations(rng.uniform(-extent / 4, extent / 4, (residues, 3))),
+                                   parent=chain_nodes[np.arange(residues) % chains])
+    radii = rng.choice([1.7, 1.55, 1.52, 1.8], atoms)
+    atom_nodes = graph.add_many(scenegraph.translations(rng.uniform(-4, 4, (atoms, 3))),
+                                parent=residue_nodes[rng.integers(0, residues, atoms)],
+                                bounds=scenegraph.sphere_bounds(radii))
+    return chain_nodes, atom_nodes, radii
+
+
+def framing_camera(graph, resolution=(1920, 1080), fov=np.radians(39.6)):
+    extent = np.abs(graph.world[:, :3, 3]).max()
+    matrix = np.eye(4)
+    matrix[:3, 3] = (0.0, 0.0, 0.6 * extent / np.tan(fov / 2.0) + extent)
+    return lod.Camera(matrix, fov, resolution)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def python_loop(graph):
+    """World matrices by walking the nodes one at a time (parents come first)"""
+    world = [None] * len(graph)
+    for node, (parent, local) in enumerate(zip(graph.parent.tolist(), graph.local)):
+        world[node] = local if parent < 0 else world[parent] @ local
+    return world
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atoms", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    parser.add_argument("--rays", type=int, default=200)
+    parser.add_argument("--loop-limit", type=int, default=10**5, help="skip the Python loop above this many atoms")
+    args = parser.parse_args(argv)
+
+    print("%-8s %8s %7s %8s %7s %6s %7s %8s %8s %9s %8s %6s" % (
+        "atoms", "build", "move 1", "move all", "loop", "bvh", "refit", "rebuild", "picks/s", "frustum",
+        "in view", "cost"))
+    for n in args.atoms:
+        graph = scenegraph.SceneGraph()
+        build, (chains, atoms, radii) = timed(lambda: (structure(graph, n), graph.update())[0])
+        radius_of = np.zeros(len(graph))
+        radius_of[atoms] = radii
+
+        graph.transform(chains[0], scenegraph.rotation((0, 0, 1), 0.3, pivot=graph.world[chains[0], :3, 3]),
+                        space="world")
+        move_one, changed = timed(graph.update)
+        graph.transform(0, scenegraph.rotation((1, 0, 0), 0.1))
+        move_all, _ = timed(graph.update)
+        loop = timed(lambda: python_loop(graph))[0] if n <= args.loop_limit else float("nan")
+
+        bvh_seconds, tree = timed(lambda: scenegraph.BVH(graph.world_bounds(atoms), atoms))
+        graph.transform(chains[1], scenegraph.translations([(5.0, 0.0, 0.0)])[0])
+        changed = graph.update()
+        refit, _ = timed(lambda: tree.refit(changed, graph.world_bounds(changed)))
+        rebuild, _ = timed(lambda: scenegraph.BVH(graph.world_bounds(atoms), atoms))
+
+        camera = framing_camera(graph)
+        intersect = scenegraph.sphere_intersector(lambda ids: graph.world[ids, :3, 3], lambda ids: radius_of[ids])
+        rng = np.random.default_rng(1)
+        pixels = rng.uniform(0, 1, (args.rays, 2)) * camera.resolution
+        picking, _ = timed(lambda: [tree.pick(*scenegraph.camera_ray(camera, pixel), intersect=intersect)
+                                    for pixel in pixels])
+        frustum, seen = timed(lambda: tree.frustum(scenegraph.frustum_planes(camera)))
+        print("%-8d %8.3f %7.4f %8.3f %7.2f %6.2f %7.4f %8.3f %8.0f %9.4f %8d %6.2f" % (
+            n, build, move_one, move_all, loop, bvh_seconds, refit, rebuild, args.rays / picking, frustum,
+            len(seen), tree.cost() / tree.built_cost))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
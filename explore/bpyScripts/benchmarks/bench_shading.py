@@ -0,0 +1,104 @@
+"""Recoloring atoms: per-color materials vs the shared attribute shader
+
+Each size is recolored three times (by element, by chain, by a b-factor
+ramp of 256 steps) in three ways:
+
+    materials     one Principled material per distinct color, linked per object
+    objects       the shared OBJECT shader, Object.color written per object
+    pointcloud    the shared INSTANCER shader, one attribute write for all atoms
+
+    blender --background --factory-startup --python bench_shading.py -- 1000 10000 100000
+    python bench_shading.py 1000 10000          # fake bpy, Python overhead only
+
+"materials" is the number of material datablocks in the file afterward.
+The object-based ways are skipped above --max-objects.
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import bpy
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "fakebpy"))
+    import bpy
+
+import numpy as np
+
+sys.path.append(os.path.join(HERE, ".."))
+from molviz import instancing, materials, ownership, pointcloud, shading
+
+
+def schemes(count, seed=0):
+    """(name, (count, 4) colors) for three colorings of the same atoms"""
+    rng = np.random.default_rng(seed)
+    element = np.array([[0.5, 0.5, 0.5, 1], [0.2, 0.2, 1, 1], [1, 0.1, 0.1, 1], [1, 1, 0.2, 1]])
+    chain = rng.uniform(0, 1, (8, 4))
+    chain[:, 3] = 1
+    ramp = np.linspace(0, 1, 256)
+    bfactor = np.stack([ramp, 0.2 * np.ones(256), 1 - ramp, np.ones(256)], axis=1)
+    return [
+        ("element", element[rng.integers(0, 4, count)]),
+        ("chain", chain[np.sort(rng.integers(0, 8, count))]),
+        ("bfactor", bfactor[rng.integers(0, 256, count)]),
+    ]
+
+
+def atoms(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-100, 100, (count, 3)), rng.choice([1.2, 1.55, 1.7, 1.8], count)
+
+
+def recolor_materials(objects, colors):
+    for obj, color in zip(objects, colors):
+        mat = materials.principled("Color", tuple(color), roughness=0.4)
+        materials.assign(obj, mat, per_object=True)
+
+
+def recolor_objects(objects, colors):
+    shading.write_objects(objects, colors)
+
+
+def run(count, max_objects):
+    centers, radii = atoms(count)
+    rows = []
+    if count <= max_objects:
+        for label, recolor, prepare in (("materials", recolor_materials, None),
+                                        ("objects", recolor_objects, shading.assign)):
+            ownership.teardown()
+            objects = instancing.sphere_objects(["Atom"] * count, centers, radii, 16, 8)
+            if prepare is not None:
+                for obj in objects:
+                    prepare(obj)
+            for scheme, colors in schemes(count):
+                start = time.perf_counter()
+                recolor(objects, colors)
+                rows.append((count, label, scheme, time.perf_counter() - start, len(bpy.data.materials)))
+    ownership.teardown()
+    cloud = pointcloud.build_atoms(centers, radii)
+    for scheme, colors in schemes(count):
+        start = time.perf_counter()
+        shading.write(cloud.data, colors=colors)
+        rows.append((count, "pointcloud", scheme, time.perf_counter() - start, len(bpy.data.materials)))
+    ownership.teardown()
+    return rows
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("counts", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--max-objects", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    print("%9s %-11s %-8s %10s %10s" % ("atoms", "method", "scheme", "ms", "materials"))
+    for count in args.counts:
+        for row in run(count, args.max_objects):
+            print("%9d %-11s %-8s %10.2f %10d" % (row[0], row[1], row[2], row[3] * 1e3, row[4]))
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
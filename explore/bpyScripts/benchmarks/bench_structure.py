@@ -0,0 +1,82 @@
+"""Loader throughput: atoms/sec and bytes/atom for PDB and mmCIF
+
+Plain Python, no Blender needed:
+
+    python bench_structure.py                 # synthetic files, 10^4..10^6 atoms
+    python bench_structure.py 3wu2.cif.gz     # real structures
+
+Synthetic files are written to a temporary directory and removed afterward.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import structure
+
+ELEMENTS = np.array(["C", "N", "O", "S"])
+
+
+def write_pdb(path, count, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(-500, 500, size=(count, 3))
+    elements = ELEMENTS[rng.integers(0, len(ELEMENTS), count)]
+    with open(path, "w") as out:
+        for i in range(count):
+            x, y, z = coords[i]
+            out.write("ATOM  %5d  %-3s ALA %s%4d    %8.3f%8.3f%8.3f  1.00 20.00          %2s  \n"
+                      % (i % 100000, elements[i], "ABCD"[i % 4], (i // 10) % 10000, x, y, z, elements[i]))
+
+
+def write_cif(path, count, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(-500, 500, size=(count, 3))
+    elements = ELEMENTS[rng.integers(0, len(ELEMENTS), count)]
+    fields = ["group_PDB", "id", "type_symbol", "label_atom_id", "label_comp_id", "label_asym_id",
+              "label_seq_id", "Cartn_x", "Cartn_y", "Cartn_z", "B_iso_or_equiv", "pdbx_PDB_model_num"]
+    with open(path, "w") as out:
+        out.write("data_SYNTHETIC\n#\nloop_\n")
+        for field in fields:
+            out.write("_atom_site.%s\n" % field)
+        for i in range(count):
+            x, y, z = coords[i]
+            out.write("ATOM %d %s %s ALA %s %d %.3f %.3f %.3f 20.00 1\n"
+                      % (i + 1, elements[i], elements[i], "ABCD"[i % 4], i // 10, x, y, z))
+        out.write("#\n")
+
+
+def report(label, path):
+    start = time.perf_counter()
+    atoms = structure.load(path)
+    elapsed = time.perf_counter() - start
+    print("%-28s %10d %12.0f %10.1f %10.1f" % (label, len(atoms), len(atoms) / elapsed,
+                                               atoms.nbytes() / max(len(atoms), 1),
+                                               os.path.getsize(path) / elapsed / 2**20))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*")
+    parser.add_argument("--counts", nargs="*", type=int, default=[10000, 100000, 1000000])
+    args = parser.parse_args(argv)
+
+    print("%-28s %10s %12s %10s %10s" % ("file", "atoms", "atoms/sec", "bytes/atom", "MB/sec"))
+    for path in args.paths:
+        report(os.path.basename(path), path)
+    if args.paths:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.counts:
+            for suffix, writer in ((".pdb", write_pdb), (".cif", write_cif)):
+                path = os.path.join(tmp, "synthetic%s" % suffix)
+                writer(path, count)
+                report("synthetic %d%s" % (count, suffix), path)
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+"""Scene-build benchmark suite: snowman scripts and molecular builders, 10..10^6
+
+Runs against real Blender when bpy is importable, otherwise against the
+lightweight stand-in in benchmarks/fakebpy, so regressions in our own Python
+overhead show up on any Linux box:
+
+    python bench_suite.py                                  # fake bpy
+    python bench_suite.py --sizes 10 1000 100000 --compare
+    blender --background --factory-startup --python bench_suite.py -- --compare
+
+Each case builds N primitives, then the scene is torn down.  Build time,
+primitives/s, RSS and bpy.data counts are recorded.  Every run is appended
+to a JSON-lines results file together with the git commit, and --compare
+prints the ratio against the latest stored run of the same backend from a
+different commit (or --baseline COMMIT), exiting 1 if any case got slower
+than --threshold.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+
+try:
+    import bpy
+    BACKEND = "blender " + bpy.app.version_string
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "fakebpy"))
+    import bpy
+    BACKEND = "fake"
+
+import numpy as np
+
+sys.path.append(ROOT)
+from molviz import instancing, materials, meshbuild, ownership, pointcloud, structure
+
+SIZES = (10, 100, 1000, 10**4, 10**5, 10**6)
+DEFAULT_RESULTS = os.path.join(HERE, "results", "suite.jsonl")
+
+
+def rss_mb():
+    """Current resident set size (peak on systems without /proc)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def clear_scene():
+    ownership.teardown()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for name in ("meshes", "materials", "node_groups", "textures"):
+        collection = getattr(bpy.data, name)
+        for datablock in list(collection):
+            collection.remove(datablock)
+    instancing.library.clear()
+    materials.registry.clear()
+
+
+def scene_counts():
+    meshes = list(bpy.data.meshes)
+    return {
+        "objects": len(bpy.data.objects),
+        "meshes": len(meshes),
+        "materials": len(bpy.data.materials),
+        "vertices": sum(len(mesh.vertices) for mesh in meshes),
+    }
+
+
+# --- cases ------------------------------------------------------------------
+#
+# A case is (primitives per call, limit, setup) where setup() returns a
+# build(count) callable; count is the number of primitives to make.
+
+def _script(path, builder, per_call):
+    """Load a snowman script once (it builds one snowman) and repeat its builder"""
+    def setup():
+        saved = sys.argv
+        sys.argv = [path]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                namespace = runpy.run_path(os.path.join(ROOT, path), run_name="__bench__")
+        finally:
+            sys.argv = saved
+        build_one = namespace[builder]
+
+        def build(count):
+            # the scripts print progress; keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(max(1, count // per_call)):
+                    build_one()
+        return build
+    return setup
+
+
+def _atoms(count, seed=0):
+    rng = np.random.default_rng(seed)
+    # roughly protein density: ~0.01 atoms per cubic angstrom
+    side = (count / 0.01) ** (1.0 / 3.0)
+    centers = rng.uniform(0, side, size=(count, 3))
+    radii = np.array([structure.VDW_RADII[e] for e in ("C", "N", "O", "S")])[rng.integers(0, 4, count)]
+    return centers, radii
+
+
+def _spheres_objects():
+    def build(count):
+        centers, radii = _atoms(count)
+        instancing.sphere_objects(["Atom_%d" % i for i in range(count)], centers, radii,
+                                  segments=16, ring_count=8)
+    return build
+
+
+def _spheres_mesh():
+    def build(count):
+        centers, radii = _atoms(count)
+        meshbuild.build_spheres(centers, radii, segments=12, ring_count=6)
+    return build
+
+
+def _point_cloud():
+    def build(count):
+        centers, radii = _atoms(count)
+        colors = np.tile([0.5, 0.5, 0.5, 1.0], (count, 1))
+        pointcloud.build_atoms(centers, radii, colors)
+    return build
+
+
+def _sticks():
+    def build(count):
+        rng = np.random.default_rng(0)
+        # a random walk, one stick per step
+        points = np.cumsum(rng.normal(scale=1.5, size=(count + 1, 3)), axis=0)
+        meshbuild.build_sticks(points[:-1], points[1:], radii=0.15,
+                               colors=np.tile([0.5, 0.5, 0.5, 1.0], (count, 1)))
+    return build
+
+
+CASES = {
+    # the snowman scripts; per-object Python work, so they stop at 10^5.
+    # createSnowman clears the scene first, so that case times rebuilds
+    "snowman": (6, 10**5, _script("snowman/snowman.py", "createSnowman", 6)),
+    "snowman_detailed": (4, 10**5, _script("snowman/snowman-detailed.py", "create_snowman", 4)),
+    "snowman_simple": (6, 10**5, _script("snowman/snowman-simple.py", "create_simple_snowman", 6)),
+    # the molecular equivalents
+    "atoms_objects": (1, 10**5, _spheres_objects),
+    "atoms_mesh": (1, 10**6, _spheres_mesh),
+    "atoms_pointcloud": (1, 10**6, _point_cloud),
+    "bonds_sticks": (1, 10**6, _sticks),
+}
+
+
+def run_case(name, sizes):
+    per_call, limit, setup = CASES[name]
+    clear_scene()
+    build = setup()
+    rows = []
+    for size in sizes:
+        if size > limit:
+            continue
+        clear_scene()
+        before = rss_mb()
+        start = time.perf_counter()
+        build(size)
+        elapsed = time.perf_counter() - start
+        after = rss_mb()
+        row = {"case": name, "size": size, "seconds": elapsed, "per_second": size / elapsed if elapsed else 0.0,
+               "rss_mb": after, "rss_delta_mb": after - before}
+        row.update(scene_counts())
+        rows.append(row)
+        print("%-18s %9d %10.3f %12.0f %10.1f %10d %9d %12d" % (
+            name, size, elapsed, row["per_second"], row["rss_delta_mb"], row["objects"], row["meshes"],
+            row["vertices"]))
+        sys.stdout.flush()
+    clear_scene()
+    return rows
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+        dirty = subprocess.call(["git", "diff", "--quiet", "HEAD", "--", ROOT], cwd=HERE,
+                                stderr=subprocess.DEVNULL) != 0
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_runs(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as results:
+        return [json.loads(line) for line in results if line.strip()]
+
+
+def save_run(path, run):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a") as results:
+        results.write(json.dumps(run) + "\n")
+
+
+def compare(run, runs, baseline=None, threshold=1.2):
+    """Print time ratios against a stored run; returns the number of regressions"""
+    candidates = [old for old in runs if old["backend"] == run["backend"]
+                  and (old["commit"].startswith(baseline) if baseline else old["commit"] != run["commit"])]
+    if not candidates:
+        print("no stored %s run to compare with" % run["backend"])
+        return 0
+    old = candidates[-1]
+    previous = {(row["case"], row["size"]): row for row in old["results"]}
+    print("\ncompared with %s (%s)" % (old["commit"], old["time"]))
+    print("%-18s %9s %10s %10s %8s" % ("case", "size", "old s", "new s", "ratio"))
+    regressions = 0
+    for row in run["results"]:
+        before = previous.get((row["case"], row["size"]))
+        if before is None or before["seconds"] <= 0:
+            continue
+        ratio = row["seconds"] / before["seconds"]
+        # tiny sizes are noise-dominated; only flag runs that take measurable time
+        slower = ratio > threshold and row["seconds"] > 0.05
+        regressions += slower
+        print("%-18s %9d %10.3f %10.3f %7.2fx%s" % (row["case"], row["size"], before["seconds"], row["seconds"],
+                                                   ratio, "  SLOWER" if slower else ""))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--results", default=DEFAULT_RESULTS)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--baseline", help="commit to compare with (default: latest other commit)")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    print("backend: %s, python %s" % (BACKEND, platform.python_version()))
+    print("%-18s %9s %10s %12s %10s %10s %9s %12s" % (
+        "case", "size", "seconds", "prims/s", "dRSS MB", "objects", "meshes", "vertices"))
+    results = []
+    for name in args.cases:
+        results.extend(run_case(name, sorted(args.sizes)))
+
+    run = {
+        "commit": git_commit(),
+        "time": datetime.datetime.now().isoformat(timespec="seconds"),
+        "backend": BACKEND,
+        "python": platform.python_version(),
+        "machine": platform.node(),
+        "results": results,
+    }
+    runs = load_runs(args.results)
+    if not args.no_save:
+        save_run(args.results, run)
+    if args.compare or args.baseline:
+        if compare(run, runs, args.baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
@@ -0,0 +1,69 @@
+"""Molecular surfaces: build time, mesh size, peak memory and seam check per atom count
+
+Plain Python, no Blender needed.  Random atoms at protein-like density
+(one per 27 cubic Angstrom) go through surface.molecular_surface() for
+each kind.  "open edges" counts edges not shared by exactly two triangles;
+it must be 0, whatever the chunk size:
+
+    python bench_surface.py                         # 10^4, 10^5 atoms
+    python bench_surface.py --atoms 1000000 --kinds ses --spacing 1.0
+    python bench_surface.py --workers 8             # chunks in a process pool
+
+Peak memory is traced Python/NumPy allocation of this process (pool workers
+are not counted).
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import surface
+
+
+def atoms(n, seed=0):
+    rng = np.random.default_rng(seed)
+    side = 3.0 * n ** (1 / 3.0)
+    centers = rng.uniform(0, side, (n, 3))
+    radii = rng.choice([1.7, 1.55, 1.52, 1.8], n)
+    return centers, radii
+
+
+def open_edges(loops):
+    triangles = loops.reshape(-1, 3)
+    edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+    _, counts = np.unique(edges, axis=0, return_counts=True)
+    return int((counts != 2).sum())
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atoms", type=int, nargs="+", default=[10**4, 10**5])
+    parser.add_argument("--kinds", nargs="+", default=["vdw", "sas", "ses"])
+    parser.add_argument("--spacing", type=float, default=0.8)
+    parser.add_argument("--chunk-size", type=int, default=surface.CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    print("%-9s %-5s %7s %10s %10s %9s %10s %9s %11s" % ("atoms", "kind", "chunks", "verts", "triangles",
+                                                         "seconds", "atoms/s", "peak MB", "open edges"))
+    for n in args.atoms:
+        centers, radii = atoms(n)
+        for kind in args.kinds:
+            tracemalloc.start()
+            start = time.perf_counter()
+            arrays = surface.molecular_surface(centers, radii, kind, spacing=args.spacing,
+                                               chunk_size=args.chunk_size, workers=args.workers)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("%-9d %-5s %7d %10d %10d %9.2f %10.0f %9.1f %11d" % (
+                n, kind, arrays["chunks"], len(arrays["verts"]), len(arrays["face_sizes"]), seconds, n / seconds,
+                peak / 2**20, open_edges(arrays["loops"])))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,109 @@
+"""Ground terrain: SUBSURF + DISPLACE modifiers vs NumPy heightfield
+
+For each subdivision level L the modifier path is a plane with SUBSURF at
+level L and a CLOUDS DISPLACE; the NumPy path is terrain.grid() at the same
+2^L quads per side.  Both report build time (through the first evaluated
+mesh) and the cost of re-evaluating the depsgraph after a transform edit,
+which is what every interactive update pays.
+
+    blender --background --factory-startup --python bench_terrain.py -- 4 6 8 10
+    blender --background --factory-startup --python bench_terrain.py -- --tiles 2000 100 128
+"""
+import argparse
+import os
+import sys
+import time
+
+import bpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import meshbuild, terrain
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for mesh in list(bpy.data.meshes):
+        bpy.data.meshes.remove(mesh)
+    for tex in list(bpy.data.textures):
+        bpy.data.textures.remove(tex)
+
+
+def evaluated_vertices(obj):
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    evaluated = obj.evaluated_get(depsgraph)
+    mesh = evaluated.to_mesh()
+    count = len(mesh.vertices)
+    evaluated.to_mesh_clear()
+    return count
+
+
+def reevaluate(obj, repeats):
+    start = time.perf_counter()
+    for i in range(repeats):
+        obj.location.x = 0.001 * (i % 2)
+        evaluated_vertices(obj)
+    return (time.perf_counter() - start) / repeats
+
+
+def modifier_ground(size, level):
+    obj = meshbuild.new_object("Ground", meshbuild.mesh_from_arrays("Ground", *terrain.grid(size, 1, strength=0.0)))
+    subsurf = obj.modifiers.new(name="Subdivision", type='SUBSURF')
+    subsurf.subdivision_type = 'SIMPLE'
+    subsurf.levels = level
+    displace = obj.modifiers.new(name="Displace", type='DISPLACE')
+    tex = bpy.data.textures.new(name="SnowDisplacement", type='CLOUDS')
+    tex.noise_scale = 0.5
+    displace.texture = tex
+    displace.strength = 0.1
+    return obj
+
+
+def compare(levels, size, repeats):
+    print("%-6s %10s %14s %14s %14s %14s" % ("level", "vertices", "modifier ms", "numpy ms",
+                                           "mod update ms", "numpy update ms"))
+    for level in levels:
+        clear_scene()
+        start = time.perf_counter()
+        obj = modifier_ground(size, level)
+        vertices = evaluated_vertices(obj)
+        modifier_build = time.perf_counter() - start
+        modifier_update = reevaluate(obj, repeats)
+
+        clear_scene()
+        start = time.perf_counter()
+        obj = meshbuild.build_terrain(size, 2 ** level, strength=0.1, noise_scale=0.5)
+        evaluated_vertices(obj)
+        numpy_build = time.perf_counter() - start
+        numpy_update = reevaluate(obj, repeats)
+
+        print("%-6d %10d %14.1f %14.1f %14.2f %14.2f" % (level, vertices, modifier_build * 1e3, numpy_build * 1e3,
+                                                       modifier_update * 1e3, numpy_update * 1e3))
+
+
+def streamed(extent, tile_size, resolution):
+    clear_scene()
+    start = time.perf_counter()
+    objects = meshbuild.build_terrain(extent, resolution, tile_size=tile_size, strength=0.1, noise_scale=0.5)
+    elapsed = time.perf_counter() - start
+    vertices = sum(len(obj.data.vertices) for obj in objects)
+    print("%d tiles, %d vertices in %.2f s (%.0f vertices/s)" % (len(objects), vertices, elapsed, vertices / elapsed))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("levels", nargs="*", type=int, default=[4, 6, 8])
+    parser.add_argument("--size", type=float, default=10.0)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--tiles", nargs=3, type=float, metavar=("EXTENT", "TILE", "RESOLUTION"))
+    args = parser.parse_args(argv)
+    if args.tiles:
+        extent, tile_size, resolution = args.tiles
+        streamed(extent, tile_size, int(resolution))
+    else:
+        compare(args.levels, args.size, args.repeats)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    main(argv)
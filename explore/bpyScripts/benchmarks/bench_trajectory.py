@@ -0,0 +1,110 @@
+"""Trajectory streaming: read throughput, resident memory and per-frame update cost
+
+A random-walk DCD of --atoms atoms and --frames frames is written to a
+temporary file, then:
+
+    read        every frame copied out of the memory map, at map budgets
+                small and large; RSS growth shows what the budget bounds
+    decimated   every --step-th frame
+    stream      trajectoryscene writing each frame into a point-cloud mesh
+
+    python bench_trajectory.py --atoms 100000 --frames 1000     # fake bpy
+    blender --background --factory-startup --python bench_trajectory.py -- --atoms 100000
+
+"keyframe calls" compares per-frame keyframe_insert (atoms x kept frames x 3)
+with the bulk bake (3 fcurves per atom).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+try:
+    import bpy
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "fakebpy"))
+    import bpy
+
+import numpy as np
+
+sys.path.append(os.path.join(HERE, ".."))
+from molviz import ownership, pointcloud, trajectory, trajectoryscene
+
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def random_walk(atoms, frames, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(-50, 50, (atoms, 3)).astype(np.float32)
+    for _ in range(frames):
+        coords += rng.normal(0, 0.05, coords.shape).astype(np.float32)
+        yield coords
+
+
+def read_all(traj, step=1):
+    start = time.perf_counter()
+    before = rss_mb()
+    grown = 0.0
+    count = 0
+    for _, coords in traj.iter_frames(step=step):
+        coords[0, 0]
+        count += 1
+        grown = max(grown, rss_mb() - before)
+    return count, time.perf_counter() - start, grown
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--atoms", type=int, default=100000)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--step", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="trajectory-")
+    try:
+        path = os.path.join(directory, "walk.dcd")
+        start = time.perf_counter()
+        trajectory.write_dcd(path, random_walk(args.atoms, args.frames), args.atoms)
+        size = os.path.getsize(path) / 2**20
+        print("wrote %d frames x %d atoms (%.0f MB) in %.1f s" % (args.frames, args.atoms, size,
+                                                                    time.perf_counter() - start))
+
+        print("%-26s %8s %10s %10s %12s" % ("pass", "frames", "seconds", "frames/s", "RSS +MB"))
+        for label, budget, step in (("read, 64 MB map budget", 64 * 2**20, 1),
+                                    ("read, unbounded map", 2**62, 1),
+                                    ("decimated x%d" % args.step, 64 * 2**20, args.step)):
+            traj = trajectory.load(path, map_budget=budget)
+            count, seconds, grown = read_all(traj, step)
+            traj.close()
+            print("%-26s %8d %10.2f %10.1f %12.1f" % (label, count, seconds, count / seconds, grown))
+
+        traj = trajectory.load(path)
+        ownership.teardown()
+        atoms = pointcloud.build_atoms(traj.frame(0), 1.5)
+        stream = trajectoryscene.stream(atoms, traj, step=1, set_range=False)
+        start = time.perf_counter()
+        for frame in range(1, min(args.frames, 200) + 1):
+            stream.update(frame)
+        seconds = time.perf_counter() - start
+        print("%-26s %8d %10.2f %10.1f" % ("stream into point cloud", frame, seconds, frame / seconds))
+        trajectoryscene.stop()
+        ownership.teardown()
+        traj.close()
+
+        kept = len(traj.indices(step=args.step))
+        print("keyframe calls for %d kept frames: keyframe_insert %d, bulk bake %d foreach_set" % (
+            kept, args.atoms * kept * 3, args.atoms * 3))
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    main(argv)
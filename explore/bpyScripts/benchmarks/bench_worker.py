@@ -0,0 +1,59 @@
+"""Jobs per minute: a fresh Blender per job vs one persistent worker
+
+Plain Python; needs a blender executable:
+
+    python bench_worker.py --blender /opt/blender/blender --jobs 50 snowman/snowman-simple.py
+
+The cold path runs `blender --background --factory-startup --python SCRIPT`
+per job; the warm path sends the same jobs to worker/blender_worker.py.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import worker
+
+
+def main(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", nargs="?", default="snowman/snowman-simple.py")
+    parser.add_argument("--blender", default="blender")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--cold-jobs", type=int, default=5, help="cold starts are slow; time fewer")
+    parser.add_argument("--port", type=int, default=worker.DEFAULT_PORT + 1)
+    args = parser.parse_args(argv)
+    script = worker.resolve_script(args.script)
+
+    start = time.perf_counter()
+    for _ in range(args.cold_jobs):
+        subprocess.run([args.blender, "--background", "--factory-startup", "--python", script],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    cold = (time.perf_counter() - start) / args.cold_jobs
+
+    start = time.perf_counter()
+    process, client = worker.launch(args.port, args.blender)
+    startup = time.perf_counter() - start
+    try:
+        start = time.perf_counter()
+        replies = client.map([{"type": "build", "script": args.script}] * args.jobs)
+        warm = (time.perf_counter() - start) / args.jobs
+        failed = [reply for reply in replies if not reply["ok"]]
+        stats = client.stats()
+    finally:
+        client.shutdown()
+        process.wait(timeout=30)
+
+    print("cold:   %8.3f s/job  %8.1f jobs/min" % (cold, 60.0 / cold))
+    print("worker: %8.3f s/job  %8.1f jobs/min  (startup %.2f s, %d failed)"
+          % (warm, 60.0 / warm, startup, len(failed)))
+    print("worker datablocks after %d jobs:" % stats["jobs"],
+          {name: row["count"] for name, row in stats["datablocks"].items()})
+    if failed:
+        print(failed[0]["error"])
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1 @@
+"""Empty bmesh for the fake bpy; the scripts import it without using it"""
@@ -0,0 +1,777 @@
+"""Lightweight stand-in for Blender's bpy, for timing the Python side of builders
+
+Only what the snowman scripts and molviz use is modelled: ID collections with
+Blender-style name de-duplication, meshes whose foreach_set/foreach_get keep
+NumPy arrays, objects, materials and node trees, scene/context basics and a
+bpy.ops namespace whose primitive_*_add operators make meshes of the right
+size.  Anything else (render settings, world nodes, ...) is a permissive
+attribute bag, so scripts run end to end.
+
+It does no geometry evaluation, drawing or undo, so timings measure our own
+overhead (Python loops, array building, call counts), not Blender's.  Put
+this directory first on sys.path to use it; bench_suite.py does that when
+real bpy is not importable.
+"""
+import itertools
+import os
+import tempfile
+import types
+
+import numpy as np
+
+import mathutils
+
+_pointers = itertools.count(1)
+# selected objects by pointer, so selecting stays O(1) in big scenes
+_selection = {}
+
+
+class _Bag:
+    """Accepts any attribute, item or call; unknown attributes are new bags"""
+
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        value = _Bag()
+        setattr(self, name, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        return _Bag()
+
+    def __getitem__(self, key):
+        return self.__dict__.setdefault("_item_%s" % (key,), _Bag())
+
+    def __setitem__(self, key, value):
+        self.__dict__["_item_%s" % (key,)] = value
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        return True
+
+
+# --- ID datablocks ----------------------------------------------------------
+
+class ID:
+    def __init__(self, name):
+        self._name = name
+        self._removed = False
+        self._pointer = next(_pointers)
+        self._properties = {}
+        self.users = 0
+        self.use_fake_user = False
+
+    @property
+    def name(self):
+        if self._removed:
+            raise ReferenceError("StructRNA of type %s has been removed" % type(self).__name__)
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        if self._removed:
+            raise ReferenceError("StructRNA of type %s has been removed" % type(self).__name__)
+        if self._collection is not None:
+            self._collection._rename(self, value)
+        else:
+            self._name = value
+
+    _collection = None
+
+    def as_pointer(self):
+        return self._pointer
+
+    def __contains__(self, key):
+        return key in self._properties
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __setitem__(self, key, value):
+        self._properties[key] = value
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def __repr__(self):
+        return "<fake %s %r>" % (type(self).__name__, self._name)
+
+
+class IDCollection:
+    """bpy.data.<type>: ordered, name-unique, with Blender's .001 suffixes"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._items = {}
+        self._suffix = {}
+
+    def _unique(self, name):
+        name = name[:63]
+        if name not in self._items:
+            return name
+        base = name
+        number = self._suffix.get(base, 0)
+        while True:
+            number += 1
+            candidate = "%s.%03d" % (base, number)
+            if candidate not in self._items:
+                self._suffix[base] = number
+                return candidate
+
+    def _add(self, datablock):
+        datablock._name = self._unique(datablock._name)
+        datablock._collection = self
+        self._items[datablock._name] = datablock
+        return datablock
+
+    def _rename(self, datablock, name):
+        del self._items[datablock._name]
+        datablock._name = self._unique(name)
+        self._items[datablock._name] = datablock
+
+    def new(self, name, *args, **kwargs):
+        return self._add(self._factory(name, *args, **kwargs))
+
+    def remove(self, datablock, do_unlink=True):
+        if datablock._removed:
+            raise ReferenceError("already removed")
+        del self._items[datablock._name]
+        datablock._removed = True
+        datablock._release()
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return list(self._items.values())[key]
+        return self._items[key]
+
+    def __contains__(self, name):
+        return name in self._items
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return True
+
+
+class _Elements:
+    """mesh.vertices / loops / polygons / edges / attribute data"""
+
+    def __init__(self, defaults):
+        self._count = 0
+        self._defaults = defaults
+        self._arrays = {}
+
+    def add(self, count):
+        self._count += count
+        self._arrays.clear()
+
+    def __len__(self):
+        return self._count
+
+    def foreach_set(self, attribute, values):
+        values = np.asarray(values)
+        self._arrays[attribute] = values.copy()
+
+    def foreach_get(self, attribute, out):
+        stored = self._arrays.get(attribute)
+        if stored is None:
+            out[...] = self._defaults.get(attribute, 0)
+        else:
+            out[...] = stored.reshape(out.shape)
+
+
+class _Attribute:
+    def __init__(self, name, data_type, domain, count):
+        self.name = name
+        self.data_type = data_type
+        self.domain = domain
+        self.data = _Elements({})
+        self.data._count = count
+
+
+class _Attributes:
+    def __init__(self, mesh):
+        self._mesh = mesh
+        self._items = {}
+
+    def new(self, name, data_type, domain):
+        count = len(self._mesh._domain(domain))
+        attribute = self._items[name] = _Attribute(name, data_type, domain, count)
+        return attribute
+
+    def get(self, name, default=None):
+        return self._items.get(name, default)
+
+    def remove(self, attribute):
+        self._items.pop(attribute.name, None)
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _Materials(list):
+    def __init__(self, owner):
+        super().__init__()
+        self._owner = owner
+
+    def append(self, material):
+        super().append(material)
+        if material is not None:
+            material.users += 1
+
+    def clear(self):
+        del self[:]
+
+
+class Mesh(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.vertices = _Elements({})
+        self.edges = _Elements({})
+        self.loops = _Elements({})
+        self.polygons = _Elements({"use_smooth": False, "material_index": 0})
+        self.attributes = _Attributes(self)
+        self.materials = _Materials(self)
+
+    def _domain(self, domain):
+        return {"POINT": self.vertices, "EDGE": self.edges, "CORNER": self.loops,
+                "FACE": self.polygons}[domain]
+
+    def update(self, calc_edges=False):
+        if calc_edges and len(self.edges) == 0:
+            self.edges.add(len(self.loops) // 2)
+
+    def validate(self, verbose=False):
+        return False
+
+    def _release(self):
+        self.vertices = self.edges = self.loops = self.polygons = None
+
+
+class _Modifiers:
+    def __init__(self):
+        self._items = []
+
+    def new(self, name, type):
+        modifier = _Bag(name=name, type=type, show_viewport=True)
+        self._items.append(modifier)
+        return modifier
+
+    def get(self, name, default=None):
+        return next((m for m in self._items if m.name == name), default)
+
+    def remove(self, modifier):
+        self._items.remove(modifier)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._items[key]
+        return self.get(key)
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _Constraints(_Modifiers):
+    def new(self, type):
+        constraint = _Bag(name=type.replace("_", " ").title(), type=type, target=None, influence=1.0)
+        self._items.append(constraint)
+        return constraint
+
+
+class _AnimData:
+    def __init__(self):
+        self.action = None
+        self.drivers = []
+
+
+class _MaterialSlot:
+    def __init__(self, obj, index):
+        self._obj = obj
+        self._index = index
+        self.link = 'DATA'
+        self._material = None
+
+    @property
+    def material(self):
+        if self.link == 'OBJECT':
+            return self._material
+        return self._obj.data.materials[self._index]
+
+    @material.setter
+    def material(self, value):
+        if self.link == 'OBJECT':
+            self._material = value
+        else:
+            self._obj.data.materials[self._index] = value
+
+
+class Object(ID):
+    def __init__(self, name, data=None):
+        super().__init__(name)
+        self._data = None
+        self.data = data
+        self.type = "MESH" if isinstance(data, Mesh) else getattr(data, "_object_type", "EMPTY")
+        self.location = mathutils.Vector((0.0, 0.0, 0.0))
+        self.rotation_euler = mathutils.Vector((0.0, 0.0, 0.0))
+        self.scale = mathutils.Vector((1.0, 1.0, 1.0))
+        self.modifiers = _Modifiers()
+        self.constraints = _Constraints()
+        self.animation_data = None
+        self.parent = None
+        self.hide_viewport = False
+        self.hide_render = False
+        self._slots = []
+        self.users_collection = []
+
+    @property
+    def data(self):
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        if self._data is not None:
+            self._data.users -= 1
+        self._data = value
+        if value is not None:
+            value.users += 1
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            self.animation_data = _AnimData()
+        return self.animation_data
+
+    def animation_data_clear(self):
+        self.animation_data = None
+
+    @property
+    def material_slots(self):
+        count = len(self._data.materials) if isinstance(self._data, Mesh) else 0
+        while len(self._slots) < count:
+            self._slots.append(_MaterialSlot(self, len(self._slots)))
+        return self._slots[:count]
+
+    @property
+    def active_material(self):
+        slots = self.material_slots
+        return slots[0].material if slots else None
+
+    @property
+    def matrix_world(self):
+        return mathutils.Matrix.from_transform(self.location, self.scale)
+
+    @matrix_world.setter
+    def matrix_world(self, matrix):
+        # rotation is not modelled; keep what location and scale can hold
+        matrix = mathutils.Matrix(matrix)
+        self.location = matrix.translation
+        self.scale = matrix.to_scale()
+
+    @property
+    def bound_box(self):
+        if not isinstance(self._data, Mesh) or not len(self._data.vertices):
+            return [(0.0, 0.0, 0.0)] * 8
+        co = np.empty((len(self._data.vertices), 3))
+        self._data.vertices.foreach_get("co", co)
+        low, high = co.min(axis=0), co.max(axis=0)
+        return [(x, y, z) for x in (low[0], high[0]) for y in (low[1], high[1]) for z in (low[2], high[2])]
+
+    def select_set(self, state):
+        if state:
+            _selection[self._pointer] = self
+        else:
+            _selection.pop(self._pointer, None)
+
+    def select_get(self):
+        return self._pointer in _selection
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def to_mesh(self):
+        return self._data
+
+    def to_mesh_clear(self):
+        pass
+
+    def _release(self):
+        _selection.pop(self._pointer, None)
+        for collection in self.users_collection:
+            collection.objects._unlink(self)
+        self.data = None
+
+
+class _NodeSockets:
+    def __init__(self):
+        self._items = {}
+
+    def get(self, name, default=None):
+        return self[name]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            key = "_%d" % key
+        socket = self._items.get(key)
+        if socket is None:
+            socket = self._items[key] = _Bag(name=key, default_value=None)
+        return socket
+
+
+class _Node(_Bag):
+    TYPES = {"ShaderNodeBsdfPrincipled": "BSDF_PRINCIPLED", "ShaderNodeAttribute": "ATTRIBUTE",
+             "ShaderNodeOutputMaterial": "OUTPUT_MATERIAL"}
+
+    def __init__(self, bl_idname):
+        super().__init__(bl_idname=bl_idname, type=self.TYPES.get(bl_idname, bl_idname.upper()),
+                         inputs=_NodeSockets(), outputs=_NodeSockets())
+
+
+class _Nodes:
+    def __init__(self):
+        self._items = []
+
+    def new(self, type):
+        node = _Node(type)
+        self._items.append(node)
+        return node
+
+    def clear(self):
+        self._items.clear()
+
+    def get(self, name, default=None):
+        return default
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _Links:
+    def __init__(self):
+        self._items = []
+
+    def new(self, from_socket, to_socket):
+        link = (from_socket, to_socket)
+        self._items.append(link)
+        return link
+
+    def __len__(self):
+        return len(self._items)
+
+
+class NodeTree(ID):
+    def __init__(self, name, type='ShaderNodeTree'):
+        super().__init__(name)
+        self.type = type
+        self.nodes = _Nodes()
+        self.links = _Links()
+        self.interface = _Bag()
+
+    def _release(self):
+        pass
+
+
+class Material(ID):
+    def __init__(self, name):
+        super().__init__(name)
+        self.use_nodes = False
+        self.node_tree = NodeTree(name)
+        self.diffuse_color = (0.8, 0.8, 0.8, 1.0)
+
+    def _release(self):
+        pass
+
+
+class _Simple(ID):
+    _object_type = "EMPTY"
+
+    def __init__(self, name, type=None):
+        super().__init__(name)
+        self.type = type
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        value = _Bag()
+        setattr(self, name, value)
+        return value
+
+    def _release(self):
+        pass
+
+
+class Light(_Simple):
+    _object_type = "LIGHT"
+
+
+class Camera(_Simple):
+    _object_type = "CAMERA"
+
+    def __init__(self, name, type=None):
+        super().__init__(name, type)
+        self.angle = 0.6911
+        self.type = 'PERSP'
+
+
+class _Data:
+    def __init__(self):
+        self.objects = IDCollection(Object)
+        self.meshes = IDCollection(Mesh)
+        self.curves = IDCollection(_Simple)
+        self.materials = IDCollection(Material)
+        self.node_groups = IDCollection(NodeTree)
+        self.textures = IDCollection(_Simple)
+        self.images = IDCollection(_Simple)
+        self.lights = IDCollection(Light)
+        self.cameras = IDCollection(Camera)
+        self.actions = IDCollection(_Simple)
+
+    def _collection_for(self, datablock):
+        for collection in vars(self).values():
+            if isinstance(collection, IDCollection) and datablock._collection is collection:
+                return collection
+        return None
+
+    def batch_remove(self, ids):
+        # objects first so their data loses its users before it goes
+        ordered = sorted(ids, key=lambda datablock: not isinstance(datablock, Object))
+        for datablock in ordered:
+            if not datablock._removed:
+                self._collection_for(datablock).remove(datablock)
+
+
+# --- scene and context ------------------------------------------------------
+
+class _CollectionObjects:
+    def __init__(self):
+        self._items = {}
+
+    def link(self, obj):
+        if obj._pointer in self._items:
+            raise RuntimeError("Object %r already in collection" % obj.name)
+        self._items[obj._pointer] = obj
+        obj.users += 1
+        obj.users_collection.append(self._owner)
+
+    def unlink(self, obj):
+        self._unlink(obj)
+
+    def _unlink(self, obj):
+        if self._items.pop(obj._pointer, None) is not None:
+            obj.users -= 1
+
+    def __iter__(self):
+        return iter(list(self._items.values()))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class Collection:
+    def __init__(self, name):
+        self.name = name
+        self.objects = _CollectionObjects()
+        self.objects._owner = self
+
+
+class _SceneObjects:
+    def __iter__(self):
+        return iter([obj for obj in data.objects if obj.users_collection])
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class _Context(_Bag):
+    def evaluated_depsgraph_get(self):
+        return _Bag()
+
+    def temp_override(self, **kwargs):
+        import contextlib
+        return contextlib.nullcontext()
+
+
+data = _Data()
+context = _Context()
+context.collection = Collection("Collection")
+context.scene = _Bag(objects=_SceneObjects(), camera=None, collection=context.collection)
+context.scene.render.resolution_x = 1920
+context.scene.render.resolution_y = 1080
+context.scene.render.resolution_percentage = 100
+context.scene.frame_current = 1
+context.view_layer = _Bag()
+context.active_object = None
+context.window = None
+context.screen = _Bag(areas=[])
+
+app = types.SimpleNamespace(
+    version=(4, 2, 0),
+    version_string="4.2.0 (fake)",
+    binary_path="blender",
+    background=True,
+    tempdir=tempfile.gettempdir() + os.sep,
+    handlers=types.SimpleNamespace(depsgraph_update_post=[], load_post=[], frame_change_pre=[],
+                                   frame_change_post=[]),
+)
+
+
+# --- operators --------------------------------------------------------------
+
+def _add_object(name, datablock, location=(0, 0, 0), rotation=(0, 0, 0), **kwargs):
+    obj = data.objects.new(name, datablock)
+    obj.location = mathutils.Vector(location)
+    obj.rotation_euler = mathutils.Vector(rotation)
+    context.collection.objects.link(obj)
+    _selection.clear()
+    obj.select_set(True)
+    context.active_object = obj
+    return {'FINISHED'}
+
+
+def _mesh_of_size(name, vertices, faces, loops):
+    mesh = data.meshes.new(name)
+    mesh.vertices.add(vertices)
+    mesh.vertices.foreach_set("co", np.zeros(vertices * 3, dtype=np.float32))
+    mesh.loops.add(loops)
+    mesh.polygons.add(faces)
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def _uv_sphere(segments=32, ring_count=16, radius=1.0, **kwargs):
+    mesh = _mesh_of_size("Sphere", segments * (ring_count - 1) + 2, segments * ring_count,
+                         4 * segments * (ring_count - 2) + 6 * segments)
+    return _add_object("Sphere", mesh, **kwargs)
+
+
+def _cone(vertices=32, radius1=1.0, radius2=0.0, depth=2.0, **kwargs):
+    mesh = _mesh_of_size("Cone", vertices + 1, vertices + 1, 4 * vertices)
+    return _add_object("Cone", mesh, **kwargs)
+
+
+def _cylinder(vertices=32, radius=1.0, depth=2.0, **kwargs):
+    mesh = _mesh_of_size("Cylinder", 2 * vertices, vertices + 2, 6 * vertices)
+    return _add_object("Cylinder", mesh, **kwargs)
+
+
+def _plane(size=2.0, **kwargs):
+    return _add_object("Plane", _mesh_of_size("Plane", 4, 1, 4), **kwargs)
+
+
+def _light_add(type='POINT', **kwargs):
+    return _add_object("Light", data.lights.new("Light", type), **kwargs)
+
+
+def _camera_add(**kwargs):
+    return _add_object("Camera", data.cameras.new("Camera"), **kwargs)
+
+
+def _select_all(action='TOGGLE'):
+    if action == 'TOGGLE':
+        action = 'DESELECT' if _selection else 'SELECT'
+    _selection.clear()
+    if action == 'SELECT':
+        for obj in data.objects:
+            obj.select_set(True)
+    return {'FINISHED'}
+
+
+def _select_by_type(type='MESH', extend=False):
+    if not extend:
+        _selection.clear()
+    for obj in data.objects:
+        if obj.type == type:
+            obj.select_set(True)
+    return {'FINISHED'}
+
+
+def _delete(use_global=False, confirm=True):
+    for obj in list(_selection.values()):
+        data.objects.remove(obj)
+    context.active_object = None
+    return {'FINISHED'}
+
+
+_OPERATORS = {
+    "mesh.primitive_uv_sphere_add": _uv_sphere,
+    "mesh.primitive_cone_add": _cone,
+    "mesh.primitive_cylinder_add": _cylinder,
+    "mesh.primitive_plane_add": _plane,
+    "object.light_add": _light_add,
+    "object.camera_add": _camera_add,
+    "object.select_all": _select_all,
+    "object.select_by_type": _select_by_type,
+    "object.delete": _delete,
+}
+
+
+class _Operator:
+    def __init__(self, module, name):
+        self._idname = "%s.%s" % (module, name)
+
+    def idname_py(self):
+        return self._idname
+
+    def __call__(self, *args, **kwargs):
+        operator = _OPERATORS.get(self._idname)
+        if operator is None:
+            # shade_smooth, parent_set, redraw_timer, ...: nothing to model
+            return {'FINISHED'}
+        return operator(**kwargs)
+
+    def poll(self):
+        return True
+
+
+class _OperatorModule:
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Operator(self._module, name)
+
+
+class _Ops:
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _OperatorModule(name)
+
+
+ops = _Ops()
+
+
+def reset():
+    """Fresh, empty bpy.data and context, as after --factory-startup minus the cube"""
+    global data
+    data = _Data()
+    _selection.clear()
+    context.collection = Collection("Collection")
+    context.scene.collection = context.collection
+    context.scene.camera = None
+    context.active_object = None
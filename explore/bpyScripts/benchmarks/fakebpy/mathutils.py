@@ -0,0 +1,52 @@
+"""Minimal mathutils for the fake bpy: Vector and an affine Matrix"""
+import numpy as np
+
+
+class Vector(tuple):
+    def __new__(cls, values=(0.0, 0.0, 0.0)):
+        return super().__new__(cls, (float(v) for v in values))
+
+    x = property(lambda self: self[0])
+    y = property(lambda self: self[1])
+    z = property(lambda self: self[2])
+
+    def __add__(self, other):
+        return Vector(a + b for a, b in zip(self, other))
+
+    def __sub__(self, other):
+        return Vector(a - b for a, b in zip(self, other))
+
+    def __mul__(self, scalar):
+        return Vector(a * scalar for a in self)
+
+    @property
+    def length(self):
+        return float(np.linalg.norm(self))
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self._array = np.identity(4) if rows is None else np.array(rows, dtype=float)
+
+    @classmethod
+    def from_transform(cls, location, scale=(1.0, 1.0, 1.0)):
+        matrix = cls()
+        matrix._array[:3, :3] = np.diag(scale)
+        matrix._array[:3, 3] = location
+        return matrix
+
+    @property
+    def translation(self):
+        return Vector(self._array[:3, 3])
+
+    def to_scale(self):
+        return Vector(np.linalg.norm(self._array[:3, :3], axis=0))
+
+    def __array__(self, dtype=None, copy=None):
+        return self._array.astype(dtype) if dtype is not None else self._array.copy()
+
+    def __iter__(self):
+        return iter(self._array.tolist())
+
+    def __len__(self):
+        return 4
@@ -0,0 +1,42 @@
+# Play an MD trajectory on a spacefill point cloud
+#
+#   blender --python animate.py -- structure.pdb run.dcd [--step 10] [--bake]
+#   blender --python animate.py -- structure.pdb run.f32 --atoms 104523
+#
+# Frames stream from the memory-mapped trajectory on every frame change;
+# --bake writes them into shape keys instead (keeps working without this
+# script, e.g. in a saved .blend or on a render farm).  The trajectory's
+# atoms must be in the structure file's order.
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import ownership, pointcloud, structure, trajectory, trajectoryscene
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+parser = argparse.ArgumentParser(prog="animate.py")
+parser.add_argument("structure")
+parser.add_argument("trajectory")
+parser.add_argument("--atoms", type=int, help="atom count of a raw float32 trajectory")
+parser.add_argument("--step", type=float, default=1, help="trajectory frames per scene frame")
+parser.add_argument("--bake", action="store_true")
+
+if argv:
+    args = parser.parse_args(argv)
+    ownership.teardown()
+    atoms = structure.load(args.structure)
+    traj = trajectory.load(args.trajectory, n_atoms=args.atoms)
+    if traj.size != len(atoms):
+        raise SystemExit("%s has %d atoms, %s has %d" % (args.trajectory, traj.size, args.structure, len(atoms)))
+    print("loaded", atoms, "and", traj)
+    name = os.path.basename(args.structure).split(".")[0]
+    obj = pointcloud.build_atoms(traj.frame(0), atoms.radii(), atoms.colors(), name=name)
+    if args.bake:
+        keys = trajectoryscene.bake_shape_keys(obj, traj, step=max(1, int(args.step)))
+        print("baked", len(keys), "shape keys")
+    else:
+        trajectoryscene.stream(obj, traj, step=args.step)
+else:
+    parser.print_usage()
@@ -0,0 +1,105 @@
+# Spacefill view of a PDB/mmCIF structure, one sphere per atom
+#
+#   blender --python spacefill.py -- 3wu2.cif.gz [chain ...] [--sticks] [--surface ses] [--cull view] [--glb out.glb]
+#
+# Small structures get one linked-duplicate object per atom (like the
+# snowballs); large ones go through the single-object point cloud.
+# --sticks adds inferred bonds as one stick mesh colored by atom.
+# --surface adds the molecular surface (vdw, sas or ses) colored by atom.
+# --cull buried skips atoms hidden inside the others before building spheres;
+# --cull view also skips those the scene camera cannot see (camera first).
+# --lossy-burial grows the burial test by culling.LOSSY_PROBE: more atoms are
+# skipped, including some seen through narrow channels.
+# --glb also writes the scene as an instanced, quantized GLB for web viewers.
+
+import bpy
+import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import bonds, culling, gltfscene, instancing, lodscene, materials, meshbuild, pointcloud, shading, structure
+
+POINT_CLOUD_THRESHOLD = 20000
+
+def create_spacefill(atoms, name="Atoms"):
+    """Spheres sized and colored by element"""
+    radii = atoms.radii()
+    colors = atoms.colors()
+    if len(atoms) > POINT_CLOUD_THRESHOLD:
+        return pointcloud.build_atoms(atoms.coords, radii, colors, name=name)
+    names = ["%s_%s%d_%s" % (name, chain, seq, atom)
+             for chain, seq, atom in zip(atoms.chain, atoms.residue_seq, atoms.atom_name)]
+    objects = instancing.sphere_objects(names, atoms.coords, radii, segments=16, ring_count=8)
+    # one shared shader; element colors are per object, not per material
+    for obj in objects:
+        shading.assign(obj)
+    shading.write_objects(objects, colors, roughness=pointcloud.ATOM_ROUGHNESS)
+    return objects
+
+def cull_atoms(atoms, mode="buried", lossy=False):
+    """The atoms left after dropping buried ones (and, for "view", ones the camera cannot see)
+
+    lossy grows the burial test by culling.LOSSY_PROBE, which also drops
+    some atoms visible through narrow gaps.
+    """
+    radii = atoms.radii()
+    keep = ~culling.buried(atoms.coords, radii, probe=culling.LOSSY_PROBE if lossy else 0.0)
+    if mode == "view":
+        keep[keep] = culling.visible(atoms.coords[keep], radii[keep], lodscene.camera_from_scene())
+    print("culling:", culling.format_savings(culling.savings(keep)))
+    return atoms.select(keep)
+
+def create_sticks(atoms, name="Bonds", radius=0.15):
+    """Bond sticks, split at the midpoint so each half takes its atom's color"""
+    pairs = bonds.infer_bonds(atoms.coords, atoms.element)
+    start = atoms.coords[pairs[:, 0]]
+    end = atoms.coords[pairs[:, 1]]
+    middle = (start + end) / 2
+    colors = atoms.colors()
+    return meshbuild.build_sticks(
+        np.concatenate([start, end]),
+        np.concatenate([middle, middle]),
+        radii=radius,
+        colors=np.concatenate([colors[pairs[:, 0]], colors[pairs[:, 1]]]),
+        name=name
+    )
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+sticks = "--sticks" in argv
+lossy_burial = "--lossy-burial" in argv
+argv = [arg for arg in argv if arg not in ("--sticks", "--lossy-burial")]
+glb = None
+if "--glb" in argv:
+    index = argv.index("--glb")
+    glb = argv[index + 1]
+    del argv[index:index + 2]
+surface_kind = None
+if "--surface" in argv:
+    index = argv.index("--surface")
+    surface_kind = argv[index + 1]
+    del argv[index:index + 2]
+cull = None
+if "--cull" in argv:
+    index = argv.index("--cull")
+    cull = argv[index + 1]
+    del argv[index:index + 2]
+if argv:
+    path = argv[0]
+    chains = argv[1:] or None
+    atoms = structure.load(path, chains=chains)
+    print("loaded", atoms, "from", path)
+    name = os.path.basename(path).split(".")[0]
+    shown = cull_atoms(atoms, cull, lossy_burial) if cull else atoms
+    create_spacefill(shown, name=name)
+    if sticks:
+        create_sticks(shown, name=name + "_bonds")
+    if surface_kind:
+        meshbuild.build_surface(atoms.coords, atoms.radii(), atoms.colors(), kind=surface_kind,
+                                name="%s_%s" % (name, surface_kind))
+    print("materials:", materials.registry.stats())
+    print("meshes:", instancing.library.stats())
+    if glb:
+        print("wrote %s (%.1f MB)" % (glb, gltfscene.export_scene(glb) / 2**20))
+else:
+    print("usage: blender --python spacefill.py -- structure.(pdb|cif)[.gz] [chain ...] [--sticks] [--surface ses] [--cull buried|view] [--lossy-burial] [--glb out.glb]")
@@ -0,0 +1,8 @@
+"""Shared helpers for the bpy scripts: materials, geometry and scene building
+
+Modules that need Blender import bpy themselves; the pure-NumPy modules can be
+imported (and profiled) outside Blender.  Scripts put explore/bpyScripts on
+sys.path and then import what they need, e.g.
+
+    from molviz import materials
+"""
@@ -0,0 +1,64 @@
+"""Covalent bond inference from coordinates and elements
+
+Two atoms are bonded when their distance is at most the sum of their
+covalent radii plus a tolerance (and above a minimum, to skip alternate
+locations sitting on top of each other).  Candidate pairs come from the
+cell-list grid in molviz.neighbors, so the search is close to linear in the
+number of atoms and runs chunk by chunk on large inputs.
+
+    from molviz import bonds
+    pairs = bonds.infer_bonds(atoms.coords, atoms.element)   # (M, 2) atom indices
+"""
+import numpy as np
+
+from molviz import neighbors, profiling
+
+# single-bond covalent radii in Angstrom (Cordero et al. 2008)
+COVALENT_RADII = {
+    "H": 0.31, "C": 0.76, "N": 0.71, "O": 0.66, "S": 1.05, "P": 1.07,
+    "MG": 1.41, "FE": 1.32, "MN": 1.39, "CA": 1.76, "CL": 1.02, "K": 2.03,
+    "NA": 1.66, "ZN": 1.22, "CU": 1.32, "SE": 1.20,
+}
+DEFAULT_COVALENT_RADIUS = 0.77
+TOLERANCE = 0.4
+MIN_DISTANCE = 0.4
+
+
+def covalent_radii(elements, table=COVALENT_RADII, default=DEFAULT_COVALENT_RADIUS):
+    unique, which = np.unique(np.asarray(elements), return_inverse=True)
+    return np.array([table.get(element, default) for element in unique], dtype=np.float64)[which]
+
+
+def iter_bonds(coords, elements, tolerance=TOLERANCE, chunk_size=neighbors.CHUNK_SIZE):
+    """Yield (M, 2) arrays of bonded atom index pairs, one per chunk of atoms"""
+    radii = covalent_radii(elements)
+    if len(radii) == 0:
+        return
+    cutoff = 2 * radii.max() + tolerance
+    grid = neighbors.CellGrid(coords, cutoff)
+    for i, j, distance in grid.iter_pairs(cutoff, chunk_size):
+        bonded = (distance <= radii[i] + radii[j] + tolerance) & (distance >= MIN_DISTANCE)
+        pairs = np.column_stack([i[bonded], j[bonded]])
+        # report each bond as (lower index, higher index)
+        pairs.sort(axis=1)
+        yield pairs
+
+
+@profiling.profile
+def infer_bonds(coords, elements, tolerance=TOLERANCE, chunk_size=neighbors.CHUNK_SIZE):
+    """All bonds as an (M, 2) array of atom indices, sorted"""
+    chunks = list(iter_bonds(coords, elements, tolerance, chunk_size))
+    if not chunks:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(chunks)
+    return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+
+def brute_force_bonds(coords, elements, tolerance=TOLERANCE):
+    """O(n^2) reference for infer_bonds; only for small inputs"""
+    radii = covalent_radii(elements)
+    if len(radii) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    i, j, distance = neighbors.brute_force_pairs(coords, 2 * radii.max() + tolerance)
+    bonded = (distance <= radii[i] + radii[j] + tolerance) & (distance >= MIN_DISTANCE)
+    return np.column_stack([i[bonded], j[bonded]])
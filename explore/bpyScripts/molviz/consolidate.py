@@ -0,0 +1,203 @@
+"""Post-build consolidation: merge static objects that share materials
+
+Scenes end with every part as its own object, which costs an object, a
+depsgraph node and at least one draw call each.  consolidate() merges every
+static mesh object with the same material slots into one mesh (with
+modifiers applied and world transforms baked in), so a scene ends with one
+object per material combination.  Objects that move, parents of objects that
+move, and objects other objects' constraints or drivers read from are kept.
+
+Per-part identity survives as an integer face attribute "part_id" indexing
+the merged object's "part_names" custom property, so picking still works:
+
+    report = consolidate.consolidate()
+    print(report["before"], report["after"])
+    name = consolidate.part_name(merged, face_index)
+
+Shading values for the shared attribute shaders (molviz.shading) are carried
+into point attributes of the merged mesh, so differently colored parts can
+merge into one object.  UV maps and other custom attributes of the parts are
+not carried over.
+"""
+import bpy
+import numpy as np
+
+from molviz import meshbuild, profiling, shading
+
+PART_ATTRIBUTE = "part_id"
+PART_NAMES = "part_names"
+
+
+def _moves(obj):
+    anim = obj.animation_data
+    return (anim is not None and (anim.action is not None or len(anim.drivers))) or len(obj.constraints) > 0
+
+
+def is_animated(obj):
+    """True if obj or any of its parents has an action, drivers or constraints"""
+    while obj is not None:
+        if _moves(obj):
+            return True
+        obj = obj.parent
+    return False
+
+
+def _targets(obj):
+    """Objects obj's constraints and drivers read from"""
+    for constraint in obj.constraints:
+        if getattr(constraint, "target", None) is not None:
+            yield constraint.target
+        # the Armature constraint keeps a list of targets
+        for entry in getattr(constraint, "targets", ()):
+            if entry.target is not None:
+                yield entry.target
+    anim = obj.animation_data
+    if anim is not None:
+        for fcurve in anim.drivers:
+            for variable in fcurve.driver.variables:
+                for target in variable.targets:
+                    if target.id_type == 'OBJECT' and target.id is not None:
+                        yield target.id
+
+
+def pinned(objects=None):
+    """Names of objects that must stay separate even though nothing animates them
+
+    These are the parents (at any depth) of objects that move, whose motion is
+    relative to them, and the objects some constraint or driver reads from.
+    """
+    if objects is None:
+        objects = bpy.context.scene.objects
+    names = set()
+    for obj in objects:
+        if _moves(obj):
+            parent = obj.parent
+            while parent is not None:
+                names.add(parent.name)
+                parent = parent.parent
+        names.update(target.name for target in _targets(obj))
+    return names
+
+
+def scene_counts(objects=None):
+    """Object, vertex and draw-call counts for mesh objects (one draw call per material slot)"""
+    if objects is None:
+        objects = bpy.context.scene.objects
+    meshes = [obj for obj in objects if obj.type == 'MESH']
+    return {
+        "objects": len(meshes),
+        "vertices": sum(len(obj.data.vertices) for obj in meshes),
+        "draw_calls": sum(max(1, len(obj.material_slots)) for obj in meshes),
+    }
+
+
+def _material_key(obj):
+    return tuple(slot.material for slot in obj.material_slots)
+
+
+def _read(obj, depsgraph, apply_modifiers):
+    """World-space arrays of one object's (evaluated) mesh"""
+    arrays = meshbuild.evaluated_arrays(obj, depsgraph, apply_modifiers)
+    matrix = np.array(obj.matrix_world, dtype=np.float64)
+    verts = arrays["verts"] @ matrix[:3, :3].T + matrix[:3, 3]
+    return verts, arrays["loops"], arrays["face_sizes"], arrays["smooth"], arrays["material_index"]
+
+
+def _merge(name, parts, materials, collection):
+    verts, loops, sizes, smooth, material_index, part_id = [], [], [], [], [], []
+    offset = 0
+    for index, (part_verts, part_loops, part_sizes, part_smooth, part_materials) in enumerate(parts):
+        verts.append(part_verts)
+        loops.append(part_loops + offset)
+        sizes.append(part_sizes)
+        smooth.append(part_smooth)
+        material_index.append(part_materials)
+        part_id.append(np.full(len(part_sizes), index, dtype=np.int32))
+        offset += len(part_verts)
+
+    mesh = meshbuild.mesh_from_arrays(name, np.concatenate(verts), np.concatenate(loops),
+                                      np.concatenate(sizes), validate=False)
+    mesh.polygons.foreach_set("use_smooth", np.concatenate(smooth))
+    mesh.polygons.foreach_set("material_index", np.concatenate(material_index))
+    mesh.attributes.new(PART_ATTRIBUTE, 'INT', 'FACE').data.foreach_set(
+        "value", np.concatenate(part_id))
+    for material in materials:
+        mesh.materials.append(material)
+    mesh.update()
+    return meshbuild.new_object(name, mesh, collection=collection)
+
+
+def _groups(objects, keep):
+    """Mergeable objects by material key, only the keys shared by two or more"""
+    groups = {}
+    for obj in objects:
+        if obj.type == 'MESH' and not is_animated(obj) and obj.name not in keep:
+            groups.setdefault(_material_key(obj), []).append(obj)
+    return {key: members for key, members in groups.items() if len(members) >= 2}
+
+
+def _ancestors(objects, groups):
+    """Names of the parents (at any depth) of objects that are not in groups"""
+    merging = {obj.name for members in groups.values() for obj in members}
+    names = set()
+    for obj in objects:
+        if obj.name in merging:
+            continue
+        parent = obj.parent
+        while parent is not None:
+            names.add(parent.name)
+            parent = parent.parent
+    return names
+
+
+@profiling.profile
+def consolidate(objects=None, apply_modifiers=True, remove=True, name="Merged", collection=None):
+    """Merge static mesh objects by material; returns counts before and after
+
+    Animated objects, the ones pinned() names, non-mesh objects and the
+    parents of anything left unmerged are left untouched.  With remove=True
+    the merged originals are deleted, along with their meshes once nothing
+    else uses them.
+    """
+    if objects is None:
+        objects = list(bpy.context.scene.objects)
+    if collection is None:
+        collection = bpy.context.collection
+    before = scene_counts(bpy.context.scene.objects)
+
+    keep = pinned(bpy.context.scene.objects)
+    while True:
+        groups = _groups(objects, keep)
+        # an object left separate keeps its parents, or it would jump when they are deleted
+        kept = _ancestors(bpy.context.scene.objects, groups) - keep
+        if not kept:
+            break
+        keep |= kept
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    merged = []
+    for materials, members in groups.items():
+        label = materials[0].name if materials and materials[0] is not None else "NoMaterial"
+        parts = [_read(obj, depsgraph, apply_modifiers) for obj in members]
+        obj = _merge("%s_%s" % (name, label), parts, materials, collection)
+        shading.bake_parts(obj.data, members, [len(part[0]) for part in parts])
+        obj[PART_NAMES] = [member.name for member in members]
+        merged.append(obj)
+        if remove:
+            for member in members:
+                mesh = member.data
+                bpy.data.objects.remove(member)
+                if mesh.users == 0:
+                    bpy.data.meshes.remove(mesh)
+
+    return {
+        "before": before,
+        "after": scene_counts(bpy.context.scene.objects),
+        "merged": merged,
+    }
+
+
+def part_name(obj, face_index):
+    """Name of the original part that face_index of a merged object came from"""
+    attribute = obj.data.attributes[PART_ATTRIBUTE]
+    return obj[PART_NAMES][attribute.data[face_index].value]
@@ -0,0 +1,236 @@
+"""Drop atoms whose spheres can never be seen, before any geometry exists (plain NumPy)
+
+In a spacefill model of a large complex most atoms lie inside the van der
+Waals envelope of their neighbours.  Each of them still costs a full
+sphere (32x16 plus SUBSURF in create_snowball).  Two tests decide what to
+skip:
+
+    buried(centers, radii)           the sphere lies inside the union of the others;
+                                     true from every viewpoint, lighting included
+    visible(centers, radii, camera)  some pixel of the sphere is in front in a
+                                     z-buffer of the camera view (lod.Camera)
+
+buried() is a Shrake-Rupley style test.  N points spread over each sphere
+are tested against the spheres that overlap it, which come from a
+neighbors.CellGrid.  The work for a block of (atom, neighbour) pairs x
+points is one matmul.  A point only counts as covered when it lies deeper
+inside one neighbour than the widest gap between samples (sample_gap()),
+so the whole patch around it is covered too, and a small exposed cap that
+falls between two samples still keeps the atom.
+
+By default (probe=0) the test is exact: an atom is buried only if it lies
+inside the union of the other spheres, so it can never be seen.  That
+needs denser samples than exposure() (BURIED_POINTS).  Real
+packing leaves small voids between non-bonded contacts, so this culls
+less than one might hope.  Passing probe > 0 (LOSSY_PROBE, 1 Angstrom)
+grows every sphere by probe and culls atoms that no such ball can touch.
+That is a lossy mode: it also removes atoms seen through channels
+narrower than 2 x probe, which changes the image.
+
+visible() depends on the view: the culled atoms still cast shadows and
+show in reflections, and it must be redone whenever the camera moves.
+
+    keep = ~culling.buried(atoms.coords, atoms.radii())
+    keep[keep] = culling.visible(atoms.coords[keep], atoms.radii()[keep], lodscene.camera_from_scene())
+    print(culling.format_savings(culling.savings(keep)))
+"""
+import numpy as np
+
+from molviz import lod, neighbors
+
+POINTS = 64
+BURIED_POINTS = 256
+LOSSY_PROBE = 1.0
+PAIR_BATCH = 32768
+PIXEL_BATCH = 1 << 22
+# evaluated quad mesh: float3 position per vertex, vertex + edge index per corner,
+# two vertex indices per edge, one offset per face; about one vertex and two edges per quad
+BYTES_PER_QUAD = 12 + 4 * 8 + 2 * 8 + 4
+
+
+def sphere_points(count=POINTS):
+    """count nearly evenly spread unit vectors (golden-angle spiral)"""
+    index = np.arange(count) + 0.5
+    z = 1.0 - 2.0 * index / count
+    ring = np.sqrt(1.0 - z * z)
+    angle = np.pi * (3.0 - np.sqrt(5.0)) * index
+    return np.column_stack([ring * np.cos(angle), ring * np.sin(angle), z])
+
+
+_gaps = {}
+
+
+def sample_gap(count=BURIED_POINTS):
+    """Distance from any point of the unit sphere to its nearest of sphere_points(count), at most
+
+    Measured on a spiral 64 times denser, plus that spiral's own spacing.
+    """
+    if count not in _gaps:
+        dense = sphere_points(64 * count)
+        nearest = (dense @ sphere_points(count).T).max(axis=1)
+        chord = np.sqrt(np.maximum(2.0 - 2.0 * nearest, 0.0)).max()
+        _gaps[count] = float(chord + np.sqrt(4.0 * np.pi / len(dense)))
+    return _gaps[count]
+
+
+def _covered(centers, radii, count, slack, probe):
+    """(N, count / 8) packed bits: point k of atom i lies slack x r_i deep inside some other sphere"""
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centers),)) + probe
+    points = sphere_points(count)
+    covered = np.zeros((len(centers), (count + 7) // 8), dtype=np.uint8)
+    if len(centers) < 2:
+        return covered
+    grid = neighbors.CellGrid(centers, 2.0 * radii.max())
+    for i, j, distance in grid.iter_pairs(2.0 * radii.max()):
+        overlap = distance < radii[i] + radii[j]
+        # every overlapping pair covers in both directions
+        i, j = np.concatenate([i[overlap], j[overlap]]), np.concatenate([j[overlap], i[overlap]])
+        for lo in range(0, len(i), PAIR_BATCH):
+            a, b = i[lo:lo + PAIR_BATCH], j[lo:lo + PAIR_BATCH]
+            # |c_a + r_a u - c_b|^2 < (r_b - slack r_a)^2
+            scale = radii[a]
+            delta = centers[a] - centers[b]
+            distance2 = (2.0 * scale[:, None]) * (delta @ points.T)
+            distance2 += (np.einsum("ij,ij->i", delta, delta) + scale * scale)[:, None]
+            reach = np.maximum(radii[b] - slack * scale, 0.0)
+            inside = distance2 < (reach * reach)[:, None]
+            np.bitwise_or.at(covered, a, np.packbits(inside, axis=1, bitorder="little"))
+    return covered
+
+
+def buried(centers, radii, probe=0.0, count=BURIED_POINTS):
+    """Boolean mask of atoms whose sphere is entirely covered by the others
+
+    probe > 0 grows every sphere first (lossy: some culled atoms can be seen).
+    """
+    covered = _covered(centers, radii, count, sample_gap(count), probe)
+    full = np.packbits(np.ones(count, dtype=bool), bitorder="little")
+    return np.all(covered == full, axis=1)
+
+
+def exposure(centers, radii, probe=0.0, count=POINTS):
+    """Fraction of each sphere (of radius r + probe) not inside any other; probe=1.4 gives relative SASA"""
+    covered = _covered(centers, radii, count, 0.0, probe)
+    inside = np.unpackbits(covered, axis=1, count=count, bitorder="little").sum(axis=1)
+    return 1.0 - inside / count
+
+
+# --- view ---------------------------------------------------------------------
+
+class _View:
+    """Spheres projected into a z-buffer of camera.resolution x scale pixels"""
+
+    def __init__(self, centers, radii, camera, scale):
+        self.width, self.height = (max(1, int(round(size * scale))) for size in camera.resolution)
+        matrix = camera.matrix_world
+        axes = matrix[:3, :3] / np.linalg.norm(matrix[:3, :3], axis=0)
+        self.local = (centers - matrix[:3, 3]) @ axes
+        self.depth = -self.local[:, 2]
+        self.radii = radii
+        size = max(self.width, self.height)
+        self.ortho = camera.ortho_scale is not None
+        if self.ortho:
+            self.focal = size / camera.ortho_scale
+            per_unit = np.full(len(centers), self.focal)
+            self.pixel_radius = radii * per_unit
+        else:
+            self.focal = size / (2.0 * np.tan(camera.fov / 2.0))
+            per_unit = self.focal / np.maximum(self.depth, 1e-9)
+            # the silhouette of a sphere is a little wider than its center's scale suggests
+            self.pixel_radius = self.focal * radii / np.sqrt(np.maximum(self.depth ** 2 - radii ** 2, 1e-18))
+        self.u = self.width / 2.0 + self.local[:, 0] * per_unit
+        self.v = self.height / 2.0 + self.local[:, 1] * per_unit
+
+    def fragments(self, atoms):
+        """(atom, pixel, front depth) for the pixels each sphere covers, plus its center pixel"""
+        u, v, pixel_radius, width, height = self.u, self.v, self.pixel_radius, self.width, self.height
+        top = np.clip(np.ceil(v[atoms] - pixel_radius[atoms] - 0.5), 0, height - 1).astype(np.int64)
+        bottom = np.clip(np.floor(v[atoms] + pixel_radius[atoms] - 0.5), 0, height - 1).astype(np.int64)
+        row_atom, y = neighbors._expand(top, np.maximum(bottom - top + 1, 0))
+        row_atom = atoms[row_atom]
+        half = np.sqrt(np.maximum(pixel_radius[row_atom] ** 2 - (y + 0.5 - v[row_atom]) ** 2, 0.0))
+        left = np.clip(np.ceil(u[row_atom] - half - 0.5), 0, width - 1).astype(np.int64)
+        right = np.clip(np.floor(u[row_atom] + half - 0.5), 0, width - 1).astype(np.int64)
+        row, x = neighbors._expand(left, np.maximum(right - left + 1, 0))
+        atom, y = row_atom[row], y[row]
+        # spheres smaller than a pixel still write the pixel they fall in
+        atom = np.concatenate([atom, atoms])
+        x = np.concatenate([x, np.clip(u[atoms].astype(np.int64), 0, width - 1)])
+        y = np.concatenate([y, np.clip(v[atoms].astype(np.int64), 0, height - 1)])
+        return atom, y * width + x, self._front(atom, x, y)
+
+    def _front(self, atom, x, y):
+        """Depth where the ray through pixel (x, y) meets the sphere (its closest approach if it misses)"""
+        px = (x + 0.5 - self.width / 2.0) / self.focal
+        py = (y + 0.5 - self.height / 2.0) / self.focal
+        center, radius = self.local[atom], self.radii[atom]
+        if self.ortho:
+            offset2 = (px - center[:, 0]) ** 2 + (py - center[:, 1]) ** 2
+            return self.depth[atom] - np.sqrt(np.maximum(radius ** 2 - offset2, 0.0))
+        # camera-space ray t * (px, py, -1) has depth t
+        a = px * px + py * py + 1.0
+        b = px * center[:, 0] + py * center[:, 1] - center[:, 2]
+        c = np.einsum("ij,ij->i", center, center) - radius ** 2
+        return (b - np.sqrt(np.maximum(b * b - a * c, 0.0))) / a
+
+
+def _batches(atoms, pixel_radius):
+    """Split atoms so each batch rasterizes about PIXEL_BATCH fragments"""
+    area = np.cumsum(np.pi * (pixel_radius[atoms] + 1.0) ** 2)
+    cuts = np.searchsorted(area, np.arange(PIXEL_BATCH, area[-1] if len(area) else 0, PIXEL_BATCH))
+    return np.split(atoms, cuts)
+
+
+def visible(centers, radii, camera, scale=1.0):
+    """Boolean mask of spheres with at least one pixel in front in camera's view
+
+    scale sizes the z-buffer relative to camera.resolution; below 1 it is
+    cheaper, but slivers visible through gaps narrower than a pixel of the
+    buffer get culled.  Spheres cut by the camera plane are kept.
+    """
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centers),))
+    view = _View(centers, radii, camera, scale)
+    u, v, pixel_radius = view.u, view.v, view.pixel_radius
+    on_screen = ((u + pixel_radius >= 0) & (u - pixel_radius <= view.width)
+                 & (v + pixel_radius >= 0) & (v - pixel_radius <= view.height))
+    result = np.zeros(len(centers), dtype=bool) if view.ortho else np.abs(view.depth) < radii
+    candidates = np.flatnonzero(on_screen & (view.depth > radii))
+    if not len(candidates):
+        return result
+
+    zbuffer = np.full(view.width * view.height, np.inf)
+    batches = _batches(candidates, pixel_radius)
+    for atoms in batches:
+        _, pixel, front = view.fragments(atoms)
+        np.minimum.at(zbuffer, pixel, front)
+    for atoms in batches:
+        atom, pixel, front = view.fragments(atoms)
+        result[atom[front <= zbuffer[pixel] * (1.0 + 1e-9)]] = True
+    return result
+
+
+def savings(keep, segments=32, ring_count=16, subsurf=2):
+    """Spheres, triangles and evaluated mesh memory with and without culling"""
+    keep = np.asarray(keep, dtype=bool)
+    triangles = lod.sphere_triangles(segments, ring_count, subsurf)
+    per_sphere = triangles // 2 * BYTES_PER_QUAD
+    kept = int(keep.sum())
+    return {
+        "atoms": len(keep),
+        "kept": kept,
+        "culled": len(keep) - kept,
+        "triangles_before": len(keep) * triangles,
+        "triangles_after": kept * triangles,
+        "bytes_before": len(keep) * per_sphere,
+        "bytes_after": kept * per_sphere,
+        "ratio": len(keep) / kept if kept else float("inf"),
+    }
+
+
+def format_savings(report):
+    return ("%d of %d atoms kept (%d culled): %.1fM -> %.1fM triangles, %.0f -> %.0f MB, %.1fx smaller" % (
+        report["kept"], report["atoms"], report["culled"], report["triangles_before"] / 1e6,
+        report["triangles_after"] / 1e6, report["bytes_before"] / 2**20, report["bytes_after"] / 2**20,
+        report["ratio"]))
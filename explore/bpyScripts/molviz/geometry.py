@@ -0,0 +1,247 @@
+"""Primitive geometry in plain NumPy, no Blender required
+
+UV spheres, cones and cylinders with the same topology as Blender's
+primitive_*_add operators, plus a kernel that stamps one primitive out at many
+positions/scales/rotations as a single concatenated buffer.  Nothing here
+imports bpy, so the geometry can be unit-tested and profiled anywhere and
+fed to both meshbuild (Blender) and file exporters.
+
+Meshes are described by three flat arrays:
+
+    verts       (V, 3) float   vertex coordinates
+    loops       (L,)   int     vertex index of each face corner
+    face_sizes  (F,)   int     number of corners of each face
+
+    from molviz import geometry
+    sphere = geometry.uv_sphere(segments=32, ring_count=16)
+    verts, loops, face_sizes, normals = geometry.instances(sphere, centers, radii)
+"""
+import numpy as np
+
+
+def _rings(segments, radii, heights):
+    """One ring of `segments` vertices per (radius, height) pair, stacked"""
+    theta = 2 * np.pi * np.arange(segments) / segments
+    radii = np.asarray(radii, dtype=float)[:, None]
+    heights = np.asarray(heights, dtype=float)[:, None]
+    x = radii * np.cos(theta)
+    y = radii * np.sin(theta)
+    z = np.broadcast_to(heights, x.shape)
+    return np.stack([x, y, z], axis=-1).reshape(-1, 3)
+
+
+def uv_sphere(segments=32, ring_count=16, radius=1.0):
+    """UV sphere matching primitive_uv_sphere_add's topology"""
+    seg = np.arange(segments)
+    nxt = (seg + 1) % segments
+    phi = np.pi * np.arange(1, ring_count) / ring_count
+    rings = _rings(segments, np.sin(phi), np.cos(phi))
+    verts = np.concatenate([[[0.0, 0.0, 1.0]], rings, [[0.0, 0.0, -1.0]]]) * radius
+    bottom = len(verts) - 1
+
+    def ring_vertex(r, j):
+        return 1 + r * segments + j
+
+    top_fan = np.column_stack([np.zeros(segments, int), ring_vertex(0, seg), ring_vertex(0, nxt)])
+    r = np.arange(ring_count - 2)[:, None]
+    quads = np.stack([ring_vertex(r, seg), ring_vertex(r + 1, seg),
+                      ring_vertex(r + 1, nxt), ring_vertex(r, nxt)], axis=-1).reshape(-1, 4)
+    last = ring_count - 2
+    bottom_fan = np.column_stack([np.full(segments, bottom), ring_vertex(last, nxt), ring_vertex(last, seg)])
+
+    loops = np.concatenate([top_fan.ravel(), quads.ravel(), bottom_fan.ravel()])
+    face_sizes = np.concatenate([np.full(segments, 3), np.full(len(quads), 4), np.full(segments, 3)])
+    return verts, loops, face_sizes
+
+
+def cone(vertices=32, radius1=1.0, radius2=0.0, depth=2.0):
+    """Cone along z matching primitive_cone_add: radius1 at -depth/2, radius2 at +depth/2"""
+    seg = np.arange(vertices)
+    nxt = (seg + 1) % vertices
+    half = depth / 2.0
+    parts = []
+    loops = []
+    face_sizes = []
+
+    # a zero radius collapses that end to a single tip vertex
+    if radius1 > 0:
+        parts.append(_rings(vertices, [radius1], [-half]))
+        base = seg
+    else:
+        parts.append([[0.0, 0.0, -half]])
+        base = np.zeros(vertices, int)
+    offset = len(parts[0])
+    if radius2 > 0:
+        parts.append(_rings(vertices, [radius2], [half]))
+        top = offset + seg
+    else:
+        parts.append([[0.0, 0.0, half]])
+        top = np.full(vertices, offset)
+    verts = np.concatenate(parts)
+
+    if radius1 > 0 and radius2 > 0:
+        loops.append(np.column_stack([base, base[nxt], top[nxt], top]).ravel())
+        face_sizes.append(np.full(vertices, 4))
+    elif radius1 > 0:
+        loops.append(np.column_stack([base, base[nxt], top]).ravel())
+        face_sizes.append(np.full(vertices, 3))
+    else:
+        loops.append(np.column_stack([base, top[nxt], top]).ravel())
+        face_sizes.append(np.full(vertices, 3))
+
+    # n-gon caps, wound to face away from the cone
+    if radius1 > 0:
+        loops.append(base[::-1])
+        face_sizes.append([vertices])
+    if radius2 > 0:
+        loops.append(top)
+        face_sizes.append([vertices])
+    return verts, np.concatenate(loops), np.concatenate(face_sizes)
+
+
+def cylinder(vertices=32, radius=1.0, depth=2.0):
+    """Capped cylinder along z matching primitive_cylinder_add"""
+    return cone(vertices, radius, radius, depth)
+
+
+def loop_starts(face_sizes):
+    """Index of each face's first corner in the loops array"""
+    face_sizes = np.asarray(face_sizes)
+    starts = np.zeros(len(face_sizes), dtype=np.int64)
+    np.cumsum(face_sizes[:-1], out=starts[1:])
+    return starts
+
+
+def triangulate(loops, face_sizes):
+    """Fan-triangulate every face; returns (T, 3) vertex indices"""
+    loops = np.asarray(loops)
+    face_sizes = np.asarray(face_sizes)
+    starts = loop_starts(face_sizes)
+    tri_counts = face_sizes - 2
+    face = np.repeat(np.arange(len(face_sizes)), tri_counts)
+    # k runs 1 .. n-2 within each face
+    first_tri = np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+    k = np.arange(len(face)) - first_tri + 1
+    start = starts[face]
+    return np.column_stack([loops[start], loops[start + k], loops[start + k + 1]])
+
+
+def face_normals(verts, loops, face_sizes):
+    """Unit normal of every face (area-weighted over its fan triangles)"""
+    tris = triangulate(loops, face_sizes)
+    cross = _triangle_cross(verts, tris)
+    face = np.repeat(np.arange(len(face_sizes)), np.asarray(face_sizes) - 2)
+    normals = np.zeros((len(face_sizes), 3))
+    np.add.at(normals, face, cross)
+    return _normalize(normals)
+
+
+def vertex_normals(verts, loops, face_sizes):
+    """Smooth per-vertex normals, area-weighted over the adjacent triangles"""
+    tris = triangulate(loops, face_sizes)
+    cross = _triangle_cross(verts, tris)
+    normals = np.zeros((len(verts), 3))
+    for corner in range(3):
+        np.add.at(normals, tris[:, corner], cross)
+    return _normalize(normals)
+
+
+def _triangle_cross(verts, tris):
+    a = verts[tris[:, 0]]
+    return np.cross(verts[tris[:, 1]] - a, verts[tris[:, 2]] - a)
+
+
+def _normalize(vectors):
+    length = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(length > 0, length, 1.0)
+
+
+def instances(primitive, centers, scales=1.0, rotations=None, normals=None, with_normals=True):
+    """Copy one primitive to every center as one buffer, with no per-object loop
+
+    primitive is a (verts, loops, face_sizes) tuple.  scales is a scalar, (N,)
+    for uniform or (N, 3) for per-axis scaling; rotations is an optional
+    (N, 3, 3) array applied after scaling.  normals defaults to the
+    primitive's smooth vertex normals and is transformed with the inverse
+    transpose so non-uniform scales stay correct.  with_normals=False skips
+    the normals and returns None in their place.
+
+    Returns (verts, loops, face_sizes, normals).
+    """
+    verts, loops, face_sizes = primitive
+    verts = np.asarray(verts, dtype=float)
+    centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+    n = len(centers)
+    if normals is None and with_normals:
+        normals = vertex_normals(verts, loops, face_sizes)
+
+    scales = np.asarray(scales, dtype=float)
+    if scales.ndim == 2:
+        scales = scales.reshape(n, 1, 3)
+    else:
+        scales = np.broadcast_to(scales, (n,)).reshape(n, 1, 1)
+    all_verts = verts[None, :, :] * scales
+    if rotations is not None:
+        rotations = np.asarray(rotations, dtype=float).reshape(n, 3, 3)
+        all_verts = np.einsum("nij,nvj->nvi", rotations, all_verts)
+    all_verts = all_verts + centers[:, None, :]
+
+    all_normals = None
+    if with_normals:
+        all_normals = np.broadcast_to(normals[None, :, :] / scales, (n,) + normals.shape)
+        if rotations is not None:
+            all_normals = np.einsum("nij,nvj->nvi", rotations, all_normals)
+        all_normals = _normalize(all_normals.reshape(-1, 3))
+
+    offsets = np.arange(n)[:, None] * len(verts)
+    all_loops = np.asarray(loops)[None, :] + offsets
+    return all_verts.reshape(-1, 3), all_loops.ravel(), np.tile(face_sizes, n), all_normals
+
+
+def euler_to_matrix(rotations):
+    """(N, 3) XYZ Euler angles in radians, as Blender's rotation_euler, to (N, 3, 3)"""
+    rotations = np.asarray(rotations, dtype=float).reshape(-1, 3)
+    cx, cy, cz = np.cos(rotations).T
+    sx, sy, sz = np.sin(rotations).T
+    # R = Rz @ Ry @ Rx
+    return np.stack([
+        np.stack([cy * cz, sx * sy * cz - cx * sz, cx * sy * cz + sx * sz], axis=-1),
+        np.stack([cy * sz, sx * sy * sz + cx * cz, cx * sy * sz - sx * cz], axis=-1),
+        np.stack([-sy, sx * cy, cx * cy], axis=-1),
+    ], axis=1)
+
+
+def stick_transforms(starts, ends):
+    """Midpoints, lengths and (N, 3, 3) rotations taking +z onto each start->end segment"""
+    starts = np.asarray(starts, dtype=float).reshape(-1, 3)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 3)
+    direction = ends - starts
+    lengths = np.linalg.norm(direction, axis=1)
+    z = _normalize(direction)
+    # any axis not parallel to z works as the helper; cylinders are round
+    helper = np.where(np.abs(z[:, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+    x = _normalize(np.cross(helper, z))
+    y = np.cross(z, x)
+    rotations = np.stack([x, y, z], axis=-1)
+    return (starts + ends) / 2.0, lengths, rotations
+
+
+def sticks(starts, ends, radii=0.15, vertices=8, caps=False):
+    """One cylinder per start/end pair as a single buffer (bond sticks, arms)
+
+    radii is a scalar or one radius per stick.  Caps are left off by default
+    since sticks usually end inside a sphere.  Returns (verts, loops,
+    face_sizes, normals) like instances().
+    """
+    midpoints, lengths, rotations = stick_transforms(starts, ends)
+    n = len(midpoints)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (n,))
+    verts, loops, face_sizes = cylinder(vertices, 1.0, 1.0)
+    if not caps:
+        # side quads only: drop the two n-gons at the end
+        loops = loops[:4 * vertices]
+        face_sizes = face_sizes[:vertices]
+    # side normals are radial; computing them from the capped mesh would tilt them
+    normals = verts * [1.0, 1.0, 0.0]
+    scales = np.column_stack([radii, radii, lengths])
+    return instances((verts, loops, face_sizes), midpoints, scales, rotations, normals=normals)
@@ -0,0 +1,426 @@
+"""Streaming binary glTF (GLB) writer for browser viewers (plain NumPy)
+
+Meshes are written once and deduplicated by content.  Repeated shapes (the
+atoms of one element, snowballs of one size) become one node carrying
+EXT_mesh_gpu_instancing translation/rotation/scale arrays plus a _COLOR_0
+per-instance color, instead of one node and one copy of the mesh each.
+
+With quantize=True (the default, KHR_mesh_quantization) vertex positions
+are normalized int16 around the mesh's center and normals are normalized
+int8.  Both sit interleaved in one 12-byte vertex, against 24 bytes of
+floats.  The center/extent dequantization is folded into each node's or
+instance's transform.  Instance translations and scales are int16 too,
+relative to the bounding box of their chunk, which the chunk's node undoes.
+
+Binary data goes to a temporary file as it is added.  Only the JSON index
+stays in memory until close(), so add_atoms() with a 10^6-atom chunked
+input runs in memory bounded by the chunk size.
+
+    with gltf.GLBWriter("atoms.glb") as writer:
+        writer.add_atoms(centers, radii, colors)
+        writer.add_sticks(starts, ends, 0.15, colors=bond_colors)
+
+Blender is Z-up and glTF is Y-up; a root node rotates everything into
+place.  gltfscene.export_scene() writes Blender scenes through this writer.
+"""
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from molviz import geometry
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+COMPONENTS = {np.dtype(np.int8): 5120, np.dtype(np.uint8): 5121, np.dtype(np.int16): 5122,
+              np.dtype(np.uint16): 5123, np.dtype(np.uint32): 5125, np.dtype(np.float32): 5126}
+TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+CHUNK_SIZE = 65536
+INSTANCING = "EXT_mesh_gpu_instancing"
+QUANTIZATION = "KHR_mesh_quantization"
+
+
+def quat_rotate(quats, vectors):
+    """Rotate (N, 3) vectors by (N, 4) xyzw unit quaternions"""
+    u = quats[:, :3]
+    w = quats[:, 3:4]
+    t = 2.0 * np.cross(u, vectors)
+    return vectors + w * t + np.cross(u, t)
+
+
+def matrix_to_quat(matrices):
+    """(N, 3, 3) rotation matrices to (N, 4) xyzw quaternions"""
+    m = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    trace = m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]
+    q = np.empty((len(m), 4))
+    # pick the numerically largest component per matrix
+    cases = np.argmax(np.stack([trace, m[:, 0, 0], m[:, 1, 1], m[:, 2, 2]], axis=1), axis=1)
+    for case in range(4):
+        sel = cases == case
+        if not sel.any():
+            continue
+        a = m[sel]
+        if case == 0:
+            s = 2.0 * np.sqrt(1.0 + trace[sel])
+            q[sel] = np.stack([(a[:, 2, 1] - a[:, 1, 2]) / s, (a[:, 0, 2] - a[:, 2, 0]) / s,
+                               (a[:, 1, 0] - a[:, 0, 1]) / s, 0.25 * s], axis=1)
+        else:
+            i = case - 1
+            j, k = (i + 1) % 3, (i + 2) % 3
+            s = 2.0 * np.sqrt(1.0 + a[:, i, i] - a[:, j, j] - a[:, k, k])
+            row = np.empty((len(a), 4))
+            row[:, i] = 0.25 * s
+            row[:, j] = (a[:, j, i] + a[:, i, j]) / s
+            row[:, k] = (a[:, k, i] + a[:, i, k]) / s
+            row[:, 3] = (a[:, k, j] - a[:, j, k]) / s
+            q[sel] = row
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def _unorm8(colors, count):
+    colors = np.asarray(colors, dtype=np.float64).reshape(count, -1)
+    if colors.shape[1] == 3:
+        colors = np.concatenate([colors, np.ones((count, 1))], axis=1)
+    return np.round(np.clip(colors, 0.0, 1.0) * 255).astype(np.uint8)
+
+
+class MeshHandle:
+    """An emitted mesh and the dequantization its nodes must apply"""
+
+    def __init__(self, index, center, extent):
+        self.index = index
+        self.center = center
+        self.extent = extent
+
+
+class GLBWriter:
+    def __init__(self, path, quantize=True, y_up=True, generator="molviz.gltf"):
+        self.path = path
+        self.quantize = quantize
+        directory = os.path.dirname(os.path.abspath(path))
+        self._bin = tempfile.TemporaryFile(dir=directory)
+        self._length = 0
+        self._meshes = {}
+        self._materials = {}
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": generator},
+            "scene": 0,
+            "scenes": [{"nodes": [0]}],
+            "nodes": [{"name": "root", "children": []}],
+            "meshes": [], "materials": [], "accessors": [], "bufferViews": [],
+            "extensionsUsed": [], "extensionsRequired": [],
+        }
+        if y_up:
+            half = np.sqrt(0.5)
+            self.gltf["nodes"][0]["rotation"] = [-half, 0.0, 0.0, half]
+        if quantize:
+            self._extension(QUANTIZATION, required=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self._bin.close()
+
+    def _extension(self, name, required=False):
+        if name not in self.gltf["extensionsUsed"]:
+            self.gltf["extensionsUsed"].append(name)
+        if required and name not in self.gltf["extensionsRequired"]:
+            self.gltf["extensionsRequired"].append(name)
+
+    # --- buffers ------------------------------------------------------------
+
+    def _view(self, data, stride=None, target=None):
+        data = np.ascontiguousarray(data).tobytes()
+        padding = -self._length % 4
+        if padding:
+            self._bin.write(b"\0" * padding)
+            self._length += padding
+        view = {"buffer": 0, "byteOffset": self._length, "byteLength": len(data)}
+        if stride is not None:
+            view["byteStride"] = stride
+        if target is not None:
+            view["target"] = target
+        self._bin.write(data)
+        self._length += len(data)
+        self.gltf["bufferViews"].append(view)
+        return len(self.gltf["bufferViews"]) - 1
+
+    def _accessor(self, view, dtype, count, width, offset=0, normalized=False, bounds=None):
+        accessor = {"bufferView": view, "componentType": COMPONENTS[np.dtype(dtype)], "count": int(count),
+                    "type": TYPES[width]}
+        if offset:
+            accessor["byteOffset"] = offset
+        if normalized:
+            accessor["normalized"] = True
+        if bounds is not None:
+            accessor["min"] = [float(v) for v in bounds[0]]
+            accessor["max"] = [float(v) for v in bounds[1]]
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def _interleaved(self, fields, count, target=None):
+        """Write fields [(name, array, normalized)] as one strided view; returns {name: accessor}"""
+        layout = []
+        offset = 0
+        for name, array, normalized in fields:
+            width = array.shape[1]
+            size = array.dtype.itemsize * width
+            layout.append((name, array, normalized, offset, width))
+            # every attribute starts on a 4-byte boundary
+            offset += size + (-size % 4)
+        stride = offset
+        record = np.zeros((count, stride), dtype=np.uint8)
+        for name, array, normalized, start, width in layout:
+            raw = np.ascontiguousarray(array).view(np.uint8).reshape(count, -1)
+            record[:, start:start + raw.shape[1]] = raw
+        view = self._view(record, stride=stride, target=target)
+        accessors = {}
+        for name, array, normalized, start, width in layout:
+            bounds = None
+            if name == "POSITION":
+                values = array.astype(np.float64)
+                if normalized:
+                    values = np.maximum(values / 32767.0, -1.0)
+                bounds = (values.min(axis=0), values.max(axis=0))
+            accessors[name] = self._accessor(view, array.dtype, count, width, start, normalized, bounds)
+        return accessors
+
+    # --- content ------------------------------------------------------------
+
+    def add_material(self, base_color=(0.8, 0.8, 0.8, 1.0), roughness=0.5, metallic=0.0, name=None):
+        """Metallic-roughness material, deduplicated by value; returns its index"""
+        base_color = [float(c) for c in tuple(base_color) + (1.0,) * (4 - len(base_color))]
+        key = (tuple(round(c, 4) for c in base_color), round(roughness, 4), round(metallic, 4))
+        if key not in self._materials:
+            material = {"pbrMetallicRoughness": {"baseColorFactor": base_color, "roughnessFactor": float(roughness),
+                                                 "metallicFactor": float(metallic)}}
+            if name:
+                material["name"] = name
+            self.gltf["materials"].append(material)
+            self._materials[key] = len(self.gltf["materials"]) - 1
+        return self._materials[key]
+
+    def add_mesh(self, verts, loops, face_sizes, normals=None, colors=None, smooth=True, material=None, name=None):
+        """Emit a mesh once per distinct content; returns a MeshHandle
+
+        colors are optional per-vertex RGB(A) in 0..1 (COLOR_0).  Flat-shaded
+        meshes are split per face so each corner carries its face normal.
+        """
+        verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        tris = geometry.triangulate(loops, face_sizes)
+        if colors is not None:
+            colors = _unorm8(colors, len(verts))
+        if not smooth:
+            face_normal = geometry.face_normals(verts, tris.ravel(), np.full(len(tris), 3))
+            corners = tris.ravel()
+            verts = verts[corners]
+            normals = np.repeat(face_normal, 3, axis=0)
+            colors = colors[corners] if colors is not None else None
+            tris = np.arange(len(corners)).reshape(-1, 3)
+        elif normals is None:
+            normals = geometry.vertex_normals(verts, loops, face_sizes)
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+
+        digest = hashlib.sha1()
+        for part in (verts, tris, normals, colors, np.array([-1 if material is None else material])):
+            if part is not None:
+                digest.update(np.ascontiguousarray(part).tobytes())
+        key = digest.hexdigest()
+        if key in self._meshes:
+            return self._meshes[key]
+
+        if self.quantize:
+            low, high = verts.min(axis=0), verts.max(axis=0)
+            center = (low + high) / 2.0
+            extent = float(np.abs(verts - center).max()) or 1.0
+            positions = np.round((verts - center) / extent * 32767).astype(np.int16)
+            packed_normals = np.round(np.clip(normals, -1, 1) * 127).astype(np.int8)
+        else:
+            center, extent = np.zeros(3), 1.0
+            positions = verts.astype(np.float32)
+            packed_normals = normals.astype(np.float32)
+        fields = [("POSITION", positions, self.quantize), ("NORMAL", packed_normals, self.quantize)]
+        if colors is not None:
+            fields.append(("COLOR_0", colors, True))
+        attributes = self._interleaved(fields, len(verts), ARRAY_BUFFER)
+
+        index_type = np.uint16 if len(verts) < 65536 else np.uint32
+        indices = self._view(tris.astype(index_type).ravel(), target=ELEMENT_ARRAY_BUFFER)
+        primitive = {"attributes": attributes, "indices": self._accessor(indices, index_type, tris.size, 1)}
+        if material is not None:
+            primitive["material"] = material
+        mesh = {"primitives": [primitive]}
+        if name:
+            mesh["name"] = name
+        self.gltf["meshes"].append(mesh)
+        handle = self._meshes[key] = MeshHandle(len(self.gltf["meshes"]) - 1, center, extent)
+        return handle
+
+    def _dequantized(self, handle, translations, rotations, scales):
+        """Fold the mesh's center/extent into node or instance transforms"""
+        offset = scales * handle.center
+        if rotations is not None:
+            offset = quat_rotate(rotations, offset)
+        return translations + offset, scales * handle.extent
+
+    def add_node(self, handle, translation=(0, 0, 0), rotation=None, scale=(1, 1, 1), name=None):
+        """One placed copy of a mesh (rotation is an xyzw quaternion)"""
+        translations = np.asarray(translation, dtype=np.float64).reshape(1, 3)
+        rotations = None if rotation is None else np.asarray(rotation, dtype=np.float64).reshape(1, 4)
+        scales = np.broadcast_to(np.asarray(scale, dtype=np.float64), (1, 3))
+        translations, scales = self._dequantized(handle, translations, rotations, scales)
+        node = {"mesh": handle.index, "translation": translations[0].tolist(), "scale": scales[0].tolist()}
+        if rotation is not None:
+            node["rotation"] = rotations[0].tolist()
+        if name:
+            node["name"] = name
+        return self._add_node(node)
+
+    def _add_node(self, node):
+        self.gltf["nodes"].append(node)
+        index = len(self.gltf["nodes"]) - 1
+        self.gltf["nodes"][0]["children"].append(index)
+        return index
+
+    def add_instances(self, handle, translations, rotations=None, scales=1.0, colors=None, name=None,
+                      chunk_size=CHUNK_SIZE):
+        """Place many copies of one mesh with EXT_mesh_gpu_instancing; one node per chunk
+
+        scales is a scalar, (N,) or (N, 3); rotations (N, 4) xyzw; colors
+        (N, 3|4) in 0..1 become the _COLOR_0 instance attribute.
+        """
+        self._extension(INSTANCING)
+        translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+        count = len(translations)
+        scales = np.asarray(scales, dtype=np.float64)
+        nodes = []
+        for start in range(0, count, chunk_size):
+            stop = min(start + chunk_size, count)
+            n = stop - start
+            chunk_scales = scales if scales.ndim == 0 else scales[start:stop]
+            chunk_scales = np.broadcast_to(chunk_scales.reshape(-1, 1) if chunk_scales.ndim == 1 else chunk_scales,
+                                           (n, 3))
+            chunk_rotations = None if rotations is None else np.asarray(rotations[start:stop], dtype=np.float64)
+            moved, scaled = self._dequantized(handle, translations[start:stop], chunk_rotations, chunk_scales)
+            node = {"mesh": handle.index}
+            if self.quantize:
+                # instance transforms as int16 in the chunk's box; the node maps the box back
+                low, high = moved.min(axis=0), moved.max(axis=0)
+                center = (low + high) / 2.0
+                extent = float(max(np.abs(moved - center).max(), np.abs(scaled).max())) or 1.0
+                node["translation"] = center.tolist()
+                node["scale"] = [extent] * 3
+                fields = [("TRANSLATION", np.round((moved - center) / extent * 32767).astype(np.int16), True),
+                          ("SCALE", np.round(scaled / extent * 32767).astype(np.int16), True)]
+            else:
+                fields = [("TRANSLATION", moved.astype(np.float32), False),
+                          ("SCALE", scaled.astype(np.float32), False)]
+            if chunk_rotations is not None:
+                fields.append(("ROTATION", np.round(chunk_rotations * 32767).astype(np.int16), True))
+            if colors is not None:
+                fields.append(("_COLOR_0", _unorm8(colors[start:stop], n), True))
+            attributes = self._interleaved(fields, n)
+            node["extensions"] = {INSTANCING: {"attributes": attributes}}
+            if name:
+                node["name"] = name if count <= chunk_size else "%s_%d" % (name, start // chunk_size)
+            nodes.append(self._add_node(node))
+        return nodes
+
+    # --- molecular shortcuts ------------------------------------------------
+
+    def add_atoms(self, centers, radii, colors=None, segments=16, ring_count=8, material=None, name="Atoms",
+                  chunk_size=CHUNK_SIZE):
+        """Instanced unit spheres scaled by radius, colored per atom"""
+        template = geometry.uv_sphere(segments, ring_count, 1.0)
+        if material is None:
+            material = self.add_material((1.0, 1.0, 1.0, 1.0), roughness=0.4, name="AtomMaterial")
+        handle = self.add_mesh(*template, material=material, name="Sphere_%dx%d" % (segments, ring_count))
+        return self.add_instances(handle, centers, scales=np.asarray(radii, dtype=np.float64), colors=colors,
+                                  name=name, chunk_size=chunk_size)
+
+    def add_sticks(self, starts, ends, radii=0.15, colors=None, vertices=8, material=None, name="Sticks",
+                   chunk_size=CHUNK_SIZE):
+        """Instanced unit cylinders stretched and turned onto each segment"""
+        midpoints, lengths, rotations = geometry.stick_transforms(starts, ends)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), lengths.shape)
+        # geometry.cylinder has depth 2, so a z scale of length/2 spans the segment
+        scales = np.stack([radii, radii, lengths / 2.0], axis=1)
+        template = geometry.cylinder(vertices, 1.0, 2.0)
+        if material is None:
+            material = self.add_material((1.0, 1.0, 1.0, 1.0), roughness=0.4, name="StickMaterial")
+        handle = self.add_mesh(*template, smooth=False, material=material, name="Cylinder_%d" % vertices)
+        return self.add_instances(handle, midpoints, matrix_to_quat(rotations), scales, colors, name, chunk_size)
+
+    # --- output -------------------------------------------------------------
+
+    def close(self):
+        """Write the GLB: header, JSON chunk, then the binary chunk copied from the temp file"""
+        padding = -self._length % 4
+        self._bin.write(b"\0" * padding)
+        self._length += padding
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        gltf["buffers"] = [{"byteLength": self._length}]
+        text = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        text += b" " * (-len(text) % 4)
+        total = 12 + 8 + len(text) + 8 + self._length
+        with open(self.path, "wb") as out:
+            out.write(struct.pack("<III", GLB_MAGIC, 2, total))
+            out.write(struct.pack("<II", len(text), CHUNK_JSON))
+            out.write(text)
+            out.write(struct.pack("<II", self._length, CHUNK_BIN))
+            self._bin.seek(0)
+            shutil.copyfileobj(self._bin, out, 1 << 20)
+        self._bin.close()
+        return total
+
+
+def read_glb(path):
+    """(gltf dict, binary chunk bytes) of a GLB file"""
+    with open(path, "rb") as glb:
+        magic, version, length = struct.unpack("<III", glb.read(12))
+        if magic != GLB_MAGIC or version != 2:
+            raise ValueError("%s is not a glTF 2.0 binary" % path)
+        size, kind = struct.unpack("<II", glb.read(8))
+        gltf = json.loads(glb.read(size))
+        binary = b""
+        if glb.tell() < length:
+            size, kind = struct.unpack("<II", glb.read(8))
+            binary = glb.read(size)
+    return gltf, binary
+
+
+def accessor_array(gltf, binary, index):
+    """Decode one accessor into an array (normalized integers become floats)"""
+    accessor = gltf["accessors"][index]
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = next(dtype for dtype, code in COMPONENTS.items() if code == accessor["componentType"])
+    width = {name: width for width, name in TYPES.items()}[accessor["type"]]
+    stride = view.get("byteStride", dtype.itemsize * width)
+    start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    count = accessor["count"]
+    raw = np.frombuffer(binary, dtype=np.uint8, count=stride * (count - 1) + dtype.itemsize * width, offset=start)
+    values = np.lib.stride_tricks.as_strided(raw, shape=(count, dtype.itemsize * width), strides=(stride, 1))
+    values = np.ascontiguousarray(values).view(dtype).reshape(count, width)
+    if accessor.get("normalized"):
+        scale = float(np.iinfo(dtype).max)
+        values = np.maximum(values / scale, -1.0)
+    return values
+
+
+def export_atoms(path, centers, radii, colors=None, segments=16, ring_count=8, quantize=True,
+                 chunk_size=CHUNK_SIZE):
+    """Write a spacefill GLB straight from arrays; returns the file size in bytes"""
+    with GLBWriter(path, quantize=quantize) as writer:
+        writer.add_atoms(centers, radii, colors, segments, ring_count, chunk_size=chunk_size)
+    return os.path.getsize(path)
@@ -0,0 +1,118 @@
+"""Export the current Blender scene to GLB through molviz.gltf
+
+Objects sharing a mesh datablock and material (instancing.sphere_objects,
+the snowballs) become one instanced mesh instead of N copies; with the
+shared OBJECT shader each instance carries its Object.color.  Objects with
+modifiers are evaluated and written on their own, and point-cloud atoms
+(pointcloud.build_atoms) are written from their radius/color attributes as
+instanced spheres, without realizing the instances.
+
+    from molviz import gltfscene
+    gltfscene.export_scene("/tmp/scene.glb")
+"""
+import os
+
+import bpy
+import numpy as np
+
+from molviz import gltf, meshbuild, pointcloud, profiling, shading
+
+
+def _material(writer, obj):
+    mat = obj.active_material
+    if mat is None:
+        return writer.add_material()
+    if shading.attribute_type(mat) is not None:
+        # colors come from COLOR_0 or _COLOR_0, which the base color multiplies
+        return writer.add_material((1.0, 1.0, 1.0, 1.0), roughness=shading.DEFAULT_ROUGHNESS, name=mat.name)
+    return writer.add_material(tuple(mat.diffuse_color), roughness=mat.roughness, metallic=mat.metallic,
+                               name=mat.name)
+
+
+def _transforms(objects):
+    """(translations, xyzw quaternions, scales) of objects' world matrices"""
+    translations, rotations, scales = [], [], []
+    for obj in objects:
+        location, rotation, scale = obj.matrix_world.decompose()
+        translations.append(tuple(location))
+        rotations.append((rotation.x, rotation.y, rotation.z, rotation.w))
+        scales.append(tuple(scale))
+    return np.array(translations), np.array(rotations), np.array(scales)
+
+
+def _point_cloud_modifier(obj):
+    for modifier in obj.modifiers:
+        if modifier.type == 'NODES' and modifier.node_group and modifier.node_group.name.startswith("SphereInstancer"):
+            return modifier
+    return None
+
+
+def _export_point_cloud(writer, obj, modifier):
+    mesh = obj.data
+    n = len(mesh.vertices)
+    centers = np.empty(n * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", centers)
+    centers = centers.reshape(-1, 3)
+    radii = np.ones(n, dtype=np.float32)
+    if pointcloud.RADIUS_ATTRIBUTE in mesh.attributes:
+        mesh.attributes[pointcloud.RADIUS_ATTRIBUTE].data.foreach_get("value", radii)
+    colors = None
+    if pointcloud.COLOR_ATTRIBUTE in mesh.attributes:
+        colors = np.empty(n * 4, dtype=np.float32)
+        mesh.attributes[pointcloud.COLOR_ATTRIBUTE].data.foreach_get("color", colors)
+        colors = colors.reshape(-1, 4)
+    matrix = np.array(obj.matrix_world)
+    centers = centers @ matrix[:3, :3].T + matrix[:3, 3]
+    radii = radii * np.cbrt(abs(np.linalg.det(matrix[:3, :3])))
+    # "SphereInstancer_16x8"
+    segments, ring_count = (int(part) for part in modifier.node_group.name.split("_")[-1].split("x"))
+    writer.add_atoms(centers, radii, colors, segments, ring_count, name=obj.name)
+
+
+def _mesh_colors(mesh, arrays):
+    attribute = mesh.color_attributes.get("color") if hasattr(mesh, "color_attributes") else None
+    if attribute is None or attribute.domain != 'POINT' or len(attribute.data) != len(arrays["verts"]):
+        return None
+    colors = np.empty(len(attribute.data) * 4, dtype=np.float32)
+    attribute.data.foreach_get("color", colors)
+    return colors.reshape(-1, 4)
+
+
+@profiling.profile
+def export_scene(path, objects=None, quantize=True, chunk_size=gltf.CHUNK_SIZE):
+    """Write mesh objects (default: all visible in the scene) to a GLB; returns its size in bytes"""
+    if objects is None:
+        objects = [obj for obj in bpy.context.scene.objects if obj.type == 'MESH' and obj.visible_get()]
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    with gltf.GLBWriter(path, quantize=quantize) as writer:
+        groups = {}
+        for obj in objects:
+            modifier = _point_cloud_modifier(obj)
+            if modifier is not None:
+                _export_point_cloud(writer, obj, modifier)
+            elif obj.modifiers:
+                # evaluated geometry is per object, nothing to share
+                groups[("object", obj.name)] = [obj]
+            else:
+                material = obj.active_material.name if obj.active_material else None
+                groups.setdefault(("mesh", obj.data.name, material), []).append(obj)
+
+        for key, members in groups.items():
+            first = members[0]
+            arrays = meshbuild.evaluated_arrays(first, depsgraph, apply_modifiers=key[0] == "object")
+            if not len(arrays["face_sizes"]):
+                continue
+            handle = writer.add_mesh(arrays["verts"], arrays["loops"], arrays["face_sizes"],
+                                     colors=_mesh_colors(first.data, arrays), smooth=bool(arrays["smooth"].any()),
+                                     material=_material(writer, first), name=first.data.name)
+            translations, rotations, scales = _transforms(members)
+            if shading.attribute_type(first.active_material) == 'OBJECT':
+                writer.add_instances(handle, translations, rotations, scales,
+                                     colors=np.array([tuple(obj.color) for obj in members]),
+                                     name=first.data.name, chunk_size=chunk_size)
+            elif len(members) == 1:
+                writer.add_node(handle, translations[0], rotations[0], scales[0], name=first.name)
+            else:
+                writer.add_instances(handle, translations, rotations, scales, name=first.data.name,
+                                     chunk_size=chunk_size)
+    return os.path.getsize(path)
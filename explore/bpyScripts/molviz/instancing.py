@@ -0,0 +1,123 @@
+"""Linked-duplicate instancing: one mesh per distinct primitive shape
+
+A molecular scene has a handful of element radii but one object per atom.
+Instead of a mesh datablock per object, the library builds one mesh per
+(primitive, size, resolution) key and every object that needs that shape is
+a linked duplicate of it, i.e. a new object pointing at the shared mesh.
+
+    from molviz import instancing
+    eye = instancing.sphere_object("LeftEye", radius=0.04, location=(0, 0.08, 2.8),
+                                   segments=16, ring_count=8)
+    print(instancing.library.stats())
+
+Materials on shared meshes are shared too; color duplicates individually
+with the OBJECT shader from molviz.shading (one material, Object.color per
+duplicate) or materials.assign(obj, mat, per_object=True).
+"""
+import bpy
+import numpy as np
+
+from molviz import geometry, meshbuild, ownership, profiling
+
+KEY_DIGITS = 6
+
+
+def _alive(mesh):
+    """True if the mesh has not been removed from bpy.data"""
+    try:
+        return mesh.name in bpy.data.meshes
+    except ReferenceError:
+        return False
+
+
+class MeshLibrary:
+    """Cache of shared primitive meshes keyed by shape and resolution"""
+
+    def __init__(self):
+        self.meshes = {}
+        self.hits = 0
+        self.misses = 0
+
+    def sphere(self, radius=1.0, segments=32, ring_count=16, smooth=True):
+        key = ("sphere", round(float(radius), KEY_DIGITS), segments, ring_count, smooth)
+        return self._lookup(key, "Sphere_r%g_%dx%d" % (radius, segments, ring_count),
+                            lambda: geometry.uv_sphere(segments, ring_count, radius), smooth)
+
+    def cone(self, vertices=32, radius1=1.0, radius2=0.0, depth=2.0, smooth=False):
+        key = ("cone", round(float(radius1), KEY_DIGITS), round(float(radius2), KEY_DIGITS),
+               round(float(depth), KEY_DIGITS), vertices, smooth)
+        return self._lookup(key, "Cone_r%g_%g_d%g_%d" % (radius1, radius2, depth, vertices),
+                            lambda: geometry.cone(vertices, radius1, radius2, depth), smooth)
+
+    def cylinder(self, vertices=32, radius=1.0, depth=2.0, smooth=False):
+        key = ("cylinder", round(float(radius), KEY_DIGITS), round(float(depth), KEY_DIGITS),
+               vertices, smooth)
+        return self._lookup(key, "Cylinder_r%g_d%g_%d" % (radius, depth, vertices),
+                            lambda: geometry.cylinder(vertices, radius, depth), smooth)
+
+    def _lookup(self, key, name, arrays, smooth):
+        mesh = self.meshes.get(key)
+        if mesh is not None and _alive(mesh):
+            self.hits += 1
+            return mesh
+        self.misses += 1
+        mesh = meshbuild.mesh_from_arrays(name, *arrays(), smooth=smooth)
+        self.meshes[key] = mesh
+        return mesh
+
+    def clear(self):
+        """Forget cached meshes and reset the counters (datablocks are left alone)"""
+        self.meshes.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "meshes": len(self.meshes),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# module-level library shared by all builders in a Blender session
+library = MeshLibrary()
+ownership.on_teardown(library.clear)
+
+
+def sphere_object(name, radius=1.0, location=(0, 0, 0), segments=32, ring_count=16, smooth=True):
+    """Like meshbuild.sphere_object, but the mesh is shared with same-shaped spheres"""
+    mesh = library.sphere(radius, segments, ring_count, smooth)
+    return meshbuild.new_object(name, mesh, location)
+
+
+def cone_object(name, vertices=32, radius1=1.0, radius2=0.0, depth=2.0,
+                location=(0, 0, 0), rotation=(0, 0, 0)):
+    mesh = library.cone(vertices, radius1, radius2, depth)
+    return meshbuild.new_object(name, mesh, location, rotation)
+
+
+def cylinder_object(name, vertices=32, radius=1.0, depth=2.0,
+                    location=(0, 0, 0), rotation=(0, 0, 0)):
+    mesh = library.cylinder(vertices, radius, depth)
+    return meshbuild.new_object(name, mesh, location, rotation)
+
+
+@profiling.profile
+def sphere_objects(names, centers, radii, segments=32, ring_count=16, smooth=True, collection=None):
+    """One linked duplicate per center; only one mesh per unique radius is built"""
+    centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(centers),))
+    unique, which = np.unique(np.round(radii, KEY_DIGITS), return_inverse=True)
+    meshes = [library.sphere(r, segments, ring_count, smooth) for r in unique]
+    if collection is None:
+        collection = bpy.context.collection
+    objects = []
+    for name, center, index in zip(names, centers, which):
+        obj = ownership.track(bpy.data.objects.new(name, meshes[index]))
+        obj.location = center
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
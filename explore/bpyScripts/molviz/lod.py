@@ -0,0 +1,131 @@
+"""Screen-space level of detail for spheres and cylinders (plain NumPy)
+
+Resolution used to be picked by hand: 32x16 plus SUBSURF for snowballs, 16x8
+for eyes, 12x6 for buttons.  At molecular scale that wastes triangles on far
+atoms and looks faceted up close.  Here each primitive's projected size in
+pixels under a camera picks one of a few discrete levels, aiming for roughly
+PIXELS_PER_EDGE pixels per polygon edge around the silhouette.  Levels past
+the finest mesh add subdivision rather than more segments.
+
+Nothing here needs Blender; lodscene applies the chosen levels to objects.
+
+    camera = lod.Camera(matrix_world, fov=0.69, resolution=(1920, 1080))
+    levels = lod.sphere_levels(centers, radii, camera)
+    print(lod.sphere_budget(levels))
+"""
+import numpy as np
+
+PIXELS_PER_EDGE = 6.0
+
+# (segments, ring_count, subsurf levels), coarsest first
+SPHERE_LEVELS = (
+    (6, 4, 0),
+    (8, 4, 0),
+    (12, 6, 0),
+    (16, 8, 0),
+    (24, 12, 0),
+    (32, 16, 0),
+    (32, 16, 1),
+    (32, 16, 2),
+)
+
+# vertices around the cylinder, coarsest first
+CYLINDER_LEVELS = (4, 6, 8, 12, 16, 24, 32)
+
+
+class Camera:
+    """What projection needs: world matrix, field of view and output size
+
+    fov is the angle across the larger image dimension (Blender's camera
+    `angle` with sensor fit AUTO).  ortho_scale, when given, makes the
+    camera orthographic.
+    """
+
+    def __init__(self, matrix_world, fov=np.radians(39.6), resolution=(1920, 1080), ortho_scale=None):
+        self.matrix_world = np.asarray(matrix_world, dtype=float).reshape(4, 4)
+        self.fov = float(fov)
+        self.resolution = tuple(resolution)
+        self.ortho_scale = ortho_scale
+
+    @property
+    def location(self):
+        return self.matrix_world[:3, 3]
+
+    @property
+    def forward(self):
+        # cameras look down their local -Z axis
+        return -self.matrix_world[:3, 2] / np.linalg.norm(self.matrix_world[:3, 2])
+
+    def pixels_per_unit(self, points):
+        """Screen pixels covered by one world unit at each point (0 behind the camera)"""
+        size = max(self.resolution)
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if self.ortho_scale is not None:
+            return np.full(len(points), size / self.ortho_scale)
+        depth = (points - self.location) @ self.forward
+        scale = size / (2.0 * np.tan(self.fov / 2.0))
+        return np.where(depth > 1e-6, scale / np.maximum(depth, 1e-6), 0.0)
+
+    def moved(self, other, tolerance=1e-4):
+        """True if other differs from this camera enough to re-pick levels"""
+        return (other is None or not np.allclose(self.matrix_world, other.matrix_world, atol=tolerance)
+                or self.fov != other.fov or self.resolution != other.resolution
+                or self.ortho_scale != other.ortho_scale)
+
+
+def _segments_needed(diameter_px, pixels_per_edge):
+    return np.pi * diameter_px / pixels_per_edge
+
+
+def sphere_levels(centers, radii, camera, levels=SPHERE_LEVELS, pixels_per_edge=PIXELS_PER_EDGE):
+    """Index into levels for every sphere, from its projected diameter"""
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(np.atleast_2d(centers)),))
+    diameter_px = 2 * radii * camera.pixels_per_unit(centers)
+    # subdivision doubles the segment count per level
+    effective = np.array([segments * 2 ** subsurf for segments, _, subsurf in levels])
+    needed = _segments_needed(diameter_px, pixels_per_edge)
+    return np.minimum(np.searchsorted(effective, needed), len(levels) - 1)
+
+
+def cylinder_levels(centers, radii, camera, levels=CYLINDER_LEVELS, pixels_per_edge=PIXELS_PER_EDGE):
+    """Index into levels for every cylinder, from its projected diameter"""
+    radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(np.atleast_2d(centers)),))
+    diameter_px = 2 * radii * camera.pixels_per_unit(centers)
+    needed = _segments_needed(diameter_px, pixels_per_edge)
+    return np.minimum(np.searchsorted(np.asarray(levels), needed), len(levels) - 1)
+
+
+def sphere_triangles(segments, ring_count, subsurf=0):
+    """Triangles of one UV sphere after subdivision (quads count as two)"""
+    base = 2 * segments + 2 * segments * (ring_count - 2)
+    return base * 4 ** subsurf
+
+
+def cylinder_triangles(vertices, caps=True):
+    return 2 * vertices + (2 * (vertices - 2) if caps else 0)
+
+
+def sphere_budget(level_indices, levels=SPHERE_LEVELS, fixed=(32, 16, 2)):
+    """Triangle totals: per level, overall, and what a fixed resolution would cost"""
+    counts = np.bincount(np.asarray(level_indices, dtype=np.int64), minlength=len(levels))
+    per_level = [sphere_triangles(*level) for level in levels]
+    total = int(np.dot(counts, per_level))
+    baseline = len(level_indices) * sphere_triangles(*fixed)
+    return {
+        "counts": counts.tolist(),
+        "triangles": total,
+        "fixed_triangles": baseline,
+        "ratio": total / baseline if baseline else 0.0,
+    }
+
+
+def cylinder_budget(level_indices, levels=CYLINDER_LEVELS, fixed=32):
+    counts = np.bincount(np.asarray(level_indices, dtype=np.int64), minlength=len(levels))
+    total = int(np.dot(counts, [cylinder_triangles(level) for level in levels]))
+    baseline = len(level_indices) * cylinder_triangles(fixed)
+    return {
+        "counts": counts.tolist(),
+        "triangles": total,
+        "fixed_triangles": baseline,
+        "ratio": total / baseline if baseline else 0.0,
+    }
@@ -0,0 +1,136 @@
+"""Apply screen-space LOD to sphere/cylinder objects under the scene camera
+
+Each object is switched to a cached mesh for its level from the instancing
+library (one mesh per radius and resolution), and its SUBSURF modifier is
+added, adjusted or removed to match.  enable_auto_update() re-picks levels
+from a depsgraph handler whenever the camera moves.
+
+    lodscene.apply_sphere_lod(snowballs)          # camera set by setup_scene()
+    print(lodscene.last_budget)
+"""
+import bpy
+import numpy as np
+
+from molviz import instancing, lod, materials, profiling
+
+# per-object cache of the unscaled size, so LOD switches don't drift
+RADIUS_PROPERTY = "lod_radius"
+DEPTH_PROPERTY = "lod_depth"
+
+last_budget = {}
+_auto = {"camera": None, "spheres": None, "cylinders": None}
+
+
+def camera_from_scene(scene=None):
+    """lod.Camera for the scene's active camera (the one setup_scene() installs)"""
+    if scene is None:
+        scene = bpy.context.scene
+    camera = scene.camera
+    if camera is None:
+        raise RuntimeError("scene has no active camera")
+    render = scene.render
+    percent = render.resolution_percentage / 100.0
+    resolution = (int(render.resolution_x * percent), int(render.resolution_y * percent))
+    ortho_scale = camera.data.ortho_scale if camera.data.type == 'ORTHO' else None
+    return lod.Camera(np.array(camera.matrix_world), camera.data.angle, resolution, ortho_scale)
+
+
+def _local_extent(obj, axis):
+    return max(abs(corner[axis]) for corner in obj.bound_box)
+
+
+def _world_arrays(objects, property_name, axis):
+    """World centers, world radii and unscaled radii (cached on the objects)"""
+    centers = np.array([obj.matrix_world.translation for obj in objects], dtype=float).reshape(-1, 3)
+    local = []
+    for obj in objects:
+        if property_name not in obj:
+            obj[property_name] = _local_extent(obj, axis)
+        local.append(obj[property_name])
+    local = np.array(local, dtype=float)
+    scale = np.array([max(obj.matrix_world.to_scale()) for obj in objects], dtype=float)
+    return centers, local * scale, local
+
+
+def _swap_mesh(obj, mesh):
+    """Point obj at mesh, keeping its material even if it lived on the old mesh"""
+    if obj.data == mesh:
+        return
+    material = obj.active_material
+    obj.data = mesh
+    if material is not None and obj.active_material != material:
+        materials.assign(obj, material, per_object=True)
+
+
+def _set_subsurf(obj, levels):
+    modifier = obj.modifiers.get("Subdivision")
+    if levels == 0:
+        if modifier is not None:
+            obj.modifiers.remove(modifier)
+        return
+    if modifier is None:
+        modifier = obj.modifiers.new(name="Subdivision", type='SUBSURF')
+    modifier.levels = levels
+    modifier.render_levels = levels
+
+
+@profiling.profile
+def apply_sphere_lod(objects, camera=None, levels=lod.SPHERE_LEVELS, pixels_per_edge=lod.PIXELS_PER_EDGE):
+    """Re-mesh sphere objects to the level their projected size calls for"""
+    objects = list(objects)
+    if camera is None:
+        camera = camera_from_scene()
+    centers, world_radii, local_radii = _world_arrays(objects, RADIUS_PROPERTY, 0)
+    chosen = lod.sphere_levels(centers, world_radii, camera, levels, pixels_per_edge)
+    for obj, radius, index in zip(objects, local_radii, chosen):
+        segments, ring_count, subsurf = levels[index]
+        _swap_mesh(obj, instancing.library.sphere(radius, segments, ring_count))
+        _set_subsurf(obj, subsurf)
+    last_budget["spheres"] = lod.sphere_budget(chosen, levels)
+    return last_budget["spheres"]
+
+
+@profiling.profile
+def apply_cylinder_lod(objects, camera=None, levels=lod.CYLINDER_LEVELS, pixels_per_edge=lod.PIXELS_PER_EDGE):
+    """Re-mesh cylinder objects (radius from local x, depth from local z)"""
+    objects = list(objects)
+    if camera is None:
+        camera = camera_from_scene()
+    centers, world_radii, local_radii = _world_arrays(objects, RADIUS_PROPERTY, 0)
+    chosen = lod.cylinder_levels(centers, world_radii, camera, levels, pixels_per_edge)
+    for obj, radius, index in zip(objects, local_radii, chosen):
+        if DEPTH_PROPERTY not in obj:
+            obj[DEPTH_PROPERTY] = 2 * _local_extent(obj, 2)
+        _swap_mesh(obj, instancing.library.cylinder(levels[index], radius, obj[DEPTH_PROPERTY]))
+    last_budget["cylinders"] = lod.cylinder_budget(chosen, levels)
+    return last_budget["cylinders"]
+
+
+def _on_depsgraph_update(scene, depsgraph=None):
+    if scene.camera is None:
+        return
+    camera = camera_from_scene(scene)
+    if not camera.moved(_auto["camera"]):
+        return
+    _auto["camera"] = camera
+    if _auto["spheres"] is not None:
+        apply_sphere_lod(_auto["spheres"](), camera)
+    if _auto["cylinders"] is not None:
+        apply_cylinder_lod(_auto["cylinders"](), camera)
+
+
+def enable_auto_update(spheres=None, cylinders=None):
+    """Re-pick levels whenever the camera moves
+
+    spheres and cylinders are callables returning the objects to manage, so
+    objects added or removed later are picked up.
+    """
+    _auto.update(camera=None, spheres=spheres, cylinders=cylinders)
+    if _on_depsgraph_update not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+
+
+def disable_auto_update():
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    _auto.update(camera=None, spheres=None, cylinders=None)
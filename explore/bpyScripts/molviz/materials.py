@@ -0,0 +1,213 @@
+"""Material registry: one datablock per distinct set of shader parameters
+
+Every builder used to call bpy.data.materials.new and rebuild a Principled
+BSDF node tree, so a scene with thousands of atoms ended up with thousands of
+identical node trees.  The registry keys materials by their parameters,
+builds each one once and hands back the cached datablock afterward.
+
+    from molviz import materials
+    mat = materials.principled("SnowMaterial", (0.8, 0.8, 1.0, 1.0), roughness=0.3)
+    obj.data.materials.append(mat)
+    print(materials.registry.stats())
+"""
+import bpy
+
+from molviz import ownership, profiling
+
+# parameters are rounded before hashing so that 0.3 and 0.30000001 share a material
+KEY_DIGITS = 6
+# marks materials built by attribute_shader() with the attribute type they read
+ATTRIBUTE_TYPE_PROPERTY = "molviz_attribute_type"
+
+
+def _round(value):
+    if isinstance(value, (tuple, list)):
+        return tuple(round(float(v), KEY_DIGITS) for v in value)
+    if isinstance(value, float):
+        return round(value, KEY_DIGITS)
+    return value
+
+
+def _rgba(color):
+    color = tuple(color)
+    if len(color) == 3:
+        color = color + (1.0,)
+    return color
+
+
+def _alive(mat):
+    """True if the datablock has not been removed from bpy.data"""
+    try:
+        return mat.name in bpy.data.materials
+    except ReferenceError:
+        return False
+
+
+class MaterialRegistry:
+    """Cache of materials keyed by (kind, shader parameters)"""
+
+    def __init__(self):
+        self.materials = {}
+        self.hits = 0
+        self.misses = 0
+
+    def principled(self, name, base_color, roughness=0.5, **inputs):
+        """Principled BSDF material; extra keyword args set other BSDF inputs
+
+        Input names with spaces are passed with underscores, e.g.
+        emission_strength=2.0 sets 'Emission Strength'.
+        """
+        base_color = _rgba(base_color)
+        params = dict(inputs, base_color=base_color, roughness=roughness)
+        key = ("principled",) + tuple(sorted((k, _round(v)) for k, v in params.items()))
+        return self._lookup(key, lambda: self._build_principled(name, params))
+
+    def attribute_principled(self, name, attribute, attribute_type='INSTANCER', roughness=0.5):
+        """Principled BSDF whose base color is read from a named color attribute
+
+        attribute_type is the Attribute shader node's type: 'INSTANCER' for
+        attributes on instance-on-points sources, 'GEOMETRY' for mesh attributes.
+        """
+        key = ("attribute", attribute, attribute_type, _round(roughness))
+        return self._lookup(key, lambda: self._build_attribute(name, attribute, attribute_type, roughness))
+
+    def attribute_shader(self, name, attribute_type='GEOMETRY', color="color", roughness="roughness",
+                         emission="emission"):
+        """Principled BSDF reading base color, roughness and emission strength from attributes
+
+        Emission reuses the base color, so a nonzero strength makes an
+        instance glow in its own color.  attribute_type is as for
+        attribute_principled, or 'OBJECT' to read Object.color and custom
+        properties of each object.  molviz.shading writes the values.
+        """
+        key = ("attributes", attribute_type, color, roughness, emission)
+        return self._lookup(key, lambda: self._build_attributes(name, attribute_type, color, roughness, emission))
+
+    def diffuse(self, name, color):
+        """Viewport-only material that just sets diffuse_color"""
+        color = _rgba(color)
+        key = ("diffuse", _round(color))
+        return self._lookup(key, lambda: self._build_diffuse(name, color))
+
+    def _lookup(self, key, build):
+        mat = self.materials.get(key)
+        if mat is not None and _alive(mat):
+            self.hits += 1
+            return mat
+        self.misses += 1
+        mat = build()
+        self.materials[key] = mat
+        return mat
+
+    @profiling.profile
+    def _build_principled(self, name, params):
+        mat = ownership.track(bpy.data.materials.new(name=name))
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        nodes.clear()
+        bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+        for key, value in params.items():
+            socket = None
+            for socket_name in (key, key.replace("_", " "), key.replace("_", " ").title()):
+                socket = bsdf.inputs.get(socket_name)
+                if socket is not None:
+                    break
+            if socket is None:
+                raise KeyError("Principled BSDF has no input for %r" % key)
+            socket.default_value = value
+        # keep the viewport color in step with the shader
+        mat.diffuse_color = params["base_color"]
+        output = nodes.new(type='ShaderNodeOutputMaterial')
+        mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+        return mat
+
+    @profiling.profile
+    def _build_attribute(self, name, attribute, attribute_type, roughness):
+        mat = self._build_principled(name, {"base_color": (0.8, 0.8, 0.8, 1.0), "roughness": roughness})
+        nodes = mat.node_tree.nodes
+        bsdf = next(node for node in nodes if node.type == 'BSDF_PRINCIPLED')
+        color = nodes.new(type='ShaderNodeAttribute')
+        color.attribute_type = attribute_type
+        color.attribute_name = attribute
+        mat.node_tree.links.new(color.outputs['Color'], bsdf.inputs['Base Color'])
+        return mat
+
+    @profiling.profile
+    def _build_attributes(self, name, attribute_type, color, roughness, emission):
+        mat = self._build_principled(name, {"base_color": (0.8, 0.8, 0.8, 1.0)})
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+        bsdf = next(node for node in nodes if node.type == 'BSDF_PRINCIPLED')
+
+        def attribute(attribute_name):
+            node = nodes.new(type='ShaderNodeAttribute')
+            node.attribute_type = attribute_type
+            node.attribute_name = attribute_name
+            return node
+
+        base = attribute(color)
+        links.new(base.outputs['Color'], bsdf.inputs['Base Color'])
+        links.new(attribute(roughness).outputs['Fac'], bsdf.inputs['Roughness'])
+        # 'Emission Color' since Blender 4.0, 'Emission' before
+        emission_color = bsdf.inputs.get('Emission Color') or bsdf.inputs.get('Emission')
+        links.new(base.outputs['Color'], emission_color)
+        links.new(attribute(emission).outputs['Fac'], bsdf.inputs['Emission Strength'])
+        mat[ATTRIBUTE_TYPE_PROPERTY] = attribute_type
+        return mat
+
+    @profiling.profile
+    def _build_diffuse(self, name, color):
+        mat = ownership.track(bpy.data.materials.new(name=name))
+        mat.diffuse_color = color
+        return mat
+
+    def clear(self):
+        """Forget cached materials and reset the counters (datablocks are left alone)"""
+        self.materials.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "materials": len(self.materials),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# module-level registry shared by all builders in a Blender session
+registry = MaterialRegistry()
+ownership.on_teardown(registry.clear)
+
+
+def principled(name, base_color, roughness=0.5, **inputs):
+    return registry.principled(name, base_color, roughness=roughness, **inputs)
+
+
+def diffuse(name, color):
+    return registry.diffuse(name, color)
+
+
+def attribute_shader(name="AttributeShader", attribute_type='GEOMETRY'):
+    return registry.attribute_shader(name, attribute_type)
+
+
+def assign(obj, mat, per_object=False):
+    """Put mat in the object's first material slot
+
+    per_object=True links the material to the object rather than its mesh, so
+    linked duplicates sharing one mesh can still carry different materials.
+    """
+    if per_object:
+        if not obj.data.materials:
+            obj.data.materials.append(None)
+        slot = obj.material_slots[0]
+        slot.link = 'OBJECT'
+        slot.material = mat
+    elif obj.data.materials:
+        obj.data.materials[0] = mat
+    else:
+        obj.data.materials.append(mat)
+    return mat
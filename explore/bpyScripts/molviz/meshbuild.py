@@ -0,0 +1,302 @@
+"""Bulk mesh construction without bpy.ops primitives
+
+bpy.ops.mesh.primitive_*_add runs a scene update and an undo push per call,
+so building tens of thousands of spheres that way gets slower the bigger the
+scene is.  Here the vertex and face arrays are computed with NumPy and written
+straight into a mesh datablock with foreach_set, one call per attribute no
+matter how many primitives there are.
+
+The arrays come from molviz.geometry, which has the layout details.
+
+    from molviz import meshbuild
+    atoms = meshbuild.build_spheres(centers, radii, segments=16, ring_count=8)
+"""
+import bpy
+import numpy as np
+
+from molviz import geometry, ownership, pipeline, profiling, shading, surface, terrain
+
+BATCH_BYTES = 64 * 2**20
+
+
+@profiling.profile
+def mesh_from_arrays(name, verts, loops, face_sizes, smooth=False, validate=True):
+    """New mesh datablock filled from flat arrays with bulk foreach_set calls
+
+    validate=False skips mesh.validate(), for callers that write per-face
+    attributes afterward and need the face order left exactly as given.
+    """
+    verts = np.asarray(verts, dtype=np.float32).reshape(-1, 3)
+    loops = np.asarray(loops, dtype=np.int32)
+    face_sizes = np.asarray(face_sizes, dtype=np.int32)
+    loop_starts = geometry.loop_starts(face_sizes).astype(np.int32)
+
+    mesh = ownership.track(bpy.data.meshes.new(name))
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.ravel())
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops)
+    mesh.polygons.add(len(face_sizes))
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    try:
+        mesh.polygons.foreach_set("loop_total", face_sizes)
+    except (AttributeError, TypeError, RuntimeError):
+        # Blender 4.x derives loop_total from loop_start and makes it read-only
+        pass
+    if smooth:
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(face_sizes), dtype=bool))
+    mesh.update(calc_edges=True)
+    if validate:
+        mesh.validate()
+    return mesh
+
+
+@profiling.profile
+def evaluated_arrays(obj, depsgraph=None, apply_modifiers=True):
+    """Local-space arrays of obj's mesh after its modifiers
+
+    Returns a dict with verts, loops, face_sizes, smooth and material_index.
+    """
+    if depsgraph is None:
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+    source = obj.evaluated_get(depsgraph) if apply_modifiers else obj
+    mesh = source.to_mesh() if apply_modifiers else obj.data
+    try:
+        arrays = {
+            "verts": np.empty(len(mesh.vertices) * 3, dtype=np.float32),
+            "loops": np.empty(len(mesh.loops), dtype=np.int32),
+            "face_sizes": np.empty(len(mesh.polygons), dtype=np.int32),
+            "smooth": np.empty(len(mesh.polygons), dtype=bool),
+            "material_index": np.empty(len(mesh.polygons), dtype=np.int32),
+        }
+        mesh.vertices.foreach_get("co", arrays["verts"])
+        mesh.loops.foreach_get("vertex_index", arrays["loops"])
+        mesh.polygons.foreach_get("loop_total", arrays["face_sizes"])
+        mesh.polygons.foreach_get("use_smooth", arrays["smooth"])
+        mesh.polygons.foreach_get("material_index", arrays["material_index"])
+    finally:
+        if apply_modifiers:
+            source.to_mesh_clear()
+    arrays["verts"] = arrays["verts"].reshape(-1, 3)
+    return arrays
+
+
+@profiling.profile
+def cached_mesh(cache, name, params, build_object):
+    """Mesh for params from a meshcache.MeshCache, evaluating only on a miss
+
+    On a miss build_object() must return a temporary object (modifiers and
+    all); its evaluated arrays are stored and the object, its mesh and the
+    modifier textures nothing else uses are removed.  The returned mesh has
+    the modifiers baked in, subdivision at its render level.
+    """
+    def build():
+        obj = build_object()
+        for modifier in obj.modifiers:
+            # the baked mesh stands in for renders too, so use their subdivision level
+            if hasattr(modifier, "render_levels"):
+                modifier.levels = modifier.render_levels
+        textures = [modifier.texture for modifier in obj.modifiers if getattr(modifier, "texture", None) is not None]
+        arrays = evaluated_arrays(obj)
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
+        for texture in textures:
+            if texture.users == 0:
+                bpy.data.textures.remove(texture)
+        return arrays
+
+    arrays = cache.get_or_build(params, build)
+    mesh = mesh_from_arrays(name, arrays["verts"], arrays["loops"], arrays["face_sizes"], validate=False)
+    mesh.polygons.foreach_set("use_smooth", np.asarray(arrays["smooth"]))
+    mesh.update()
+    return mesh
+
+
+def set_color_attribute(mesh, name, colors, domain='POINT'):
+    """Write (N, 3) or (N, 4) colors into a FLOAT_COLOR attribute in one call"""
+    colors = np.asarray(colors, dtype=np.float32)
+    size = len(mesh.vertices) if domain == 'POINT' else len(mesh.polygons)
+    colors = np.broadcast_to(colors, (size, colors.shape[-1]))
+    if colors.shape[-1] == 3:
+        colors = np.column_stack([colors, np.ones(size, dtype=np.float32)])
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        attribute = mesh.attributes.new(name, 'FLOAT_COLOR', domain)
+    attribute.data.foreach_set("color", np.ascontiguousarray(colors, dtype=np.float32).ravel())
+    return attribute
+
+
+def new_object(name, mesh, location=(0, 0, 0), rotation=(0, 0, 0), collection=None):
+    """Link a new object for mesh into collection (the active one by default)"""
+    obj = ownership.track(bpy.data.objects.new(name, mesh))
+    obj.location = location
+    obj.rotation_euler = rotation
+    if collection is None:
+        collection = bpy.context.collection
+    collection.objects.link(obj)
+    return obj
+
+
+@profiling.profile
+def sphere_object(name, radius=1.0, location=(0, 0, 0), segments=32, ring_count=16, smooth=True):
+    """Drop-in for primitive_uv_sphere_add + active_object"""
+    mesh = mesh_from_arrays(name, *geometry.uv_sphere(segments, ring_count, radius), smooth=smooth)
+    return new_object(name, mesh, location)
+
+
+@profiling.profile
+def cone_object(name, vertices=32, radius1=1.0, radius2=0.0, depth=2.0,
+                location=(0, 0, 0), rotation=(0, 0, 0)):
+    """Drop-in for primitive_cone_add + active_object"""
+    mesh = mesh_from_arrays(name, *geometry.cone(vertices, radius1, radius2, depth))
+    return new_object(name, mesh, location, rotation)
+
+
+@profiling.profile
+def cylinder_object(name, vertices=32, radius=1.0, depth=2.0,
+                    location=(0, 0, 0), rotation=(0, 0, 0)):
+    """Drop-in for primitive_cylinder_add + active_object"""
+    mesh = mesh_from_arrays(name, *geometry.cylinder(vertices, radius, depth))
+    return new_object(name, mesh, location, rotation)
+
+
+@profiling.profile
+def build_spheres(centers, radii, segments=32, ring_count=16, name="Spheres", smooth=True):
+    """All spheres in one mesh object, built with a handful of bulk array writes"""
+    template = geometry.uv_sphere(segments, ring_count)
+    verts, loops, face_sizes, _ = geometry.instances(template, centers, radii, with_normals=False)
+    mesh = mesh_from_arrays(name, verts, loops, face_sizes, smooth=smooth)
+    return new_object(name, mesh)
+
+
+@profiling.profile
+def build_sticks(starts, ends, radii=0.15, colors=None, vertices=8, name="Sticks",
+                 material=None, smooth=True, caps=False):
+    """All sticks (bonds, arms) in one mesh object from (N, 3) start and end arrays
+
+    Every midpoint, length and orientation is computed in one vectorized pass.
+    colors, one per stick, go into a "color" point attribute; without an
+    explicit material the object gets the shared attribute-driven one.
+    """
+    verts, loops, face_sizes, _ = geometry.sticks(starts, ends, radii, vertices, caps)
+    mesh = mesh_from_arrays(name, verts, loops, face_sizes, smooth=smooth)
+    if colors is not None:
+        colors = np.asarray(colors, dtype=np.float32)
+        if colors.ndim == 2:
+            # each stick owns 2 * vertices consecutive vertices
+            colors = np.repeat(colors, 2 * vertices, axis=0)
+        shading.write(mesh, colors=colors)
+        if material is None:
+            material = shading.shader('GEOMETRY')
+    if material is not None:
+        mesh.materials.append(material)
+    return new_object(name, mesh)
+
+
+@profiling.profile
+def build_surface(centers, radii, colors=None, kind="ses", probe=surface.PROBE, spacing=0.8, name="Surface",
+                  material=None, workers=1):
+    """Molecular surface ("vdw", "sas" or "ses") of atoms as one smooth mesh object
+
+    colors, one per atom, are carried to the vertices each atom owns and go
+    into the "color" point attribute read by the shared attribute shader.
+    """
+    arrays = surface.molecular_surface(centers, radii, kind, probe, spacing, workers=workers)
+    mesh = mesh_from_arrays(name, arrays["verts"], arrays["loops"], arrays["face_sizes"], smooth=True)
+    if colors is not None:
+        colors = np.asarray(colors, dtype=np.float32)
+        if colors.ndim == 2:
+            colors = colors[np.maximum(arrays["atoms"], 0)]
+        shading.write(mesh, colors=colors)
+        if material is None:
+            material = shading.shader('GEOMETRY')
+    if material is not None:
+        mesh.materials.append(material)
+    return new_object(name, mesh)
+
+
+@profiling.profile
+def build_terrain(size=10.0, resolution=64, tile_size=None, name="Ground", material=None,
+                  collection=None, workers=None, **options):
+    """Heightfield ground from terrain noise; one object, or one per tile
+
+    With tile_size, the extent is generated and committed tile by tile
+    (objects "<name>_<ix>_<iy>"), so only one tile's arrays are in memory.
+    workers > 1 computes the tiles in a molviz.pipeline process pool while
+    this thread commits them, in completion order.
+    options go to terrain.heights() (strength, noise_scale, octaves, ...).
+    """
+    if tile_size is None:
+        parts = [(name, terrain.grid(size, resolution, **options))]
+    elif workers is not None and workers > 1:
+        tasks = pipeline.tile_tasks(size, tile_size, resolution, name=name, **options)
+        parts = ((part.key, (part.arrays["verts"], part.arrays["loops"], part.arrays["face_sizes"]))
+                 for part in pipeline.Pipeline(workers).run(tasks))
+    else:
+        parts = (("%s_%d_%d" % (name, ix, iy), arrays)
+                 for ix, iy, arrays in terrain.tiles(size, tile_size, resolution, **options))
+    objects = []
+    for part_name, (verts, loops, face_sizes) in parts:
+        mesh = mesh_from_arrays(part_name, verts, loops, face_sizes, smooth=True, validate=False)
+        if material is not None:
+            mesh.materials.append(material)
+        objects.append(new_object(part_name, mesh, collection=collection))
+    return objects[0] if tile_size is None else objects
+
+
+def _merged(name, arrays):
+    """Concatenate mesh parts, offsetting each part's loops by the vertices before it"""
+    offsets = np.cumsum([0] + [len(part["verts"]) for part in arrays[:-1]])
+    merged = {
+        "verts": np.concatenate([part["verts"] for part in arrays]),
+        "loops": np.concatenate([part["loops"] + offset for part, offset in zip(arrays, offsets)]),
+        "face_sizes": np.concatenate([part["face_sizes"] for part in arrays]),
+    }
+    if all("colors" in part for part in arrays):
+        merged["colors"] = np.concatenate([part["colors"] for part in arrays])
+    return name, merged
+
+
+@profiling.profile
+def build_parts(tasks, workers=None, merge=False, batch_bytes=BATCH_BYTES, material=None, smooth=True,
+                collection=None, name="Parts"):
+    """Objects from molviz.pipeline tasks: geometry in worker processes, meshes committed here
+
+    Each task returns verts/loops/face_sizes (and optionally per-vertex
+    "colors", drawn by the shared attribute shader).  By default every part
+    becomes its own object, written by foreach_set straight from the
+    worker's shared memory.  With merge=True, finished parts are gathered
+    until batch_bytes and each batch is committed as one mesh
+    ("<name>_000", ...), for many small parts (residues, chunks).
+    Returns (objects, pipeline report).
+    """
+    objects = []
+
+    def commit(key, arrays):
+        mesh = mesh_from_arrays(key, arrays["verts"], arrays["loops"], arrays["face_sizes"], smooth=smooth)
+        part_material = material
+        if "colors" in arrays:
+            shading.write(mesh, colors=arrays["colors"])
+            if part_material is None:
+                part_material = shading.shader('GEOMETRY')
+        if part_material is not None:
+            mesh.materials.append(part_material)
+        objects.append(new_object(key, mesh, collection=collection))
+
+    pipe = pipeline.Pipeline(workers)
+    batch, batched = [], 0
+    for part in pipe.run(tasks):
+        if not merge:
+            commit(part.key, part.arrays)
+            continue
+        # copied out, since the shared block is released when the next part arrives
+        batch.append({field: array.copy() for field, array in part.arrays.items()})
+        batched += sum(array.nbytes for array in part.arrays.values())
+        if batched >= batch_bytes:
+            commit(*_merged("%s_%03d" % (name, len(objects)), batch))
+            batch, batched = [], 0
+    if batch:
+        commit(*_merged("%s_%03d" % (name, len(objects)), batch))
+    return objects, pipe.report
@@ -0,0 +1,152 @@
+"""Content-addressed on-disk cache of evaluated mesh arrays
+
+A subdivided 32x16 snowball or the SUBSURF + DISPLACE ground is re-evaluated
+from scratch on every run.  Here the builder parameters (primitive, radius,
+segments, modifier settings, texture settings, ...) are hashed into a key and
+the evaluated arrays are stored under it as plain .npy files, one directory
+per entry.  Loading memory-maps the files, so later runs and other worker
+processes share the pages instead of copying them.
+
+The cache is bounded in bytes; when a put goes over the limit the least
+recently used entries are evicted (use is recorded by touching the entry's
+meta.json).  Writes go to a temporary directory that is renamed into place,
+so concurrent workers never see half-written entries.
+
+    cache = meshcache.MeshCache("~/.cache/molviz/meshes", max_bytes=2 * 2**30)
+    arrays = cache.get_or_build({"primitive": "sphere", "radius": 1.0, "subsurf": 3}, build)
+    print(cache.stats())
+
+No bpy here; meshbuild.evaluated_arrays() produces the arrays inside Blender.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+# bump when the stored layout changes so old entries stop matching
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+
+
+def _jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (np.floating, np.integer)):
+        return value.item()
+    raise TypeError("cannot hash %r" % (value,))
+
+
+def cache_key(params):
+    """Stable hex digest of a parameter dict (key order does not matter)"""
+    text = json.dumps({"format": FORMAT_VERSION, "params": params}, sort_keys=True, default=_jsonable)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MeshCache:
+    """Directory of key -> {name: array} entries with LRU eviction by size"""
+
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key, mmap=True):
+        """Arrays stored under key (memory-mapped read-only), or None"""
+        path = self._path(key)
+        meta_path = os.path.join(path, META_FILE)
+        try:
+            with open(meta_path) as meta_file:
+                meta = json.load(meta_file)
+            arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None)
+                      for name in meta["arrays"]}
+        except (OSError, ValueError, KeyError):
+            # missing, or evicted by another process while we were reading
+            self.misses += 1
+            return None
+        os.utime(meta_path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays, params=None):
+        """Store arrays under key, then evict old entries if over the size limit"""
+        path = self._path(key)
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=self.directory)
+        try:
+            for name, array in arrays.items():
+                np.save(os.path.join(staging, name + ".npy"), np.ascontiguousarray(array))
+            with open(os.path.join(staging, META_FILE), "w") as meta_file:
+                json.dump({"arrays": sorted(arrays), "params": params, "created": time.time()},
+                          meta_file, default=_jsonable)
+            try:
+                os.rename(staging, path)
+                staging = None
+            except OSError:
+                # another process stored the same key first; theirs is identical
+                pass
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+        self.evict()
+
+    def get_or_build(self, params, build):
+        """Cached arrays for params, calling build() -> {name: array} on a miss"""
+        key = cache_key(params)
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = build()
+            self.put(key, arrays, params)
+        return arrays
+
+    def entries(self):
+        """(last used, bytes, key) for every complete entry"""
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                used = os.stat(os.path.join(entry.path, META_FILE)).st_mtime
+                size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            except OSError:
+                continue
+            found.append((used, size, entry.name))
+        return found
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used entries until the cache fits; returns keys removed"""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, key in entries:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            total -= size
+            removed.append(key)
+        return removed
+
+    def clear(self):
+        self.evict(0)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries()),
+            "bytes": self.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,147 @@
+"""Cell-list spatial grid for near-linear neighbor searches in NumPy
+
+Points are binned into cubic cells of side cell_size; a pair closer than
+cell_size can only sit in the same or an adjacent cell.  Only occupied cells
+are stored (a sorted array of cell keys), so a sparse 1000 Angstrom complex
+costs memory per atom, not per cell.  Pair searches walk the points in
+chunks and, per chunk, the 14 "half shell" cell offsets, so every candidate
+pair is generated exactly once with vectorized array ops and peak memory is
+bounded by the chunk size.
+
+    grid = neighbors.CellGrid(coords, cell_size=4.0)
+    i, j, distance = grid.pairs(4.0)
+"""
+import numpy as np
+
+CHUNK_SIZE = 65536
+
+# the 13 neighbor offsets that are lexicographically "after" the cell itself;
+# together with (0, 0, 0) they visit every adjacent pair of cells once
+_HALF_SHELL = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+               if (dx, dy, dz) > (0, 0, 0)]
+_FULL_SHELL = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+
+def _expand(starts, counts):
+    """For ranges [start, start + count), the owning range and each member index"""
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    members = starts[owner] + np.arange(total) - first[owner]
+    return owner, members
+
+
+class CellGrid:
+    """Points binned into cubic cells, sorted by cell"""
+
+    def __init__(self, coords, cell_size):
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+        self.origin = coords.min(axis=0) if len(coords) else np.zeros(3)
+        cells = self.cell_of(coords)
+        # one cell of padding on every side so neighbor offsets never wrap
+        self.dims = (cells.max(axis=0) + 3) if len(coords) else np.ones(3, dtype=np.int64)
+        keys = self._key(cells + 1)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_coords = coords[self.order]
+        self.sorted_cells = cells[self.order] + 1
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            keys[self.order], return_index=True, return_counts=True)
+
+    def __len__(self):
+        return len(self.order)
+
+    def cell_of(self, points):
+        """Integer cell coordinates (unpadded) of arbitrary points"""
+        return np.floor((np.asarray(points) - self.origin) / self.cell_size).astype(np.int64)
+
+    def _key(self, cells):
+        cells = np.asarray(cells, dtype=np.int64)
+        return cells[..., 0] + self.dims[0] * (cells[..., 1] + self.dims[1] * cells[..., 2])
+
+    def _find(self, cells):
+        """Slot of each cell in cell_keys and whether that cell is occupied"""
+        inside = np.all((cells >= 0) & (cells < self.dims), axis=-1)
+        keys = self._key(np.where(inside[..., None], cells, 0))
+        slot = np.searchsorted(self.cell_keys, keys)
+        slot = np.minimum(slot, len(self.cell_keys) - 1)
+        found = inside & (self.cell_keys[slot] == keys) if len(self.cell_keys) else inside & False
+        return slot, found
+
+    def iter_pairs(self, cutoff, chunk_size=CHUNK_SIZE):
+        """Yield (i, j, distance) arrays chunk by chunk for all pairs closer than cutoff
+
+        Each unordered pair appears once, in no particular orientation.
+        cutoff may not exceed the cell size.
+        """
+        if cutoff > self.cell_size:
+            raise ValueError("cutoff %g is larger than the cell size %g" % (cutoff, self.cell_size))
+        cutoff2 = cutoff * cutoff
+        n = len(self.order)
+        for lo in range(0, n, chunk_size):
+            p = np.arange(lo, min(lo + chunk_size, n))
+            cells = self.sorted_cells[p]
+            found_i, found_j = [], []
+            for offset in [(0, 0, 0)] + _HALF_SHELL:
+                slot, found = self._find(cells + offset)
+                pi = p[found]
+                starts = self.cell_starts[slot[found]]
+                counts = self.cell_counts[slot[found]]
+                if offset == (0, 0, 0):
+                    # same cell: only partners sorted after this point
+                    ends = starts + counts
+                    starts = pi + 1
+                    counts = ends - starts
+                owner, q = _expand(starts, counts)
+                pi = pi[owner]
+                delta = self.sorted_coords[pi] - self.sorted_coords[q]
+                d2 = np.einsum("ij,ij->i", delta, delta)
+                keep = d2 <= cutoff2
+                found_i.append(pi[keep])
+                found_j.append(q[keep])
+            pi = np.concatenate(found_i)
+            q = np.concatenate(found_j)
+            distance = np.linalg.norm(self.sorted_coords[pi] - self.sorted_coords[q], axis=1)
+            yield self.order[pi], self.order[q], distance
+
+    def pairs(self, cutoff, chunk_size=CHUNK_SIZE):
+        """All pairs closer than cutoff as (i, j, distance) arrays"""
+        chunks = list(self.iter_pairs(cutoff, chunk_size))
+        if not chunks:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0)
+        return tuple(np.concatenate(column) for column in zip(*chunks))
+
+    def candidates(self, points):
+        """For each query point, the grid points in its own and the 26 adjacent cells
+
+        Returns (query index, point index) arrays; callers filter by distance.
+        """
+        cells = self.cell_of(points) + 1
+        queries, members = [], []
+        for offset in _FULL_SHELL:
+            slot, found = self._find(cells + offset)
+            owner, q = _expand(self.cell_starts[slot[found]], self.cell_counts[slot[found]])
+            queries.append(np.flatnonzero(found)[owner])
+            members.append(self.order[q])
+        return np.concatenate(queries), np.concatenate(members)
+
+    def in_box(self, low, high):
+        """Indices of the points inside the axis-aligned box [low, high]"""
+        if not len(self.order):
+            return np.zeros(0, np.int64)
+        # only occupied cells are scanned, however large the box
+        cells = self.sorted_cells[self.cell_starts]
+        overlaps = np.all((cells >= self.cell_of(low) + 1) & (cells <= self.cell_of(high) + 1), axis=1)
+        _, q = _expand(self.cell_starts[overlaps], self.cell_counts[overlaps])
+        points = self.sorted_coords[q]
+        inside = np.all((points >= low) & (points <= high), axis=1)
+        return self.order[q[inside]]
+
+
+def brute_force_pairs(coords, cutoff):
+    """O(n^2) reference: pairs (i < j) closer than cutoff; only for small inputs"""
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    delta = coords[:, None, :] - coords[None, :, :]
+    d2 = np.einsum("ijk,ijk->ij", delta, delta)
+    i, j = np.nonzero(np.triu(d2 <= cutoff * cutoff, k=1))
+    return i, j, np.sqrt(d2[i, j])
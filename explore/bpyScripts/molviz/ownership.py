@@ -0,0 +1,156 @@
+"""Tracked ownership of the datablocks our builders create
+
+Deleting objects leaves their meshes, materials and textures behind in
+bpy.data, so every re-run in a long-lived session piles up .001, .002
+copies.  The tracker records each datablock the builders create, either
+explicitly (meshbuild, materials, instancing, ... call track()) or by
+snapshotting bpy.data around a build with begin()/end(), and teardown()
+removes exactly those in one batch_remove call.
+
+    ownership.teardown()          # free whatever the previous run built
+    ownership.begin()
+    ...build the scene...
+    ownership.end()
+    print(ownership.report())
+
+Module state survives re-running a script in the same Blender session,
+which is what lets the next run clean up after the previous one.
+"""
+import contextlib
+
+import bpy
+
+from molviz import profiling
+
+# bpy.data collections the tracker knows about, in teardown order
+COLLECTIONS = ("objects", "meshes", "curves", "lights", "cameras", "materials", "node_groups", "textures",
+               "images", "actions")
+
+_tracked = {}
+# a stack, so a script's own begin()/end() can nest inside a session()
+_snapshots = []
+_teardown_callbacks = []
+
+
+def _alive(datablock):
+    try:
+        datablock.name
+        return True
+    except ReferenceError:
+        return False
+
+
+def track(datablock):
+    """Record a datablock as ours; returns it so calls can be chained"""
+    if datablock is not None:
+        _tracked[datablock.as_pointer()] = datablock
+    return datablock
+
+
+def tracked():
+    """Live tracked datablocks (removed ones are dropped on the way)"""
+    live = {}
+    for pointer, datablock in _tracked.items():
+        if _alive(datablock):
+            live[pointer] = datablock
+    _tracked.clear()
+    _tracked.update(live)
+    return list(live.values())
+
+
+def _pointers():
+    return {id_.as_pointer() for name in COLLECTIONS for id_ in getattr(bpy.data, name)}
+
+
+def begin():
+    """Remember what bpy.data holds now; end() tracks everything added since"""
+    _snapshots.append(_pointers())
+
+
+def end():
+    """Track every datablock created since the matching begin(), including ones made by bpy.ops"""
+    if not _snapshots:
+        raise RuntimeError("ownership.end() called without begin()")
+    snapshot = _snapshots.pop()
+    for name in COLLECTIONS:
+        for datablock in getattr(bpy.data, name):
+            if datablock.as_pointer() not in snapshot:
+                track(datablock)
+
+
+@contextlib.contextmanager
+def session():
+    """with ownership.session(): ... tracks everything built inside the block"""
+    depth = len(_snapshots)
+    begin()
+    try:
+        yield
+    finally:
+        # code that raised between its own begin() and end() leaves its
+        # snapshot behind; closing it here still tracks what it built
+        while len(_snapshots) > depth:
+            end()
+
+
+def on_teardown(callback):
+    """Call callback() after every teardown, e.g. to clear caches of removed datablocks"""
+    if callback not in _teardown_callbacks:
+        _teardown_callbacks.append(callback)
+
+
+@profiling.profile
+def teardown():
+    """Remove every tracked datablock still alive; returns how many were removed"""
+    doomed = tracked()
+    if doomed:
+        bpy.data.batch_remove(doomed)
+    _tracked.clear()
+    for callback in _teardown_callbacks:
+        callback()
+    return len(doomed)
+
+
+def _mesh_bytes(mesh):
+    # rough size of the core arrays: positions, edges, corners, faces, plus
+    # 4 bytes per element of every generic attribute
+    size = len(mesh.vertices) * 12 + len(mesh.edges) * 8 + len(mesh.loops) * 8 + len(mesh.polygons) * 8
+    for attribute in mesh.attributes:
+        if not attribute.name.startswith("."):
+            size += len(attribute.data) * 4 * (4 if attribute.data_type in ('FLOAT_COLOR', 'FLOAT4') else 1)
+    return size
+
+
+def _image_bytes(image):
+    channels = image.channels or 4
+    return image.size[0] * image.size[1] * channels * (4 if image.is_float else 1)
+
+
+_SIZERS = {"meshes": _mesh_bytes, "images": _image_bytes}
+
+
+def report(only_tracked=False):
+    """Count, orphan count and estimated bytes per datablock type
+
+    Bytes are estimates for meshes and images only; other types report 0.
+    """
+    ours = {datablock.as_pointer() for datablock in tracked()}
+    rows = {}
+    for name in COLLECTIONS:
+        sizer = _SIZERS.get(name)
+        count = orphans = size = 0
+        for datablock in getattr(bpy.data, name):
+            if only_tracked and datablock.as_pointer() not in ours:
+                continue
+            count += 1
+            orphans += datablock.users == 0
+            if sizer is not None:
+                size += sizer(datablock)
+        rows[name] = {"count": count, "orphans": orphans, "bytes": size}
+    return rows
+
+
+def format_report(rows):
+    lines = ["%-12s %8s %8s %12s" % ("type", "count", "orphans", "bytes")]
+    for name, row in rows.items():
+        lines.append("%-12s %8d %8d %12d" % (name, row["count"], row["orphans"], row["bytes"]))
+    return "\n".join(lines)
@@ -0,0 +1,259 @@
+"""Geometry computed in worker processes and handed back through shared memory (no bpy)
+
+bpy may only be driven from Blender's main thread, so geometry used to be
+computed and committed in turn.  Here the NumPy half runs in a process
+pool.  A task is a top-level function and its arguments, and it returns a
+dict of arrays (plus small picklable values).  The worker copies the arrays
+into one SharedMemory block and sends back only its name and layout.  The
+main process maps that block as NumPy views, so foreach_set reads the
+worker's buffers directly, and nothing large goes through pickle.
+
+Results come back as they finish, while the pool works on the next ones.
+At most max_in_flight results are computed ahead of the consumer, which
+bounds the shared memory held.
+
+    pipe = pipeline.Pipeline(workers=4)
+    for part in pipe.run(pipeline.chain_tasks(atoms)):
+        mesh = meshbuild.mesh_from_arrays(part.key, part.arrays["verts"], ...)   # main thread only
+    print(pipeline.format_report(pipe.report))
+
+Falls back to running the tasks one by one in this process (same results,
+no shared memory) when workers <= 1, when no process can be started, or
+when the pool breaks mid-run.  Inside Blender only "fork" is used, since
+spawned workers would start another Blender, and not at all on macOS,
+where forking Blender is unsafe.  meshbuild.build_parts() is the
+Blender side.
+"""
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from molviz import geometry, terrain
+
+ALIGNMENT = 64
+
+Part = collections.namedtuple("Part", "key arrays meta seconds")
+
+
+def _pack(arrays):
+    """Copy arrays into one new shared block; returns (block name, [(field, dtype, shape, offset)])"""
+    fields, offset = [], 0
+    for field, array in arrays.items():
+        fields.append((field, array.dtype.str, array.shape, offset))
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (field, dtype, shape, start), array in zip(fields, arrays.values()):
+        np.ndarray(shape, dtype, block.buf, start)[...] = array
+    # the main process owns the block from here on; the worker must not unlink it when it exits
+    resource_tracker.unregister(block._name, "shared_memory")
+    block.close()
+    return block.name, fields
+
+
+def _attach(name, fields):
+    block = shared_memory.SharedMemory(name=name)
+    return block, {field: np.ndarray(shape, dtype, block.buf, start) for field, dtype, shape, start in fields}
+
+
+def _release(block, arrays):
+    arrays.clear()
+    try:
+        block.close()
+    except BufferError:
+        # the consumer kept a view; the mapping goes with it, the name goes now
+        pass
+    block.unlink()
+
+
+def _split(result):
+    arrays = {key: value for key, value in result.items() if isinstance(value, np.ndarray)}
+    return arrays, {key: value for key, value in result.items() if key not in arrays}
+
+
+def _run(task):
+    """Worker side: compute one task, return its arrays as a shared block"""
+    key, function, args = task
+    start = time.perf_counter()
+    arrays, meta = _split(function(*args))
+    seconds = time.perf_counter() - start
+    return key, _pack(arrays), meta, seconds
+
+
+def _context():
+    """The multiprocessing context to start workers with, or None if there is none safe to use"""
+    if "bpy" in sys.modules and sys.platform == "darwin":
+        # Blender on macOS is a threaded Cocoa process, which cannot be forked safely
+        return None
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods:
+        return multiprocessing.get_context("fork")
+    if "bpy" in sys.modules:
+        return None
+    return multiprocessing.get_context()
+
+
+class Pipeline:
+    """Run geometry tasks in a process pool and yield their results in completion order
+
+    A task is (key, function, args).  function must be importable by the
+    workers (a module-level function) and return a dict.  report describes
+    the last run: mode, per-stage seconds and the fallback reason if any.
+    """
+
+    def __init__(self, workers=None, max_in_flight=None):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_in_flight = max_in_flight or 2 * max(self.workers, 1)
+        self.report = None
+
+    def run(self, tasks):
+        """Yield a Part per task; its arrays are only valid until the next one is requested"""
+        tasks = collections.deque(tasks)
+        self.report = report = {"mode": "serial", "workers": 1, "tasks": len(tasks), "compute": 0.0,
+                                "wait": 0.0, "consumer": 0.0, "wall": 0.0, "fallback": None}
+        start = time.perf_counter()
+        try:
+            context = _context() if self.workers > 1 else None
+            if self.workers > 1 and context is None:
+                report["fallback"] = "no safe start method for workers inside Blender"
+            if context is not None and tasks:
+                try:
+                    pool = concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=context)
+                except (OSError, ImportError, NotImplementedError) as error:
+                    report["fallback"] = "process pool unavailable: %s" % error
+                else:
+                    report["mode"], report["workers"] = "pool", self.workers
+                    with pool:
+                        yield from self._pooled(pool, tasks, report)
+            yield from self._serial(tasks, report)
+        finally:
+            report["wall"] = time.perf_counter() - start
+
+    def _serial(self, tasks, report):
+        while tasks:
+            key, function, args = tasks.popleft()
+            start = time.perf_counter()
+            arrays, meta = _split(function(*args))
+            seconds = time.perf_counter() - start
+            report["compute"] += seconds
+            yield from self._hand_over(Part(key, arrays, meta, seconds), report)
+
+    def _pooled(self, pool, tasks, report):
+        pending = {}
+        try:
+            while tasks or pending:
+                while tasks and len(pending) < self.max_in_flight:
+                    task = tasks.popleft()
+                    try:
+                        pending[pool.submit(_run, task)] = task
+                    except BrokenProcessPool as error:
+                        # a worker died since the last wait; the pool takes no more work
+                        report["fallback"] = "pool failed: %s" % (error or type(error).__name__)
+                        tasks.appendleft(task)
+                        return
+                start = time.perf_counter()
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                report["wait"] += time.perf_counter() - start
+                for future in done:
+                    task = pending.pop(future)
+                    try:
+                        key, (name, fields), meta, seconds = future.result()
+                    except (BrokenProcessPool, OSError) as error:
+                        # finish this and every other unfinished task here
+                        report["fallback"] = "pool failed: %s" % (error or type(error).__name__)
+                        tasks.appendleft(task)
+                        return
+                    report["compute"] += seconds
+                    block, arrays = _attach(name, fields)
+                    try:
+                        yield from self._hand_over(Part(key, arrays, meta, seconds), report)
+                    finally:
+                        _release(block, arrays)
+        finally:
+            # on an early exit the unfinished tasks go back to the queue and finished blocks are freed
+            tasks.extendleft(reversed(list(pending.values())))
+            for future in pending:
+                if future.cancel():
+                    continue
+                try:
+                    name, fields = future.result()[1]
+                except Exception:
+                    continue
+                _release(*_attach(name, fields))
+
+    def _hand_over(self, part, report):
+        start = time.perf_counter()
+        yield part
+        report["consumer"] += time.perf_counter() - start
+
+
+def format_report(report):
+    """One paragraph: how the stages overlapped and how busy the workers were"""
+    wall = report["wall"] or 1e-9
+    lines = ["%d tasks, %s x%d in %.2f s" % (report["tasks"], report["mode"], report["workers"], report["wall"])]
+    lines.append("  compute %.2f s (%.0f%% of %d workers), main thread committing %.2f s (%.0f%%), "
+                 "waiting %.2f s" % (report["compute"], 100 * report["compute"] / (wall * report["workers"]),
+                                     report["workers"], report["consumer"], 100 * report["consumer"] / wall,
+                                     report["wait"]))
+    if report["fallback"]:
+        lines.append("  fallback: " + report["fallback"])
+    return "\n".join(lines)
+
+
+# --- tasks ------------------------------------------------------------------
+# Mesh arrays come out as float32 / int32, the dtypes foreach_set takes without converting.
+
+def _mesh(verts, loops, face_sizes, **extra):
+    result = {"verts": np.asarray(verts, dtype=np.float32), "loops": np.asarray(loops, dtype=np.int32),
+              "face_sizes": np.asarray(face_sizes, dtype=np.int32)}
+    result.update(extra)
+    return result
+
+
+def spheres(centers, radii, colors=None, segments=16, ring_count=8):
+    """One UV sphere per center as a single buffer, colors repeated per vertex"""
+    primitive = geometry.uv_sphere(segments, ring_count, 1.0)
+    verts, loops, face_sizes, _ = geometry.instances(primitive, centers, radii, with_normals=False)
+    if colors is None:
+        return _mesh(verts, loops, face_sizes)
+    colors = np.repeat(np.asarray(colors, dtype=np.float32), len(primitive[0]), axis=0)
+    return _mesh(verts, loops, face_sizes, colors=colors)
+
+
+def sticks(starts, ends, radii=0.15, colors=None, vertices=8):
+    """Bond sticks as one buffer (see geometry.sticks), colors repeated per vertex"""
+    verts, loops, face_sizes, _ = geometry.sticks(starts, ends, radii, vertices)
+    if colors is None:
+        return _mesh(verts, loops, face_sizes)
+    return _mesh(verts, loops, face_sizes, colors=np.repeat(np.asarray(colors, dtype=np.float32), 2 * vertices,
+                                                            axis=0))
+
+
+def terrain_tile(ix, iy, tile_size, resolution, origin, options):
+    """One terrain.tile() as mesh arrays"""
+    return _mesh(*terrain.tile(ix, iy, tile_size, resolution, origin, **options))
+
+
+def chain_tasks(atoms, name="Atoms", segments=16, ring_count=8):
+    """One spheres task per chain of a structure.Structure, keyed "<name>_<chain>" """
+    radii, colors = atoms.radii(), atoms.colors()
+    tasks = []
+    for chain in np.unique(atoms.chain):
+        mask = atoms.chain == chain
+        tasks.append(("%s_%s" % (name, chain), spheres,
+                      (atoms.coords[mask], radii[mask], colors[mask], segments, ring_count)))
+    return tasks
+
+
+def tile_tasks(extent=1000.0, tile_size=100.0, resolution=128, center=(0.0, 0.0), name="Ground", **options):
+    """One terrain_tile task per tile covering extent, keyed and laid out like terrain.tiles()"""
+    count = max(1, int(np.ceil(extent / tile_size)))
+    origin = (center[0] - count * tile_size / 2.0, center[1] - count * tile_size / 2.0)
+    return [("%s_%d_%d" % (name, ix, iy), terrain_tile, (ix, iy, tile_size, resolution, origin, options))
+            for iy in range(count) for ix in range(count)]
@@ -0,0 +1,124 @@
+"""Point cloud + instance-on-points: one object for any number of atoms
+
+One Blender object per sphere stops scaling around 10^5 objects; the
+outliner, depsgraph and selection loops take over.  Here every center becomes
+a vertex of a single face-less mesh carrying "radius" and "color" point
+attributes, and a geometry-nodes modifier instances a UV sphere on each point,
+scaled by its radius.  The material reads the color back through an
+instancer attribute node, so the whole scene is one object and one material.
+Roughness and emission are per-point attributes too (molviz.shading), and
+recoloring is one attribute write: set_colors(atoms.data, colors).
+
+    from molviz import pointcloud
+    atoms = pointcloud.build_atoms(centers, radii, colors, segments=16, ring_count=8)
+"""
+import bpy
+import numpy as np
+
+from molviz import ownership, profiling, shading
+
+RADIUS_ATTRIBUTE = "radius"
+COLOR_ATTRIBUTE = shading.COLOR
+ATOM_ROUGHNESS = 0.4
+
+_node_groups = {}
+ownership.on_teardown(_node_groups.clear)
+
+
+@profiling.profile
+def point_mesh(name, centers, radii, colors=None, roughness=ATOM_ROUGHNESS, emission=None):
+    """Face-less mesh with one vertex per center plus radius and shading point attributes"""
+    centers = np.asarray(centers, dtype=np.float32).reshape(-1, 3)
+    n = len(centers)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float32), (n,))
+
+    mesh = ownership.track(bpy.data.meshes.new(name))
+    mesh.vertices.add(n)
+    mesh.vertices.foreach_set("co", centers.ravel())
+    mesh.attributes.new(RADIUS_ATTRIBUTE, 'FLOAT', 'POINT').data.foreach_set(
+        "value", np.ascontiguousarray(radii))
+    shading.write(mesh, colors, roughness, emission)
+    return mesh
+
+
+def set_colors(mesh, colors):
+    """Write (N, 3) or (N, 4) colors into the mesh's color point attribute"""
+    shading.write(mesh, colors=colors)
+
+
+def _add_socket(group, name, in_out, socket_type):
+    if hasattr(group, "interface"):
+        # Blender 4.0+
+        return group.interface.new_socket(name=name, in_out=in_out, socket_type=socket_type)
+    sockets = group.inputs if in_out == 'INPUT' else group.outputs
+    return sockets.new(socket_type, name)
+
+
+def _alive(datablock, collection):
+    try:
+        return datablock.name in collection
+    except ReferenceError:
+        return False
+
+
+@profiling.profile
+def sphere_instancer(segments=16, ring_count=8, material=None):
+    """Geometry-nodes group instancing a UV sphere on every point, scaled by radius"""
+    key = (segments, ring_count, material.name if material is not None else None)
+    group = _node_groups.get(key)
+    if group is not None and _alive(group, bpy.data.node_groups):
+        return group
+
+    group = ownership.track(bpy.data.node_groups.new("SphereInstancer_%dx%d" % (segments, ring_count), 'GeometryNodeTree'))
+    _add_socket(group, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    _add_socket(group, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+    nodes = group.nodes
+    links = group.links
+
+    group_in = nodes.new('NodeGroupInput')
+    group_out = nodes.new('NodeGroupOutput')
+    sphere = nodes.new('GeometryNodeMeshUVSphere')
+    sphere.inputs["Segments"].default_value = segments
+    sphere.inputs["Rings"].default_value = ring_count
+    sphere.inputs["Radius"].default_value = 1.0
+    smooth = nodes.new('GeometryNodeSetShadeSmooth')
+    radius = nodes.new('GeometryNodeInputNamedAttribute')
+    radius.data_type = 'FLOAT'
+    radius.inputs["Name"].default_value = RADIUS_ATTRIBUTE
+    instance = nodes.new('GeometryNodeInstanceOnPoints')
+
+    links.new(sphere.outputs["Mesh"], smooth.inputs["Geometry"])
+    instance_mesh = smooth.outputs["Geometry"]
+    if material is not None:
+        set_material = nodes.new('GeometryNodeSetMaterial')
+        set_material.inputs["Material"].default_value = material
+        links.new(instance_mesh, set_material.inputs["Geometry"])
+        instance_mesh = set_material.outputs["Geometry"]
+    links.new(group_in.outputs[0], instance.inputs["Points"])
+    links.new(instance_mesh, instance.inputs["Instance"])
+    links.new(radius.outputs["Attribute"], instance.inputs["Scale"])
+    links.new(instance.outputs["Instances"], group_out.inputs[0])
+
+    _node_groups[key] = group
+    return group
+
+
+def color_material():
+    """Shared material reading color, roughness and emission from the instancer's points"""
+    return shading.shader('INSTANCER')
+
+
+@profiling.profile
+def build_atoms(centers, radii, colors=None, name="Atoms", segments=16, ring_count=8,
+                material=None, collection=None, roughness=ATOM_ROUGHNESS, emission=None):
+    """Single object drawing a sphere per center through instance-on-points"""
+    mesh = point_mesh(name, centers, radii, colors, roughness, emission)
+    if material is None:
+        material = color_material()
+    obj = ownership.track(bpy.data.objects.new(name, mesh))
+    if collection is None:
+        collection = bpy.context.collection
+    collection.objects.link(obj)
+    modifier = obj.modifiers.new(name="SphereInstancer", type='NODES')
+    modifier.node_group = sphere_instancer(segments, ring_count, material)
+    return obj
@@ -0,0 +1,283 @@
+"""Where does scene-build time go: timing spans for builders and bpy.ops
+
+Every molviz builder is decorated with @profile, and instrument(globals())
+wraps a script's own functions (create_snowball, setup_scene, ...) the same
+way.  enable(ops=True) additionally wraps every bpy.ops call, so
+shade_smooth, primitive_*_add and friends show up by operator name.
+
+Each span records wall time and peak RSS at its end.  With
+enable(datablocks=True) (or MOLVIZ_PROFILE=datablocks) it also records how
+many datablocks bpy.data gained while it ran.  That is off by default:
+counting takes len() of every ID collection, which walks each list, at both
+ends of every span.  Results come out as a summary table, as JSON, or as a
+Chrome trace (open chrome://tracing or https://ui.perfetto.dev):
+
+    profiling.enable()
+    profiling.instrument(globals())
+    create_snowman()
+    print(profiling.format_summary())
+    profiling.write_chrome_trace("/tmp/snowman-trace.json")
+
+Switched off (the default, unless MOLVIZ_PROFILE=1 is set), a decorated
+call costs one flag check, so batch jobs can keep the hooks in.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import bpy
+except ImportError:  # plain-Python use of the bpy-free modules
+    bpy = None
+
+# bpy.data collections counted for "datablocks created"
+COLLECTIONS = ("objects", "meshes", "curves", "materials", "node_groups", "textures", "images",
+               "lights", "cameras")
+
+_enabled = False
+_count_datablocks = False
+_events = []
+_stack = []
+_origin = time.perf_counter()
+_patched_ops = {}
+
+
+def enabled():
+    return _enabled
+
+
+def _datablocks():
+    if bpy is None or not _count_datablocks:
+        return None
+    return sum(len(getattr(bpy.data, name)) for name in COLLECTIONS)
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return 0
+    # kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if os.uname().sysname == "Darwin" else peak
+
+
+class _Span:
+    __slots__ = ("name", "category", "start", "datablocks", "children")
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.children = 0.0
+        self.datablocks = _datablocks()
+        self.start = time.perf_counter()
+
+    def close(self):
+        end = time.perf_counter()
+        duration = end - self.start
+        _events.append({
+            "name": self.name,
+            "category": self.category,
+            "start": self.start - _origin,
+            "duration": duration,
+            "self": duration - self.children,
+            "datablocks": None if self.datablocks is None else _datablocks() - self.datablocks,
+            "peak_rss_kb": _peak_rss_kb(),
+            "thread": threading.get_ident(),
+        })
+        return duration
+
+
+def _begin(name, category):
+    span = _Span(name, category)
+    _stack.append(span)
+    return span
+
+
+def _end(span):
+    _stack.pop()
+    duration = span.close()
+    if _stack:
+        _stack[-1].children += duration
+
+
+@contextlib.contextmanager
+def span(name, category="block"):
+    """with profiling.span("setup lights"): ... records the block when enabled"""
+    if not _enabled:
+        yield
+        return
+    current = _begin(name, category)
+    try:
+        yield
+    finally:
+        _end(current)
+
+
+def profile(func=None, name=None, category="builder"):
+    """Decorator recording every call of func while profiling is enabled"""
+    if func is None:
+        return functools.partial(profile, name=name, category=category)
+    label = name or "%s.%s" % (func.__module__.rpartition(".")[2], func.__qualname__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        current = _begin(label, category)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _end(current)
+
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def instrument(namespace, names=None, category="script"):
+    """Wrap the plain functions in a module or globals() dict in place
+
+    Calls made through the namespace (which is how a script's functions call
+    each other) are then recorded.  Returns the wrapped names.
+    """
+    if not isinstance(namespace, dict):
+        namespace = vars(namespace)
+    wrapped = []
+    for key, value in list(namespace.items()):
+        if names is not None and key not in names:
+            continue
+        if not callable(value) or getattr(value, "__profiled__", False) or not hasattr(value, "__code__"):
+            continue
+        if names is None and (key.startswith("_") or value.__module__ != namespace.get("__name__")):
+            continue
+        namespace[key] = profile(value, name=key, category=category)
+        wrapped.append(key)
+    return wrapped
+
+
+def _operator_class():
+    # bpy.ops.<module>.<operator> objects all share one callable class
+    return type(bpy.ops.object.select_all)
+
+
+def _patch_ops():
+    if bpy is None or _patched_ops:
+        return
+    cls = _operator_class()
+    original = cls.__call__
+
+    def __call__(self, *args, **kwargs):
+        if not _enabled:
+            return original(self, *args, **kwargs)
+        current = _begin("bpy.ops." + self.idname_py(), "operator")
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            _end(current)
+
+    cls.__call__ = __call__
+    _patched_ops[cls] = original
+
+
+def _unpatch_ops():
+    for cls, original in _patched_ops.items():
+        cls.__call__ = original
+    _patched_ops.clear()
+
+
+def enable(ops=True, datablocks=False):
+    """Start recording; with ops, every bpy.ops call is recorded too, with datablocks, bpy.data growth per span"""
+    global _enabled, _count_datablocks
+    _enabled = True
+    _count_datablocks = datablocks
+    if ops:
+        _patch_ops()
+
+
+def disable():
+    """Stop recording and restore bpy.ops; recorded events are kept"""
+    global _enabled
+    _enabled = False
+    _unpatch_ops()
+
+
+def reset():
+    global _origin
+    _events.clear()
+    _stack.clear()
+    _origin = time.perf_counter()
+
+
+def events():
+    return list(_events)
+
+
+def summary():
+    """Per-name call count, total/self/max seconds, datablocks created, peak RSS"""
+    rows = {}
+    for event in _events:
+        row = rows.setdefault(event["name"], {
+            "category": event["category"], "calls": 0, "total": 0.0, "self": 0.0, "max": 0.0,
+            "datablocks": None, "peak_rss_kb": 0,
+        })
+        row["calls"] += 1
+        row["total"] += event["duration"]
+        row["self"] += event["self"]
+        row["max"] = max(row["max"], event["duration"])
+        if event["datablocks"] is not None:
+            row["datablocks"] = (row["datablocks"] or 0) + event["datablocks"]
+        row["peak_rss_kb"] = max(row["peak_rss_kb"], event["peak_rss_kb"])
+    return dict(sorted(rows.items(), key=lambda item: -item[1]["self"]))
+
+
+def format_summary(rows=None, limit=None):
+    """Table sorted by self time (time not spent in recorded callees)"""
+    if rows is None:
+        rows = summary()
+    lines = ["%-40s %-9s %8s %10s %10s %10s %10s %12s" % (
+        "name", "kind", "calls", "total ms", "self ms", "max ms", "datablocks", "peak RSS MB")]
+    for name, row in list(rows.items())[:limit]:
+        lines.append("%-40s %-9s %8d %10.2f %10.2f %10.2f %10s %12.1f" % (
+            name[:40], row["category"], row["calls"], row["total"] * 1e3, row["self"] * 1e3,
+            row["max"] * 1e3, "-" if row["datablocks"] is None else row["datablocks"],
+            row["peak_rss_kb"] / 1024.0))
+    return "\n".join(lines)
+
+
+def chrome_trace():
+    """Events in Chrome trace format (complete "X" events, microseconds)"""
+    pid = os.getpid()
+    return {
+        "traceEvents": [{
+            "name": event["name"],
+            "cat": event["category"],
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["duration"] * 1e6,
+            "pid": pid,
+            "tid": event["thread"],
+            "args": {"datablocks": event["datablocks"], "peak_rss_kb": event["peak_rss_kb"]},
+        } for event in _events],
+        "displayTimeUnit": "ms",
+    }
+
+
+def write_chrome_trace(path):
+    with open(path, "w") as out:
+        json.dump(chrome_trace(), out)
+
+
+def write_json(path):
+    """Summary plus raw events, for comparing runs"""
+    with open(path, "w") as out:
+        json.dump({"summary": summary(), "events": _events}, out, indent=1)
+
+
+if os.environ.get("MOLVIZ_PROFILE", "") not in ("", "0"):
+    enable(datablocks=os.environ["MOLVIZ_PROFILE"] == "datablocks")
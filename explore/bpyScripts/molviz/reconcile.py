@@ -0,0 +1,163 @@
+"""Declarative scenes: diff a description against the scene, touch only changes
+
+Instead of clearScene() and a full rebuild, a scene is described as a dict
+keyed by the stable object names the builders already use ("body",
+"HatBrim", "Button_1", ...):
+
+    description = {
+        "HeadSnowball": {"primitive": "sphere", "radius": 0.25, "location": (0, 0, 2.825),
+                         "material": "SnowmanMaterial", "color": (0.98, 0.98, 1.0, 1.0),
+                         "roughness": 0.3, "subsurf": (2, 3)},
+        ...
+    }
+    report = reconcile.reconcile(description)
+
+Each managed object stores the spec it was built from in a custom property.
+reconcile() compares specs field group by field group (geometry, transform,
+material, modifiers), creates missing objects, re-applies only the groups
+that changed on existing ones and deletes managed objects that are no longer
+described.  Changing one chain's color therefore touches that chain's
+objects and nothing else.
+
+With "material": reconcile.SHARED every object uses the one shared
+shader from molviz.shading, and color, roughness and emission are object
+properties: a color change writes Object.color and creates no material.
+"""
+import json
+
+import bpy
+
+from molviz import instancing, materials, ownership, profiling, shading
+
+SPEC_PROPERTY = "molviz_spec"
+SHARED = "shared"
+
+DEFAULTS = {
+    "location": (0, 0, 0),
+    "rotation": (0, 0, 0),
+    "scale": (1, 1, 1),
+    "material": None,
+    "color": (0.8, 0.8, 0.8, 1.0),
+    "roughness": 0.5,
+    "emission": 0.0,
+    "subsurf": None,
+}
+
+GEOMETRY_FIELDS = {
+    "sphere": ("radius", "segments", "ring_count", "smooth"),
+    "cone": ("vertices", "radius1", "radius2", "depth"),
+    "cylinder": ("vertices", "radius", "depth"),
+}
+
+GROUPS = {
+    "transform": ("location", "rotation", "scale"),
+    "material": ("material",),
+    "shading": ("color", "roughness", "emission"),
+    "modifiers": ("subsurf",),
+}
+
+
+def normalize(spec):
+    """Spec with defaults filled in and tuples turned into lists, as stored"""
+    if spec.get("primitive") not in GEOMETRY_FIELDS:
+        raise ValueError("unknown primitive %r" % spec.get("primitive"))
+    full = dict(DEFAULTS)
+    full.update(spec)
+    return json.loads(json.dumps(full, sort_keys=True))
+
+
+def stored_spec(obj):
+    text = obj.get(SPEC_PROPERTY)
+    return json.loads(text) if text is not None else None
+
+
+def changed_groups(old, new):
+    """Names of the field groups that differ between two normalized specs"""
+    if old is None:
+        return ["geometry"] + list(GROUPS)
+    groups = []
+    geometry = ("primitive",) + GEOMETRY_FIELDS[new["primitive"]]
+    if any(old.get(field) != new.get(field) for field in geometry):
+        groups.append("geometry")
+    for group, fields in GROUPS.items():
+        if any(old.get(field) != new.get(field) for field in fields):
+            groups.append(group)
+    return groups
+
+
+def _mesh(spec):
+    build = getattr(instancing.library, spec["primitive"])
+    return build(**{field: spec[field] for field in GEOMETRY_FIELDS[spec["primitive"]] if field in spec})
+
+
+def _apply(obj, spec, groups):
+    if "geometry" in groups:
+        obj.data = _mesh(spec)
+    if "transform" in groups:
+        obj.location = spec["location"]
+        obj.rotation_euler = spec["rotation"]
+        obj.scale = spec["scale"]
+    # a new mesh comes from the library without this object's slot, so relink
+    relink = "geometry" in groups or "material" in groups
+    if spec["material"] == SHARED:
+        if relink:
+            materials.assign(obj, shading.shader('OBJECT'), per_object=True)
+        if "shading" in groups:
+            shading.write_objects([obj], spec["color"], spec["roughness"], spec["emission"])
+    elif spec["material"] is not None:
+        if relink or "shading" in groups:
+            mat = materials.principled(spec["material"], spec["color"], roughness=spec["roughness"])
+            # meshes are shared between same-shaped objects, so link per object
+            materials.assign(obj, mat, per_object=True)
+    elif relink and obj.material_slots:
+        obj.material_slots[0].material = None
+    if "modifiers" in groups:
+        modifier = obj.modifiers.get("Subdivision")
+        if spec["subsurf"] is None:
+            if modifier is not None:
+                obj.modifiers.remove(modifier)
+        else:
+            if modifier is None:
+                modifier = obj.modifiers.new(name="Subdivision", type='SUBSURF')
+            modifier.levels, modifier.render_levels = spec["subsurf"]
+    obj[SPEC_PROPERTY] = json.dumps(spec, sort_keys=True)
+
+
+@profiling.profile
+def reconcile(description, collection=None, delete=True):
+    """Make the scene match description; returns what was created/updated/deleted
+
+    report["updated"] maps object names to the field groups re-applied;
+    objects whose spec did not change are only counted in "unchanged".
+    """
+    if collection is None:
+        collection = bpy.context.collection
+    report = {"created": [], "updated": {}, "deleted": [], "unchanged": 0}
+
+    for name, spec in description.items():
+        spec = normalize(spec)
+        obj = bpy.data.objects.get(name)
+        if obj is None:
+            obj = ownership.track(bpy.data.objects.new(name, _mesh(spec)))
+            collection.objects.link(obj)
+            _apply(obj, spec, changed_groups(None, spec))
+            report["created"].append(name)
+            continue
+        groups = changed_groups(stored_spec(obj), spec)
+        if groups:
+            _apply(obj, spec, groups)
+            report["updated"][name] = groups
+        else:
+            report["unchanged"] += 1
+
+    if delete:
+        for obj in list(bpy.data.objects):
+            if SPEC_PROPERTY in obj and obj.name not in description:
+                report["deleted"].append(obj.name)
+                bpy.data.objects.remove(obj)
+    return report
+
+
+def touched(report):
+    """Number of objects reconcile() created, updated or deleted"""
+    return len(report["created"]) + len(report["updated"]) + len(report["deleted"])
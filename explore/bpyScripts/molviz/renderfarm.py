@@ -0,0 +1,311 @@
+"""Spread turntable frames and multi-view stills over local Blender workers
+
+Rendering used to be one process, one camera, one frame at a time.  Here a
+RenderFarm drives a pool of renderers (by default persistent Blender workers
+from molviz.worker, CPU only, threads split between them).  Every slot pulls
+the task with the largest predicted cost that is still pending, and the
+predictions come from measured render times of the same view and nearby
+frames; the pending tasks are re-sorted only after a new measurement.
+Long frames start first and short ones fill the gaps, so the workers
+finish close together.
+
+Finished tasks are appended to a journal in the output directory; a farm
+started again on the same directory skips what is already rendered, so a
+crash or Ctrl-C loses at most the frames in flight.  A slot whose renderer
+dies is restarted and its task re-queued.
+
+    tasks = renderfarm.turntable_tasks(120, "/tmp/turntable", radius=9, height=4, target=(0, 0, 1.5))
+    farm = renderfarm.RenderFarm(renderfarm.WorkerRenderer.factory("snowman/snowman-detailed.py"), workers=4)
+    report = farm.run(tasks, "/tmp/turntable")
+    print(renderfarm.format_report(report))
+
+FakeRenderer stands in for Blender (it sleeps for a cost function of the
+task and writes a placeholder file), so scheduling can be exercised anywhere.
+No bpy here.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+
+from molviz import worker
+
+JOURNAL = "journal.jsonl"
+MANIFEST = "manifest.json"
+DEFAULT_COST = 1.0
+
+
+def turntable_tasks(frames, output_dir, radius=10.0, height=4.0, target=(0.0, 0.0, 1.5), view="turntable"):
+    """One task per frame, the camera circling target once over the animation"""
+    tasks = []
+    for frame in range(frames):
+        angle = 2.0 * math.pi * frame / frames
+        location = (target[0] + radius * math.cos(angle), target[1] + radius * math.sin(angle), target[2] + height)
+        tasks.append({
+            "key": "%s_%04d" % (view, frame),
+            "view": view,
+            "frame": frame,
+            "camera": {"location": location, "target": list(target)},
+            "output": os.path.join(output_dir, "%s_%04d.png" % (view, frame)),
+        })
+    return tasks
+
+
+def multiview_tasks(views, output_dir, frames=(1,), distance=10.0, target=(0.0, 0.0, 1.5)):
+    """Stills from (azimuth, elevation) degree pairs, for each of frames"""
+    tasks = []
+    for index, (azimuth, elevation) in enumerate(views):
+        a, e = math.radians(azimuth), math.radians(elevation)
+        location = (target[0] + distance * math.cos(e) * math.cos(a),
+                    target[1] + distance * math.cos(e) * math.sin(a),
+                    target[2] + distance * math.sin(e))
+        view = "view%02d" % index
+        for frame in frames:
+            tasks.append({
+                "key": "%s_%04d" % (view, frame),
+                "view": view,
+                "frame": frame,
+                "camera": {"location": location, "target": list(target)},
+                "output": os.path.join(output_dir, "%s_%04d.png" % (view, frame)),
+            })
+    return tasks
+
+
+class CostModel:
+    """Predict a task's render seconds from measured ones
+
+    The nearest measured frame of the same view (cost varies smoothly along
+    a turntable), otherwise the mean of everything measured so far.  Frames
+    are kept sorted per view, so a prediction is one bisect; version counts
+    the measurements, so callers can tell when predictions may have moved.
+    """
+
+    def __init__(self, default=DEFAULT_COST):
+        self.default = default
+        self.by_view = {}
+        self.version = 0
+        self._frames = {}
+        self._total = 0.0
+        self._count = 0
+
+    def record(self, task, seconds):
+        view, frame = task.get("view"), task.get("frame", 0)
+        measured = self.by_view.setdefault(view, {})
+        if frame in measured:
+            self._total -= measured[frame]
+        else:
+            bisect.insort(self._frames.setdefault(view, []), frame)
+            self._count += 1
+        measured[frame] = seconds
+        self._total += seconds
+        self.version += 1
+
+    def predict(self, task):
+        frames = self._frames.get(task.get("view"))
+        if frames:
+            frame = task.get("frame", 0)
+            index = bisect.bisect_left(frames, frame)
+            nearest = min(frames[max(0, index - 1):index + 1], key=lambda other: abs(other - frame))
+            return self.by_view[task.get("view")][nearest]
+        return self._total / self._count if self._count else self.default
+
+
+class FakeRenderer:
+    """Sleeps cost(task) seconds and writes a placeholder image file
+
+    fail_every=N makes every Nth render raise, as a crashed Blender would.
+    """
+
+    def __init__(self, cost=lambda task: 0.01, fail_every=0):
+        self.cost = cost
+        self.fail_every = fail_every
+        self.renders = 0
+
+    @classmethod
+    def factory(cls, **options):
+        return lambda slot, threads: cls(**options)
+
+    def render(self, task):
+        self.renders += 1
+        if self.fail_every and self.renders % self.fail_every == 0:
+            raise ConnectionError("fake renderer crashed")
+        time.sleep(self.cost(task))
+        with open(task["output"], "w") as out:
+            out.write("fake render of %s\n" % task["key"])
+        return task["output"]
+
+    def close(self):
+        pass
+
+
+class WorkerRenderer:
+    """One persistent Blender worker that builds the scene once, then renders tasks"""
+
+    def __init__(self, scene_script, port, threads, blender="blender", args=(), samples=None,
+                 resolution=None):
+        self.process, self.client = worker.launch(port, blender)
+        self.render_options = {"samples": samples, "resolution": resolution, "threads": threads,
+                               "engine": 'CYCLES'}
+        self.client.run({"type": "build", "script": scene_script, "args": list(args), "keep": True})
+
+    @classmethod
+    def factory(cls, scene_script, base_port=worker.DEFAULT_PORT + 10, **options):
+        return lambda slot, threads: cls(scene_script, base_port + slot, threads, **options)
+
+    def render(self, task):
+        job = {"type": "render", "output": task["output"], "frame": task.get("frame"),
+               "camera": task.get("camera")}
+        job.update(self.render_options)
+        return self.client.run(job)["output"]
+
+    def close(self):
+        try:
+            self.client.shutdown()
+            self.process.wait(timeout=30)
+        except Exception:
+            self.process.kill()
+
+
+def _load_journal(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path) as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut short by the crash we are resuming from
+                    continue
+                done[entry["key"]] = entry
+    return done
+
+
+class RenderFarm:
+    """Cost-balanced pull scheduler over `workers` renderer slots
+
+    renderer_factory(slot, threads) returns an object with render(task) and
+    close(); threads is the CPU thread count each slot should use.
+    """
+
+    def __init__(self, renderer_factory, workers=None, max_retries=2, cost_model=None):
+        self.renderer_factory = renderer_factory
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 4)
+        self.max_retries = max_retries
+        self.costs = cost_model or CostModel()
+        self._lock = threading.Lock()
+        # pending keys by ascending prediction, valid while costs.version is _ordered
+        self._order = []
+        self._ordered = None
+
+    def _next(self, pending):
+        with self._lock:
+            if not pending:
+                return None
+            if self._ordered != self.costs.version:
+                # reversed, so the first queued of equally costly tasks is popped first
+                self._order = sorted(reversed(list(pending)), key=lambda key: self.costs.predict(pending[key]))
+                self._ordered = self.costs.version
+            while True:
+                key = self._order.pop()
+                if key in pending:
+                    return pending.pop(key)
+
+    def _slot(self, slot, threads, pending, journal, results, attempts):
+        renderer = None
+        busy = 0.0
+        rendered = 0
+        try:
+            while True:
+                task = self._next(pending)
+                if task is None:
+                    break
+                try:
+                    if renderer is None:
+                        renderer = self.renderer_factory(slot, threads)
+                    start = time.perf_counter()
+                    output = renderer.render(task)
+                    seconds = time.perf_counter() - start
+                except Exception as error:
+                    # the renderer is probably dead: replace it and retry the task
+                    if renderer is not None:
+                        renderer.close()
+                        renderer = None
+                    with self._lock:
+                        attempts[task["key"]] = attempts.get(task["key"], 0) + 1
+                        if attempts[task["key"]] <= self.max_retries:
+                            pending[task["key"]] = task
+                            self._ordered = None
+                        else:
+                            results["failed"][task["key"]] = repr(error)
+                    continue
+                entry = {"key": task["key"], "output": output, "seconds": seconds, "slot": slot,
+                         "predicted": self.costs.predict(task)}
+                with self._lock:
+                    self.costs.record(task, seconds)
+                    results["done"][task["key"]] = entry
+                    journal.write(json.dumps(entry) + "\n")
+                    journal.flush()
+                busy += seconds
+                rendered += 1
+        finally:
+            if renderer is not None:
+                renderer.close()
+            with self._lock:
+                results["slots"][slot] = {"busy": busy, "rendered": rendered}
+
+    def run(self, tasks, output_dir):
+        """Render every task not already in the journal; returns a report dict"""
+        os.makedirs(output_dir, exist_ok=True)
+        journal_path = os.path.join(output_dir, JOURNAL)
+        previous = _load_journal(journal_path)
+        for task in tasks:
+            if task["key"] in previous:
+                self.costs.record(task, previous[task["key"]]["seconds"])
+        pending = {task["key"]: task for task in tasks
+                   if task["key"] not in previous or not os.path.exists(previous[task["key"]]["output"])}
+        resumed = len(tasks) - len(pending)
+        results = {"done": {}, "failed": {}, "slots": {}}
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self._ordered = None
+
+        start = time.perf_counter()
+        with open(journal_path, "a") as journal:
+            attempts = {}
+            slots = [threading.Thread(target=self._slot, args=(slot, threads, pending, journal, results, attempts),
+                                      name="render-slot-%d" % slot)
+                     for slot in range(min(self.workers, max(1, len(pending))))]
+            for thread in slots:
+                thread.start()
+            for thread in slots:
+                thread.join()
+        wall = time.perf_counter() - start
+
+        outputs = {key: entry["output"] for key, entry in previous.items()}
+        outputs.update({key: entry["output"] for key, entry in results["done"].items()})
+        with open(os.path.join(output_dir, MANIFEST), "w") as manifest:
+            json.dump({task["key"]: outputs.get(task["key"]) for task in tasks}, manifest, indent=1)
+
+        rendered = len(results["done"])
+        return {
+            "tasks": len(tasks),
+            "resumed": resumed,
+            "rendered": rendered,
+            "failed": results["failed"],
+            "wall_seconds": wall,
+            "frames_per_minute": 60.0 * rendered / wall if wall else 0.0,
+            "slots": results["slots"],
+            "outputs": outputs,
+        }
+
+
+def format_report(report):
+    lines = ["%d tasks: %d rendered, %d resumed, %d failed in %.1f s (%.1f frames/min)" % (
+        report["tasks"], report["rendered"], report["resumed"], len(report["failed"]),
+        report["wall_seconds"], report["frames_per_minute"])]
+    for slot, row in sorted(report["slots"].items()):
+        utilization = row["busy"] / report["wall_seconds"] if report["wall_seconds"] else 0.0
+        lines.append("  slot %d: %4d frames, busy %.1f s (%.0f%%)" % (slot, row["rendered"], row["busy"],
+                                                                     100 * utilization))
+    return "\n".join(lines)
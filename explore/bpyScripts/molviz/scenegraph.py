@@ -0,0 +1,421 @@
+"""Array-backed scene graph with batched transforms, and a BVH for picking (plain NumPy)
+
+Parts used to be moved one object at a time through location and
+rotation_euler, and grouping meant bpy.ops.object.parent_set.  A SceneGraph
+instead keeps every node in parallel arrays:
+
+    parent   (N,) int, -1 for roots; a parent is always added before its children
+    local    (N, 4, 4) transform relative to the parent
+    world    (N, 4, 4) parent's world @ local, refreshed by update()
+    bounds   (N, 2, 3) local-space box (min, max); empty for pure group nodes
+
+Editing a node's local transform marks it dirty.  update() walks the depth
+levels once.  At each level only the nodes under a dirty ancestor are
+recomputed, in one batched matmul, and it returns the nodes that changed
+since the last update().  refresh() does the same work but leaves that
+set for the next update(), for readers that only need current matrices.
+
+    graph = scenegraph.SceneGraph()
+    chain = graph.add()                                          # group node
+    atoms = graph.add_many(scenegraph.translations(coords), parent=chain, bounds=scenegraph.sphere_bounds(radii))
+    graph.transform(chain, scenegraph.rotation((0, 0, 1), 0.3, pivot=center))    # rigid move of the chain
+    changed = graph.update()
+    coords = graph.world[atoms, :3, 3]
+
+BVH indexes the world boxes of the nodes that have geometry.  Its leaves
+are sorted along a Morton curve and held in an implicit balanced binary
+tree (heap layout), so building, refitting and queries are all level by
+level array operations.  refit() moves only the changed leaves and their
+ancestors; rebuild once cost() has grown a lot after large motions.
+
+    bvh = scenegraph.BVH(graph.world_bounds(atoms), atoms)
+    bvh.refit(changed, graph.world_bounds(changed))
+    hit = scenegraph.sphere_intersector(lambda ids: graph.world[ids, :3, 3], lambda ids: radius_of_node[ids])
+    node, t = bvh.pick(*scenegraph.camera_ray(camera, (x, y)), intersect=hit)
+    seen = bvh.frustum(scenegraph.frustum_planes(camera))
+
+scenegraphscene binds nodes to Blender objects.
+"""
+import numpy as np
+
+EMPTY_BOUNDS = np.array([[np.inf] * 3, [-np.inf] * 3])
+
+
+def translations(offsets):
+    """(N, 4, 4) translation matrices"""
+    offsets = np.asarray(offsets, dtype=np.float64).reshape(-1, 3)
+    matrices = np.broadcast_to(np.eye(4), (len(offsets), 4, 4)).copy()
+    matrices[:, :3, 3] = offsets
+    return matrices
+
+
+def rotation(axis, angle, pivot=None):
+    """4x4 rotation by angle (radians) about axis, through pivot (default the origin)"""
+    axis = np.asarray(axis, dtype=np.float64)
+    x, y, z = axis / np.linalg.norm(axis)
+    c, s = np.cos(angle), np.sin(angle)
+    matrix = np.eye(4)
+    matrix[:3, :3] = [[c + x * x * (1 - c), x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+                      [y * x * (1 - c) + z * s, c + y * y * (1 - c), y * z * (1 - c) - x * s],
+                      [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, c + z * z * (1 - c)]]
+    if pivot is not None:
+        pivot = np.asarray(pivot, dtype=np.float64)
+        matrix[:3, 3] = pivot - matrix[:3, :3] @ pivot
+    return matrix
+
+
+def sphere_bounds(radii, count=None):
+    """(N, 2, 3) local boxes of spheres centred on their node"""
+    radii = np.asarray(radii, dtype=np.float64)
+    if count is not None:
+        radii = np.broadcast_to(radii, (count,))
+    radii = radii.reshape(-1, 1)
+    return np.stack([-np.repeat(radii, 3, axis=1), np.repeat(radii, 3, axis=1)], axis=1)
+
+
+def transform_bounds(matrices, bounds):
+    """World boxes of local boxes under (N, 4, 4) matrices (center / half-extent form)"""
+    empty = np.any(bounds[:, 0] > bounds[:, 1], axis=1)
+    bounds = np.where(empty[:, None, None], 0.0, bounds)
+    center = (bounds[:, 0] + bounds[:, 1]) / 2.0
+    half = (bounds[:, 1] - bounds[:, 0]) / 2.0
+    center = np.einsum("nij,nj->ni", matrices[:, :3, :3], center) + matrices[:, :3, 3]
+    half = np.einsum("nij,nj->ni", np.abs(matrices[:, :3, :3]), half)
+    world = np.stack([center - half, center + half], axis=1)
+    world[empty] = EMPTY_BOUNDS
+    return world
+
+
+class SceneGraph:
+    """Nodes as parallel arrays (see the module docstring); indices are stable, nodes are never removed"""
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self._parent = np.empty(capacity, dtype=np.int64)
+        self._depth = np.empty(capacity, dtype=np.int64)
+        self._local = np.empty((capacity, 4, 4))
+        self._world = np.empty((capacity, 4, 4))
+        self._bounds = np.empty((capacity, 2, 3))
+        self._dirty = np.zeros(capacity, dtype=bool)
+        self._changed = np.zeros(capacity, dtype=bool)
+        self._levels = None
+        self.names = []
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return "<SceneGraph %d nodes, %d levels>" % (self.size, len(self.levels()))
+
+    parent = property(lambda self: self._parent[:self.size])
+    depth = property(lambda self: self._depth[:self.size])
+    local = property(lambda self: self._local[:self.size])
+    world = property(lambda self: self._world[:self.size])
+    bounds = property(lambda self: self._bounds[:self.size])
+
+    def _grow(self, needed):
+        capacity = len(self._parent)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        for name in ("_parent", "_depth", "_local", "_world", "_bounds", "_dirty", "_changed"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add_many(self, local=None, parent=-1, bounds=None, names=None, count=None):
+        """Append nodes in one go; parent is one index or one per node.  Returns their indices"""
+        if local is not None:
+            local = np.asarray(local, dtype=np.float64).reshape(-1, 4, 4)
+            count = len(local)
+        elif count is None:
+            count = 1 if np.ndim(parent) == 0 else len(parent)
+        parent = np.broadcast_to(np.asarray(parent, dtype=np.int64), (count,))
+        if np.any(parent >= self.size) or np.any(parent < -1):
+            raise IndexError("parents must be existing nodes (or -1)")
+        start = self.size
+        self._grow(start + count)
+        nodes = np.arange(start, start + count)
+        self._parent[nodes] = parent
+        self._depth[nodes] = np.where(parent < 0, 0, self._depth[np.maximum(parent, 0)] + 1)
+        self._local[nodes] = np.eye(4) if local is None else local
+        self._bounds[nodes] = EMPTY_BOUNDS if bounds is None else np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 3)
+        self._dirty[nodes] = True
+        self.names.extend([None] * count if names is None else names)
+        self.size += count
+        self._levels = None
+        return nodes
+
+    def add(self, local=None, parent=-1, bounds=None, name=None):
+        """Append one node; returns its index"""
+        return int(self.add_many(None if local is None else [local], parent, None if bounds is None else [bounds],
+                                 [name], count=1)[0])
+
+    def levels(self):
+        """Node indices grouped by depth, roots first"""
+        if self._levels is None:
+            order = np.argsort(self.depth, kind="stable")
+            counts = np.bincount(self.depth) if self.size else np.zeros(0, np.int64)
+            self._levels = np.split(order, np.cumsum(counts)[:-1])
+        return self._levels
+
+    def children(self, nodes):
+        """Direct children of nodes"""
+        return np.flatnonzero(np.isin(self.parent, nodes))
+
+    def subtree(self, nodes):
+        """nodes and all their descendants"""
+        inside = np.zeros(self.size, dtype=bool)
+        inside[nodes] = True
+        for level in self.levels()[1:]:
+            inside[level] |= inside[self.parent[level]]
+        return np.flatnonzero(inside)
+
+    def set_local(self, nodes, matrices):
+        self._local[nodes] = matrices
+        self._dirty[nodes] = True
+
+    def translate(self, nodes, offset):
+        """Move nodes by offset in their parent's space"""
+        self._local[nodes, :3, 3] += offset
+        self._dirty[nodes] = True
+
+    def transform(self, nodes, matrix, space="parent"):
+        """Apply matrix to nodes: in their parent's space, or in world space (space="world")"""
+        nodes = np.atleast_1d(nodes)
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if space == "world":
+            self.refresh()
+            parent = self.parent[nodes]
+            parent_world = np.where((parent >= 0)[:, None, None], self._world[np.maximum(parent, 0)], np.eye(4))
+            matrix = np.linalg.inv(parent_world) @ matrix @ parent_world
+        elif space != "parent":
+            raise ValueError("space must be 'parent' or 'world', not %r" % space)
+        self._local[nodes] = matrix @ self._local[nodes]
+        self._dirty[nodes] = True
+
+    def update(self):
+        """Recompute world matrices under dirty nodes, one batched matmul per level
+
+        Returns the nodes whose world matrix changed since the last update().
+        """
+        self.refresh()
+        changed = np.flatnonzero(self._changed[:self.size])
+        self._changed[:self.size] = False
+        return changed
+
+    def refresh(self):
+        """Bring world matrices up to date without consuming the changed set update() returns"""
+        if not self._dirty[:self.size].any():
+            return
+        dirty = self._dirty[:self.size]
+        levels = self.levels()
+        roots = levels[0][dirty[levels[0]]]
+        self._world[roots] = self._local[roots]
+        for level in levels[1:]:
+            parent = self._parent[level]
+            dirty[level] |= dirty[parent]
+            nodes = level[dirty[level]]
+            if len(nodes):
+                self._world[nodes] = self._world[self._parent[nodes]] @ self._local[nodes]
+        self._changed[:self.size] |= dirty
+        dirty[:] = False
+
+    def world_bounds(self, nodes=None):
+        """World boxes of nodes (all by default) from their local bounds"""
+        nodes = np.arange(self.size) if nodes is None else np.atleast_1d(nodes)
+        return transform_bounds(self._world[nodes], self._bounds[nodes])
+
+
+def _morton(points):
+    """30-bit Morton codes of points normalised to their bounding box"""
+    low, high = points.min(axis=0), points.max(axis=0)
+    cells = ((points - low) / np.maximum(high - low, 1e-12) * 1023).astype(np.uint64)
+    code = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            code |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return code
+
+
+def _surface(low, high):
+    extent = np.maximum(high - low, 0.0)
+    return 2.0 * (extent[:, 0] * extent[:, 1] + extent[:, 1] * extent[:, 2] + extent[:, 2] * extent[:, 0])
+
+
+class BVH:
+    """Bounding-volume hierarchy over world boxes, leaf i standing for ids[i]
+
+    Node k has children 2k + 1 and 2k + 2; the leaves are the last `leaves`
+    nodes, padded to a power of two with empty boxes.
+    """
+
+    def __init__(self, bounds, ids=None):
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 3)
+        ids = np.arange(len(bounds)) if ids is None else np.asarray(ids, dtype=np.int64)
+        keep = np.all(bounds[:, 0] <= bounds[:, 1], axis=1)
+        bounds, ids = bounds[keep], ids[keep]
+        order = np.argsort(_morton((bounds[:, 0] + bounds[:, 1]) / 2.0), kind="stable") if len(ids) else ids
+        self.ids = ids[order]
+        self.leaves = 1 << max(0, int(np.ceil(np.log2(max(len(ids), 1)))))
+        self.first_leaf = self.leaves - 1
+        self.low = np.full((2 * self.leaves - 1, 3), np.inf)
+        self.high = np.full((2 * self.leaves - 1, 3), -np.inf)
+        self.low[self.first_leaf:self.first_leaf + len(ids)] = bounds[order, 0]
+        self.high[self.first_leaf:self.first_leaf + len(ids)] = bounds[order, 1]
+        self.slot = np.full(ids.max() + 1 if len(ids) else 0, -1, dtype=np.int64)
+        self.slot[self.ids] = np.arange(len(ids))
+        # internal nodes bottom up, one level at a time
+        first = self.first_leaf
+        while first > 0:
+            parents = np.arange((first - 1) // 2, first)
+            self._merge(parents)
+            first = (first - 1) // 2
+        self.built_cost = self.cost()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _merge(self, nodes):
+        self.low[nodes] = np.minimum(self.low[2 * nodes + 1], self.low[2 * nodes + 2])
+        self.high[nodes] = np.maximum(self.high[2 * nodes + 1], self.high[2 * nodes + 2])
+
+    def refit(self, ids, bounds):
+        """Replace the boxes of ids and re-merge only their ancestors; returns how many nodes were touched"""
+        ids = np.atleast_1d(ids)
+        inside = ids < len(self.slot)
+        slots = np.full(len(ids), -1)
+        slots[inside] = self.slot[ids[inside]]
+        present = slots >= 0
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2, 3)[present]
+        nodes = self.first_leaf + slots[present]
+        self.low[nodes], self.high[nodes] = bounds[:, 0], bounds[:, 1]
+        touched = len(nodes)
+        while len(nodes) and nodes[0] > 0:
+            nodes = np.unique((nodes - 1) // 2)
+            self._merge(nodes)
+            touched += len(nodes)
+        return touched
+
+    def cost(self):
+        """Internal surface area over the root's; grows as refits loosen the tree, rebuild past ~2x built_cost"""
+        root = _surface(self.low[:1], self.high[:1])[0]
+        internal = _surface(self.low[:self.first_leaf], self.high[:self.first_leaf])
+        return float(internal.sum() / root) if root > 0 else 0.0
+
+    def _leaves(self, test):
+        """ids and per-leaf values of leaves reached through nodes where test(nodes) holds"""
+        nodes = np.zeros(1, dtype=np.int64)
+        while True:
+            hit, value = test(nodes)
+            nodes, value = nodes[hit], value[hit]
+            if not len(nodes) or nodes[0] >= self.first_leaf:
+                slots = nodes - self.first_leaf
+                return self.ids[slots], value
+            nodes = np.stack([2 * nodes + 1, 2 * nodes + 2], axis=1).ravel()
+
+    def ray(self, origin, direction, max_t=np.inf):
+        """ids whose boxes the ray enters before max_t, nearest entry first, and their entry distances"""
+        origin = np.asarray(origin, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = 1.0 / np.asarray(direction, dtype=np.float64)
+
+            def test(nodes):
+                a = (self.low[nodes] - origin) * inverse
+                b = (self.high[nodes] - origin) * inverse
+                near = np.nanmax(np.fmin(a, b), axis=1)
+                far = np.nanmin(np.fmax(a, b), axis=1)
+                valid = np.all(self.low[nodes] <= self.high[nodes], axis=1)
+                return valid & (near <= far) & (far >= 0) & (near <= max_t), np.maximum(near, 0.0)
+
+            ids, near = self._leaves(test)
+        order = np.argsort(near, kind="stable")
+        return ids[order], near[order]
+
+    def pick(self, origin, direction, intersect=None, max_t=np.inf):
+        """(id, distance) of the first thing the ray hits, (-1, inf) for none
+
+        intersect(ids, origin, direction) returns exact distances (inf for a
+        miss) for candidates whose boxes the ray enters; without it the box
+        entry distance counts as the hit.
+        """
+        ids, near = self.ray(origin, direction, max_t)
+        if not len(ids):
+            return -1, np.inf
+        if intersect is None:
+            return int(ids[0]), float(near[0])
+        exact = np.asarray(intersect(ids, np.asarray(origin, float), np.asarray(direction, float)), dtype=float)
+        best = int(np.argmin(exact))
+        return (int(ids[best]), float(exact[best])) if np.isfinite(exact[best]) else (-1, np.inf)
+
+    def frustum(self, planes):
+        """ids whose boxes are not entirely outside any plane (rows a, b, c, d: inside where ax + by + cz + d >= 0)"""
+        planes = np.asarray(planes, dtype=np.float64).reshape(-1, 4)
+        normals, offsets = planes[:, :3], planes[:, 3]
+
+        def test(nodes):
+            # the box corner farthest along each plane's normal
+            corner = np.where(normals[None, :, :] > 0, self.high[nodes][:, None, :], self.low[nodes][:, None, :])
+            inside = np.all(np.einsum("npk,pk->np", corner, normals) + offsets >= 0, axis=1)
+            return inside & np.all(self.low[nodes] <= self.high[nodes], axis=1), np.zeros(len(nodes))
+
+        return self._leaves(test)[0]
+
+
+def sphere_intersector(centers_of, radii_of):
+    """intersect() for BVH.pick over spheres: centers_of(ids) -> (K, 3), radii_of(ids) -> (K,)"""
+
+    def intersect(ids, origin, direction):
+        direction = direction / np.linalg.norm(direction)
+        offset = centers_of(ids) - origin
+        along = offset @ direction
+        gap2 = np.einsum("ij,ij->i", offset, offset) - along * along
+        radii = radii_of(ids)
+        half = np.sqrt(np.maximum(radii * radii - gap2, 0.0))
+        t = np.where(along - half >= 0, along - half, along + half)
+        return np.where((gap2 <= radii * radii) & (t >= 0), t, np.inf)
+
+    return intersect
+
+
+def _camera_axes(camera):
+    matrix = camera.matrix_world
+    return matrix[:3, :3] / np.linalg.norm(matrix[:3, :3], axis=0), matrix[:3, 3]
+
+
+def _half_extents(camera):
+    """Half width and height of the image plane at distance 1 (or, orthographic, in world units)"""
+    width, height = camera.resolution
+    size = max(width, height)
+    half = camera.ortho_scale / 2.0 if camera.ortho_scale is not None else np.tan(camera.fov / 2.0)
+    return half * width / size, half * height / size
+
+
+def camera_ray(camera, pixel):
+    """World (origin, direction) of the ray through pixel (x, y), origin at the image's bottom left"""
+    axes, location = _camera_axes(camera)
+    half_x, half_y = _half_extents(camera)
+    x = (2.0 * (pixel[0] + 0.5) / camera.resolution[0] - 1.0) * half_x
+    y = (2.0 * (pixel[1] + 0.5) / camera.resolution[1] - 1.0) * half_y
+    if camera.ortho_scale is not None:
+        return location + axes @ [x, y, 0.0], -axes[:, 2]
+    direction = axes @ [x, y, -1.0]
+    return location, direction / np.linalg.norm(direction)
+
+
+def frustum_planes(camera, near=0.1, far=None):
+    """(K, 4) world planes bounding what camera (a lod.Camera) sees; inside is >= 0"""
+    axes, location = _camera_axes(camera)
+    half_x, half_y = _half_extents(camera)
+    if camera.ortho_scale is not None:
+        local = [(1, 0, 0, half_x), (-1, 0, 0, half_x), (0, 1, 0, half_y), (0, -1, 0, half_y)]
+    else:
+        # x >= half_x * z and friends, with the camera looking down -z
+        local = [(1, 0, -half_x, 0), (-1, 0, -half_x, 0), (0, 1, -half_y, 0), (0, -1, -half_y, 0)]
+    local.append((0, 0, -1, -near))
+    if far is not None:
+        local.append((0, 0, 1, far))
+    local = np.array(local, dtype=np.float64)
+    normals = local[:, :3] @ axes.T
+    return np.column_stack([normals, local[:, 3] - normals @ location])
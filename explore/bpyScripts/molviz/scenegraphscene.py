@@ -0,0 +1,74 @@
+"""Drive Blender objects from a scenegraph.SceneGraph and pick them under the camera
+
+Objects become graph nodes that carry their matrix_world and bound_box.
+Groups are plain nodes with no object, so moving a group is one batched
+update instead of bpy.ops.object.parent_set plus per-object edits.  apply()
+writes back only the objects whose world matrix changed since the last
+apply(), refits a BVH to them if given one, and returns those nodes; the
+other helpers leave that set alone.
+
+    graph = scenegraph.SceneGraph()
+    body = graph.add(name=None)
+    scenegraphscene.add_objects(graph, snowballs, parent=body)
+    bvh = scenegraphscene.bvh(graph)
+    graph.transform(body, scenegraph.rotation((0, 0, 1), 0.5, pivot=(0, 0, 0)))
+    scenegraphscene.apply(graph, tree=bvh)
+    obj = scenegraphscene.pick(graph, bvh, (960, 540))
+"""
+import bpy
+import numpy as np
+
+from molviz import lodscene, profiling, scenegraph
+
+
+def add_objects(graph, objects, parent=-1):
+    """One node per object, its current world matrix made relative to parent; returns the nodes"""
+    objects = list(objects)
+    world = np.array([np.array(obj.matrix_world) for obj in objects]).reshape(-1, 4, 4)
+    if parent >= 0:
+        graph.refresh()
+        world = np.linalg.inv(graph.world[parent]) @ world
+    corners = np.array([np.array(obj.bound_box, dtype=np.float64) for obj in objects]).reshape(-1, 8, 3)
+    bounds = np.stack([corners.min(axis=1), corners.max(axis=1)], axis=1)
+    return graph.add_many(world, parent=parent, bounds=bounds, names=[obj.name for obj in objects])
+
+
+@profiling.profile
+def apply(graph, nodes=None, tree=None):
+    """Update graph and write matrix_world of the changed (or the given) nodes that name an object
+
+    Returns the nodes update() reported changed; tree, a BVH from bvh(), is
+    refit to their new world boxes.
+    """
+    changed = graph.update()
+    if tree is not None:
+        tree.refit(changed, graph.world_bounds(changed))
+    for node in changed if nodes is None else np.atleast_1d(nodes):
+        name = graph.names[node]
+        obj = bpy.data.objects.get(name) if name is not None else None
+        if obj is not None:
+            obj.matrix_world = graph.world[node].tolist()
+    return changed
+
+
+def bvh(graph):
+    """scenegraph.BVH over the world boxes of the nodes that have bounds"""
+    graph.refresh()
+    nodes = np.flatnonzero(np.all(graph.bounds[:, 0] <= graph.bounds[:, 1], axis=1))
+    return scenegraph.BVH(graph.world_bounds(nodes), nodes)
+
+
+def pick(graph, tree, pixel, scene=None, intersect=None):
+    """The object under pixel (x, y from the bottom left) of the scene camera, or None"""
+    origin, direction = scenegraph.camera_ray(lodscene.camera_from_scene(scene), pixel)
+    node, _ = tree.pick(origin, direction, intersect)
+    if node < 0 or graph.names[node] is None:
+        return None
+    return bpy.data.objects.get(graph.names[node])
+
+
+def in_view(graph, tree, scene=None, far=None):
+    """Objects whose world boxes intersect the scene camera's frustum"""
+    planes = scenegraph.frustum_planes(lodscene.camera_from_scene(scene), far=far)
+    names = (graph.names[node] for node in tree.frustum(planes))
+    return [bpy.data.objects[name] for name in names if name is not None and name in bpy.data.objects]
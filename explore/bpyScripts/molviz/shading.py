@@ -0,0 +1,160 @@
+"""Per-instance color, roughness and emission through one shared shader
+
+Coloring by element, chain or b-factor used to mean one material per
+distinct color.  Here every object shares one material per attribute type
+(materials.attribute_shader), and the values live on the geometry:
+
+    GEOMETRY    point (or face) attributes of a mesh: sticks, merged meshes
+    INSTANCER   point attributes of an instance-on-points source (pointcloud)
+    OBJECT      Object.color plus "roughness"/"emission" custom properties,
+                for linked duplicates and single objects
+
+Recoloring a point cloud of any size is then one foreach_set per
+attribute, and no material is created or relinked:
+
+    atoms = pointcloud.build_atoms(centers, radii, colors)
+    shading.write(atoms.data, colors=by_chain, emission=np.where(selected, 2.0, 0.0))
+
+    shading.assign(snowball, 'OBJECT')
+    shading.write_objects([snowball], colors=(0.98, 0.98, 1.0), roughness=0.3)
+"""
+import numpy as np
+
+from molviz import materials
+
+COLOR = "color"
+ROUGHNESS = "roughness"
+EMISSION = "emission"
+DEFAULT_COLOR = (0.8, 0.8, 0.8, 1.0)
+DEFAULT_ROUGHNESS = 0.5
+NAMES = {'GEOMETRY': "AttributeShader", 'INSTANCER': "InstanceShader", 'OBJECT': "ObjectShader"}
+
+
+def shader(attribute_type='GEOMETRY'):
+    """The one shared material reading attributes of the given type"""
+    return materials.attribute_shader(NAMES[attribute_type], attribute_type)
+
+
+def attribute_type(mat):
+    """The attribute type a shared shader reads, or None for any other material"""
+    if mat is None:
+        return None
+    return mat.get(materials.ATTRIBUTE_TYPE_PROPERTY)
+
+
+def assign(obj, attribute_type='OBJECT'):
+    """Put the shared shader in the object's first slot (on its mesh, so duplicates share it)"""
+    return materials.assign(obj, shader(attribute_type))
+
+
+def _rgba(colors, count):
+    colors = np.asarray(colors, dtype=np.float32)
+    colors = np.broadcast_to(colors, (count, colors.shape[-1]))
+    if colors.shape[-1] == 3:
+        colors = np.column_stack([colors, np.ones(count, dtype=np.float32)])
+    return np.ascontiguousarray(colors, dtype=np.float32)
+
+
+def _attribute(mesh, name, data_type, domain):
+    attribute = mesh.attributes.get(name)
+    if attribute is not None and (attribute.data_type != data_type or attribute.domain != domain):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.attributes.new(name, data_type, domain)
+    return attribute
+
+
+def write(mesh, colors=None, roughness=None, emission=None, domain='POINT'):
+    """Write per-point (or per-face) values in one foreach_set each
+
+    Arguments left as None keep their current values.  Attributes the mesh
+    does not have yet are created with defaults, so the shader never reads
+    an absent (zero) roughness.
+    """
+    count = len(mesh.vertices) if domain == 'POINT' else len(mesh.polygons)
+    if colors is not None or mesh.attributes.get(COLOR) is None:
+        values = _rgba(DEFAULT_COLOR if colors is None else colors, count)
+        _attribute(mesh, COLOR, 'FLOAT_COLOR', domain).data.foreach_set("color", values.ravel())
+    for name, values, default in ((ROUGHNESS, roughness, DEFAULT_ROUGHNESS), (EMISSION, emission, 0.0)):
+        if values is None and mesh.attributes.get(name) is not None:
+            continue
+        values = np.broadcast_to(np.asarray(default if values is None else values, dtype=np.float32), (count,))
+        _attribute(mesh, name, 'FLOAT', domain).data.foreach_set("value", np.ascontiguousarray(values))
+    mesh.update()
+
+
+def read(mesh):
+    """(colors, roughness, emission) arrays of a mesh written by write()"""
+    colors = roughness = emission = None
+    attribute = mesh.attributes.get(COLOR)
+    if attribute is not None:
+        colors = np.empty(len(attribute.data) * 4, dtype=np.float32)
+        attribute.data.foreach_get("color", colors)
+        colors = colors.reshape(-1, 4)
+    for name in (ROUGHNESS, EMISSION):
+        attribute = mesh.attributes.get(name)
+        if attribute is not None:
+            values = np.empty(len(attribute.data), dtype=np.float32)
+            attribute.data.foreach_get("value", values)
+            if name == ROUGHNESS:
+                roughness = values
+            else:
+                emission = values
+    return colors, roughness, emission
+
+
+def write_objects(objects, colors=None, roughness=None, emission=None):
+    """Set per-object values read by the OBJECT shader (colors broadcast like write())"""
+    count = len(objects)
+    colors = None if colors is None else _rgba(colors, count)
+    if roughness is not None:
+        roughness = np.broadcast_to(np.asarray(roughness, dtype=np.float32), (count,))
+    if emission is not None:
+        emission = np.broadcast_to(np.asarray(emission, dtype=np.float32), (count,))
+    for index, obj in enumerate(objects):
+        if colors is not None:
+            obj.color = colors[index]
+        if roughness is not None or ROUGHNESS not in obj:
+            obj[ROUGHNESS] = float(DEFAULT_ROUGHNESS if roughness is None else roughness[index])
+        if emission is not None or EMISSION not in obj:
+            obj[EMISSION] = float(0.0 if emission is None else emission[index])
+
+
+def object_values(obj):
+    """(rgba, roughness, emission) of an object shaded by the OBJECT shader"""
+    return tuple(obj.color), obj.get(ROUGHNESS, DEFAULT_ROUGHNESS), obj.get(EMISSION, 0.0)
+
+
+def _part_values(obj, vertex_count):
+    """Per-vertex (colors, roughness, emission) of one object about to be merged"""
+    if any(attribute_type(slot.material) == 'OBJECT' for slot in obj.material_slots):
+        color, roughness, emission = object_values(obj)
+        return (np.tile(np.asarray(color, dtype=np.float32), (vertex_count, 1)),
+                np.full(vertex_count, roughness, dtype=np.float32), np.full(vertex_count, emission, dtype=np.float32))
+    colors, roughness, emission = read(obj.data)
+    # attributes only carry over when the evaluated mesh still matches the original
+    if colors is None or len(colors) != vertex_count:
+        colors = _rgba(DEFAULT_COLOR, vertex_count)
+    if roughness is None or len(roughness) != vertex_count:
+        roughness = np.full(vertex_count, DEFAULT_ROUGHNESS, dtype=np.float32)
+    if emission is None or len(emission) != vertex_count:
+        emission = np.zeros(vertex_count, dtype=np.float32)
+    return colors, roughness, emission
+
+
+def bake_parts(mesh, objects, vertex_counts):
+    """Carry shading values of objects into point attributes of the mesh merged from them
+
+    vertex_counts[i] is how many of the mesh's vertices came from objects[i],
+    in order.  OBJECT shaders in the mesh's slots become the GEOMETRY one.
+    Meshes without a shared shader are left alone; returns whether any was.
+    """
+    if not any(attribute_type(mat) in ('OBJECT', 'GEOMETRY') for mat in mesh.materials):
+        return False
+    values = [_part_values(obj, count) for obj, count in zip(objects, vertex_counts)]
+    write(mesh, *(np.concatenate([value[field] for value in values]) for field in range(3)))
+    for index, mat in enumerate(mesh.materials):
+        if attribute_type(mat) == 'OBJECT':
+            mesh.materials[index] = shader('GEOMETRY')
+    return True
@@ -0,0 +1,316 @@
+"""Molecular surfaces (van der Waals, SAS, SES) from chunked distance grids (plain NumPy)
+
+The scene is covered by a grid of spacing h, processed in cubic chunks of
+chunk_size cells.  For each chunk, only the atoms within reach of it are
+fetched from a neighbors.CellGrid.  They are splatted into a clipped signed
+distance field:
+
+    vdw/sas    F(x) = min_i |x - c_i| - (r_i + probe)        probe = 0 for vdw
+    ses        F(x) = max(F_sas(x), probe - D(x))
+
+D is the distance to the SAS surface.  It is sampled by the SAS isosurface
+vertices of the same chunk, extended by a margin so the result needs nothing
+from neighbouring chunks.  Marching cubes then runs on each chunk.  Every
+vertex is keyed by the global grid edge it lies on, and chunks share their
+boundary samples, so equal keys give equal positions.  Merging the chunks by
+key makes one closed mesh with no seams.
+
+Chunks are independent.  With workers > 1 they run in a process pool,
+otherwise in order in this process.
+
+    arrays = surface.molecular_surface(atoms.coords, atoms.radii(), kind="ses", spacing=0.8)
+    mesh = meshbuild.mesh_from_arrays("SES", arrays["verts"], arrays["loops"], arrays["face_sizes"])
+
+The triangle table is derived at import, not typed in.  On every cube face
+the crossing points are joined so that the inside corners are separated,
+and the segments are chained into loops and fanned into triangles.  The
+ambiguous faces get the same resolution from both cubes that share them.
+"""
+import concurrent.futures
+import os
+
+import numpy as np
+
+from molviz import neighbors, profiling
+
+PROBE = 1.4
+CHUNK_SIZE = 48
+BATCH = 4096
+
+# --- marching cubes table ----------------------------------------------------
+
+# corner c sits at (c & 1, c >> 1 & 1, c >> 2 & 1)
+CORNERS = np.array([(c & 1, c >> 1 & 1, c >> 2 & 1) for c in range(8)])
+# edge (axis, other two coordinates) -> its two corners, low end first
+EDGES = []
+for _axis in range(3):
+    for _other in range(4):
+        _start = [0, 0, 0]
+        _start[(_axis + 1) % 3] = _other & 1
+        _start[(_axis + 2) % 3] = _other >> 1
+        _end = list(_start)
+        _end[_axis] = 1
+        EDGES.append((_axis, tuple(_start), tuple(_end)))
+_CORNER_INDEX = {tuple(corner): index for index, corner in enumerate(CORNERS.tolist())}
+_EDGE_INDEX = {}
+for _index, (_axis, _start, _end) in enumerate(EDGES):
+    _EDGE_INDEX[frozenset((_CORNER_INDEX[_start], _CORNER_INDEX[_end]))] = _index
+EDGE_AXIS = np.array([edge[0] for edge in EDGES])
+EDGE_START = np.array([edge[1] for edge in EDGES])
+
+
+def _faces():
+    """The six cube faces as corner cycles, counterclockwise seen from outside"""
+    faces = []
+    for axis in range(3):
+        u, v = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0, 1):
+            cycle = []
+            for a, b in ((0, 0), (1, 0), (1, 1), (0, 1)):
+                corner = [0, 0, 0]
+                corner[axis], corner[u], corner[v] = side, a, b
+                cycle.append(_CORNER_INDEX[tuple(corner)])
+            faces.append(cycle if side else cycle[::-1])
+    return faces
+
+
+def _case_triangles(case):
+    inside = [bool(case >> corner & 1) for corner in range(8)]
+    following = {}
+    for cycle in _faces():
+        edges = [_EDGE_INDEX[frozenset((cycle[k], cycle[(k + 1) % 4]))] for k in range(4)]
+        enter = [k for k in range(4) if not inside[cycle[k]] and inside[cycle[(k + 1) % 4]]]
+        for k in enter:
+            # walk the run of inside corners to where it is left again
+            end = (k + 1) % 4
+            while inside[cycle[(end + 1) % 4]]:
+                end = (end + 1) % 4
+            following[edges[k]] = edges[end]
+    triangles = []
+    while following:
+        start, point = following.popitem()
+        loop = [start]
+        while point != start:
+            loop.append(point)
+            point = following.pop(point)
+        triangles.extend((loop[0], loop[i], loop[i + 1]) for i in range(1, len(loop) - 1))
+    return triangles
+
+
+def _table():
+    cases = [_case_triangles(case) for case in range(256)]
+    table = np.full((256, max(len(case) for case in cases), 3), -1, dtype=np.int64)
+    for case, triangles in enumerate(cases):
+        if triangles:
+            # loops run counterclockwise seen from outside, so the normals face outward
+            table[case, :len(triangles)] = triangles
+    return table, np.array([len(case) for case in cases])
+
+
+TRIANGLES, TRIANGLE_COUNTS = _table()
+
+
+def marching_cubes(field, origin_index=(0, 0, 0), dims=None, level=0.0):
+    """Triangles of the level set of field (inside is below level)
+
+    field holds samples at grid indices origin_index + (i, j, k).  Returns
+    (keys, fractions, triangles): one global edge key per vertex (an
+    int64 of the edge's low sample and axis in a grid of dims samples),
+    how far along the edge it sits, and (T, 3) vertex indices.
+    """
+    field = np.asarray(field)
+    inside = field < level
+    nx, ny, nz = (size - 1 for size in field.shape)
+    case = np.zeros((nx, ny, nz), dtype=np.uint8)
+    for corner, (x, y, z) in enumerate(CORNERS):
+        case |= inside[x:x + nx, y:y + ny, z:z + nz].astype(np.uint8) << corner
+    cubes = np.flatnonzero(TRIANGLE_COUNTS[case.ravel()])
+    if not len(cubes):
+        return np.zeros(0, np.int64), np.zeros(0), np.zeros((0, 3), np.int64)
+    cases = case.ravel()[cubes]
+    counts = TRIANGLE_COUNTS[cases]
+    owner = np.repeat(np.arange(len(cubes)), counts)
+    slot = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    edges = TRIANGLES[cases[owner], slot]                                   # (T, 3)
+    cube_index = np.stack(np.unravel_index(cubes[owner], (nx, ny, nz)), axis=1)
+
+    start = cube_index[:, None, :] + EDGE_START[edges]                      # (T, 3, 3) local
+    axis = EDGE_AXIS[edges]
+    end = start + np.eye(3, dtype=np.int64)[axis]
+    low = field[start[..., 0], start[..., 1], start[..., 2]]
+    high = field[end[..., 0], end[..., 1], end[..., 2]]
+    fraction = (level - low) / (high - low)
+
+    dims = np.asarray(field.shape if dims is None else dims, dtype=np.int64)
+    sample = start + np.asarray(origin_index, dtype=np.int64)
+    keys = ((sample[..., 0] * dims[1] + sample[..., 1]) * dims[2] + sample[..., 2]) * 3 + axis
+    unique, first, inverse = np.unique(keys.ravel(), return_index=True, return_inverse=True)
+    return unique, fraction.ravel()[first], inverse.reshape(-1, 3)
+
+
+def key_positions(keys, fractions, origin, spacing, dims):
+    """World positions of vertices given by global edge keys"""
+    axis = keys % 3
+    sample = np.stack(np.unravel_index(keys // 3, tuple(dims)), axis=1).astype(np.float64)
+    sample[np.arange(len(keys)), axis] += fractions
+    return np.asarray(origin) + spacing * sample
+
+
+# --- distance fields ---------------------------------------------------------
+
+def _stencil(reach, spacing):
+    """Integer offsets within reach of a sample, plus the half cell diagonal a point is rounded by"""
+    n = int(np.ceil(reach / spacing)) + 1
+    span = np.arange(-n, n + 1)
+    offsets = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape(-1, 3)
+    return offsets[np.linalg.norm(offsets, axis=1) <= reach / spacing + 0.5 * np.sqrt(3.0)]
+
+
+def splat(shape, origin, spacing, points, radii, band, owners=False):
+    """min_i (|x - p_i| - r_i) at the samples origin + spacing * index, clipped to [-band, band]
+
+    With owners=True also returns, per sample, the i attaining the minimum
+    (-1 farther than band from every point).
+    """
+    size = int(np.prod(shape))
+    field = np.full(size, band, dtype=np.float32)
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(points),))
+    shape = tuple(int(n) for n in shape)
+    splats = []
+    if len(points):
+        offsets = _stencil(radii.max() + band, spacing)
+        steps = spacing * offsets.astype(np.float64)
+        step2 = np.einsum("ij,ij->i", steps, steps)
+        for lo in range(0, len(points), BATCH):
+            p = points[lo:lo + BATCH]
+            base = np.round((p - origin) / spacing).astype(np.int64)
+            # |x - p|^2 for x = (origin + spacing * base - p) + step, expanded so the (B, S) part is one matmul
+            near = origin + spacing * base - p
+            distance2 = near @ (2.0 * steps.T)
+            distance2 += step2
+            distance2 += np.einsum("ij,ij->i", near, near)[:, None]
+            reach = radii[lo:lo + BATCH] + band
+            point, stencil = np.nonzero(distance2 < (reach * reach)[:, None])
+            sample = base[point] + offsets[stencil]
+            inside = np.all((sample >= 0) & (sample < shape), axis=1)
+            point, stencil, sample = point[inside], stencil[inside], sample[inside]
+            flat = np.ravel_multi_index(tuple(sample.T), shape)
+            value = np.sqrt(np.maximum(distance2[point, stencil], 0.0)) - radii[lo + point]
+            value = np.maximum(value, -band).astype(np.float32)
+            np.minimum.at(field, flat, value)
+            if owners:
+                splats.append((flat, value, lo + point))
+    if not owners:
+        return field.reshape(shape)
+    owner = np.full(size, -1, dtype=np.int64)
+    for flat, value, point in splats:
+        wins = value == field[flat]
+        owner[flat[wins]] = point[wins]
+    return field.reshape(shape), owner.reshape(shape)
+
+
+def _vertex_samples(keys, fractions, lo, dims):
+    """Chunk-local index of the grid sample nearer to each vertex"""
+    sample = np.stack(np.unravel_index(keys // 3, tuple(dims)), axis=1) - lo
+    sample[np.arange(len(keys)), keys % 3] += fractions > 0.5
+    return tuple(sample.T)
+
+
+def _chunk(task):
+    """Surface pieces of one chunk: (keys, fractions, triangles, atom of each vertex)"""
+    lo, hi, margin, origin, spacing, dims, members, centers, radii, probe, kind, band = task
+    if kind == "ses":
+        lo_ext, hi_ext = lo - margin, hi + margin
+    else:
+        lo_ext, hi_ext = lo, hi
+    field, owner = splat(hi_ext - lo_ext + 1, origin + spacing * lo_ext, spacing, centers, radii + probe, band,
+                         owners=True)
+    if kind == "ses":
+        # sample the SAS surface over the extended chunk, then carve probe-sized balls around it
+        keys, fractions, _ = marching_cubes(field, lo_ext, dims)
+        # one vertex per grid sample is dense enough: D is off by (h/2)^2 / (2 probe) between them
+        _, first = np.unique(keys // 3, return_index=True)
+        sas_points = key_positions(keys[first], fractions[first], origin, spacing, dims)
+        reach = probe + band + spacing
+        near = np.all((sas_points > origin + spacing * lo - reach) & (sas_points < origin + spacing * hi + reach),
+                      axis=1)
+        sas_points = sas_points[near]
+        core = tuple(slice(margin, margin + n + 1) for n in hi - lo)
+        carved = splat(hi - lo + 1, origin + spacing * lo, spacing, sas_points, probe, band)
+        field = np.maximum(field[core], -carved)
+        owner = owner[core]
+    keys, fractions, triangles = marching_cubes(field, lo, dims)
+    atoms = owner[_vertex_samples(keys, fractions, lo, dims)]
+    return keys, fractions, triangles, np.where(atoms >= 0, members[atoms], -1)
+
+
+def _merge(pieces, origin, spacing, dims):
+    pieces = [piece for piece in pieces if len(piece[0])]
+    if not pieces:
+        return np.zeros((0, 3)), np.zeros((0, 3), np.int64), np.zeros(0, np.int64)
+    keys, fractions, _, atoms = (np.concatenate(column) for column in zip(*pieces))
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    triangles, offset = [], 0
+    for piece in pieces:
+        triangles.append(inverse[offset:offset + len(piece[0])][piece[2]])
+        offset += len(piece[0])
+    return key_positions(unique, fractions[first], origin, spacing, dims), np.concatenate(triangles), atoms[first]
+
+
+def chunks(centers, radii, kind="ses", probe=PROBE, spacing=1.0, chunk_size=CHUNK_SIZE):
+    """The grid and the independent per-chunk tasks of a surface: (origin, dims, tasks)
+
+    Chunks with no atom within reach are left out.
+    """
+    if kind not in ("vdw", "sas", "ses"):
+        raise ValueError("unknown surface kind %r" % kind)
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(centers),))
+    if kind == "vdw":
+        probe = 0.0
+    band = 1.5 * spacing
+    margin = int(np.ceil((probe + band) / spacing)) + 1 if kind == "ses" else 0
+    pad = probe + radii.max() + band + spacing * (margin + 1)
+    origin = centers.min(axis=0) - pad
+    dims = np.ceil((centers.max(axis=0) + pad - origin) / spacing).astype(np.int64) + 1
+
+    reach = radii.max() + probe + band + spacing * (margin + 1)
+    grid = neighbors.CellGrid(centers, reach)
+    tasks = []
+    for corner in np.ndindex(*((dims - 2) // chunk_size + 1)):
+        lo = np.array(corner) * chunk_size
+        hi = np.minimum(lo + chunk_size, dims - 1)
+        members = grid.in_box(origin + spacing * lo - reach, origin + spacing * hi + reach)
+        if len(members):
+            tasks.append((lo, hi, margin, origin, spacing, dims, members, centers[members], radii[members], probe,
+                          kind, band))
+    return origin, dims, tasks
+
+
+@profiling.profile
+def molecular_surface(centers, radii, kind="ses", probe=PROBE, spacing=1.0, chunk_size=CHUNK_SIZE, workers=1):
+    """Closed triangle mesh of a molecular surface as verts/loops/face_sizes arrays
+
+    kind is "vdw", "sas" or "ses".  spacing is the grid step in the units of
+    centers (0.5-1.0 Angstrom is typical).  workers > 1 spreads chunks over a
+    process pool (None: one per CPU).  The result also carries "atoms", the
+    atom each vertex belongs to, for coloring.
+    """
+    origin, dims, tasks = chunks(centers, radii, kind, probe, spacing, chunk_size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            pieces = list(pool.map(_chunk, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        pieces = [_chunk(task) for task in tasks]
+
+    verts, triangles, atoms = _merge(pieces, origin, spacing, dims)
+    return {
+        "verts": verts,
+        "loops": triangles.ravel(),
+        "face_sizes": np.full(len(triangles), 3, dtype=np.int64),
+        "atoms": atoms,
+        "chunks": len(tasks),
+    }
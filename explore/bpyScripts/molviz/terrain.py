@@ -0,0 +1,145 @@
+"""Procedural heightfield terrain baked straight into mesh arrays (plain NumPy)
+
+The snowy ground used to be a plane with SUBSURF and a DISPLACE modifier
+driven by a CLOUDS texture, which Blender re-evaluates on every depsgraph
+update and which gets slow once the plane is a large membrane backdrop.
+Here fractal gradient (Perlin) or value noise is evaluated on a regular grid
+and written out as vertex/loop/face arrays for meshbuild.mesh_from_arrays().
+
+Noise is a function of world position, so neighbouring tiles share their
+edge heights exactly and a large extent can be generated tile by tile
+without holding it all in memory.  The lattice wraps every `period` cells,
+so the terrain also tiles with copies of itself every period * noise_scale
+world units.
+
+    verts, loops, face_sizes = terrain.grid(size=10, resolution=64, strength=0.1)
+    for ix, iy, (verts, loops, face_sizes) in terrain.tiles(extent=2000, tile_size=100):
+        ...
+"""
+import functools
+
+import numpy as np
+
+
+@functools.lru_cache(maxsize=32)
+def _lattice(period, seed, basis):
+    rng = np.random.default_rng(seed)
+    if basis == "value":
+        return rng.uniform(-1.0, 1.0, size=(period, period))
+    angles = rng.uniform(0.0, 2.0 * np.pi, size=(period, period))
+    return np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def noise(x, y, period=16, seed=0, basis="perlin"):
+    """Single-octave noise in about [-1, 1], repeating every period units
+
+    basis is "perlin" (gradient noise) or "value" (interpolated random values).
+    """
+    if basis not in ("perlin", "value"):
+        raise ValueError("unknown noise basis %r" % (basis,))
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lattice = _lattice(int(period), seed, basis)
+    x0 = np.floor(x)
+    y0 = np.floor(y)
+    fx = x - x0
+    fy = y - y0
+    i0 = x0.astype(np.int64) % period
+    j0 = y0.astype(np.int64) % period
+    i1 = (i0 + 1) % period
+    j1 = (j0 + 1) % period
+    if basis == "value":
+        n00, n10, n01, n11 = lattice[i0, j0], lattice[i1, j0], lattice[i0, j1], lattice[i1, j1]
+    else:
+        def corner(i, j, dx, dy):
+            gradient = lattice[i, j]
+            return gradient[..., 0] * dx + gradient[..., 1] * dy
+        n00 = corner(i0, j0, fx, fy)
+        n10 = corner(i1, j0, fx - 1.0, fy)
+        n01 = corner(i0, j1, fx, fy - 1.0)
+        n11 = corner(i1, j1, fx - 1.0, fy - 1.0)
+    u = _fade(fx)
+    v = _fade(fy)
+    bottom = n00 + u * (n10 - n00)
+    top = n01 + u * (n11 - n01)
+    result = bottom + v * (top - bottom)
+    # 2D gradient noise peaks at sqrt(1/2)
+    return result * np.sqrt(2.0) if basis == "perlin" else result
+
+
+def fractal(x, y, octaves=4, lacunarity=2, gain=0.5, period=16, seed=0, basis="perlin"):
+    """Sum of octaves of noise(), normalized to about [-1, 1]
+
+    lacunarity is rounded to an integer so every octave still wraps at the
+    same world distance.
+    """
+    lacunarity = max(1, int(round(lacunarity)))
+    total = np.zeros(np.broadcast(np.asarray(x), np.asarray(y)).shape)
+    amplitude = 1.0
+    norm = 0.0
+    frequency = 1
+    for octave in range(octaves):
+        total += amplitude * noise(x * frequency, y * frequency, period * frequency, seed + octave, basis)
+        norm += amplitude
+        amplitude *= gain
+        frequency *= lacunarity
+    return total / norm
+
+
+def heights(xs, ys, strength=0.1, noise_scale=0.5, **noise_options):
+    """Heights on the grid xs x ys (shape (len(ys), len(xs)))
+
+    noise_scale is world units per lattice cell, like a Blender noise
+    texture's noise_scale; strength is the peak displacement.
+    """
+    gx, gy = np.meshgrid(np.asarray(xs, dtype=np.float64) / noise_scale,
+                         np.asarray(ys, dtype=np.float64) / noise_scale)
+    return strength * fractal(gx, gy, **noise_options)
+
+
+def grid_mesh(xs, ys, z):
+    """Quad grid arrays (verts, loops, face_sizes) for heights z over xs x ys"""
+    nx, ny = len(xs), len(ys)
+    verts = np.empty((ny * nx, 3), dtype=np.float32)
+    verts[:, 0] = np.tile(xs, ny)
+    verts[:, 1] = np.repeat(ys, nx)
+    verts[:, 2] = np.asarray(z).ravel()
+    index = np.arange(ny * nx, dtype=np.int32).reshape(ny, nx)
+    # counter-clockwise seen from +Z, so normals point up
+    loops = np.stack([index[:-1, :-1], index[:-1, 1:], index[1:, 1:], index[1:, :-1]], axis=-1).ravel()
+    face_sizes = np.full((ny - 1) * (nx - 1), 4, dtype=np.int32)
+    return verts, loops, face_sizes
+
+
+def grid(size=10.0, resolution=64, center=(0.0, 0.0), **options):
+    """Square heightfield of side size with resolution quads per side"""
+    half = size / 2.0
+    xs = np.linspace(center[0] - half, center[0] + half, resolution + 1)
+    ys = np.linspace(center[1] - half, center[1] + half, resolution + 1)
+    return grid_mesh(xs, ys, heights(xs, ys, **options))
+
+
+def tile(ix, iy, tile_size=100.0, resolution=128, origin=(0.0, 0.0), **options):
+    """Arrays for tile (ix, iy); tiles share edge vertices with their neighbours"""
+    x0 = origin[0] + ix * tile_size
+    y0 = origin[1] + iy * tile_size
+    xs = x0 + np.linspace(0.0, tile_size, resolution + 1)
+    ys = y0 + np.linspace(0.0, tile_size, resolution + 1)
+    return grid_mesh(xs, ys, heights(xs, ys, **options))
+
+
+def tiles(extent=1000.0, tile_size=100.0, resolution=128, center=(0.0, 0.0), **options):
+    """Yield (ix, iy, (verts, loops, face_sizes)) for tiles covering a square extent
+
+    Only one tile's arrays exist at a time, so memory stays bounded by
+    resolution rather than by extent.
+    """
+    count = max(1, int(np.ceil(extent / tile_size)))
+    origin = (center[0] - count * tile_size / 2.0, center[1] - count * tile_size / 2.0)
+    for iy in range(count):
+        for ix in range(count):
+            yield ix, iy, tile(ix, iy, tile_size, resolution, origin, **options)
@@ -0,0 +1,239 @@
+"""Memory-mapped MD trajectories, read lazily one frame at a time (plain NumPy)
+
+A 10^5-atom, 10^3-frame run is 1.2 GB of float32 coordinates; nothing here
+loads it whole.  Frames are memory-mapped from disk and copied out one at a
+time (or in chunks of a fixed byte size), and the map is dropped and reopened
+whenever more than map_budget bytes of it have been touched, so the process
+never holds more than that much of the file in its resident set.
+
+Formats:
+
+    .dcd             CHARMM/NAMD/OpenMM DCD (either byte order, optional unit cell)
+    anything else    raw float32 (frames, atoms, 3), C order, given n_atoms
+
+XTC is compressed and cannot be memory-mapped; convert it once to DCD or raw
+with any MD toolkit.  write_dcd() and write_raw() stream frames out.
+
+    traj = trajectory.load("psii_md.dcd")
+    for index, coords in traj.iter_frames(step=10):       # every 10th frame
+        ...
+    coords = traj.sample(12.5)                            # halfway between 12 and 13
+
+trajectoryscene drives Blender from these: streaming into point/instance
+buffers on frame change, or baking shape keys and fcurves in bulk.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAP_BUDGET = 256 * 2**20
+CHUNK_BYTES = 64 * 2**20
+DCD_MAGIC = b"CORD"
+
+
+class Trajectory:
+    """(n_frames, n_atoms, 3) coordinates of a memory-mapped file
+
+    Every frame is frame_words words long starting at offset.  With
+    layout "interleaved" a frame is x0 y0 z0 x1 ...; with "planar" the x, y
+    and z blocks start at the word offsets in columns.
+    """
+
+    def __init__(self, path, n_frames, n_atoms, offset=0, frame_words=None, layout="interleaved",
+                 columns=(0,), dtype="<f4", timestep=1.0, atoms=None, map_budget=MAP_BUDGET):
+        self.path = path
+        self.n_frames = n_frames
+        self.n_atoms = n_atoms
+        self.offset = offset
+        self.frame_words = frame_words or 3 * n_atoms
+        self.layout = layout
+        self.columns = columns
+        self.dtype = np.dtype(dtype)
+        self.timestep = timestep
+        self.atoms = None if atoms is None else np.asarray(atoms, dtype=np.int64)
+        self.map_budget = map_budget
+        self._map = None
+        self._touched = 0
+
+    def __len__(self):
+        return self.n_frames
+
+    def __repr__(self):
+        return "<Trajectory %s: %d frames of %d atoms>" % (os.path.basename(self.path), self.n_frames,
+                                                           self.size)
+
+    @property
+    def size(self):
+        """Atoms per frame after select()"""
+        return self.n_atoms if self.atoms is None else len(self.atoms)
+
+    @property
+    def frame_nbytes(self):
+        """Bytes of one output frame (float32)"""
+        return self.size * 3 * 4
+
+    def select(self, atoms):
+        """The same file restricted to atoms (indices or a boolean mask)"""
+        atoms = np.asarray(atoms)
+        if atoms.dtype == bool:
+            atoms = np.flatnonzero(atoms)
+        if self.atoms is not None:
+            atoms = self.atoms[atoms]
+        return Trajectory(self.path, self.n_frames, self.n_atoms, self.offset, self.frame_words, self.layout,
+                          self.columns, self.dtype, self.timestep, atoms, self.map_budget)
+
+    def _frames(self):
+        # the map is reopened after map_budget bytes so its touched pages leave the resident set
+        if self._map is None or self._touched > self.map_budget:
+            self.close()
+            self._map = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offset,
+                                  shape=(self.n_frames, self.frame_words))
+            self._touched = 0
+        self._touched += self.frame_words * self.dtype.itemsize
+        return self._map
+
+    def close(self):
+        """Unmap the file (the next read maps it again)"""
+        if self._map is not None:
+            mmap = getattr(self._map, "_mmap", None)
+            self._map = None
+            if mmap is not None:
+                try:
+                    mmap.close()
+                except BufferError:
+                    # a caller still holds a view into the map; it goes when they do
+                    pass
+
+    def frame(self, index, out=None):
+        """(size, 3) float32 copy of one frame; out is reused if given"""
+        if not -self.n_frames <= index < self.n_frames:
+            raise IndexError("frame %d of %d" % (index, self.n_frames))
+        words = self._frames()[index]
+        if out is None:
+            out = np.empty((self.size, 3), dtype=np.float32)
+        if self.layout == "interleaved":
+            block = words[:3 * self.n_atoms].reshape(self.n_atoms, 3)
+            out[:] = block if self.atoms is None else block[self.atoms]
+        else:
+            for axis, start in enumerate(self.columns):
+                column = words[start:start + self.n_atoms]
+                out[:, axis] = column if self.atoms is None else column[self.atoms]
+        return out
+
+    def indices(self, start=0, stop=None, step=1):
+        return range(*slice(start, stop, step).indices(self.n_frames))
+
+    def iter_frames(self, start=0, stop=None, step=1):
+        """(index, coords) for a decimated range; coords is one reused buffer, copy it to keep it"""
+        out = np.empty((self.size, 3), dtype=np.float32)
+        for index in self.indices(start, stop, step):
+            yield index, self.frame(index, out)
+
+    def chunks(self, start=0, stop=None, step=1, max_bytes=CHUNK_BYTES):
+        """(indices, (k, size, 3) array) blocks of at most max_bytes each"""
+        indices = self.indices(start, stop, step)
+        per_chunk = max(1, max_bytes // self.frame_nbytes)
+        for first in range(0, len(indices), per_chunk):
+            block = indices[first:first + per_chunk]
+            array = np.empty((len(block), self.size, 3), dtype=np.float32)
+            for row, index in enumerate(block):
+                self.frame(index, array[row])
+            yield list(block), array
+
+    def sample(self, position, out=None):
+        """Coordinates at a fractional frame position, linearly interpolated"""
+        position = min(max(float(position), 0.0), self.n_frames - 1.0)
+        low = int(np.floor(position))
+        fraction = position - low
+        out = self.frame(low, out)
+        if fraction > 0.0:
+            out += fraction * (self.frame(low + 1) - out)
+        return out
+
+
+def _dcd_record(handle, endian):
+    (size,) = struct.unpack(endian + "i", handle.read(4))
+    data = handle.read(size)
+    (closing,) = struct.unpack(endian + "i", handle.read(4))
+    if closing != size or len(data) != size:
+        raise ValueError("corrupt DCD record")
+    return data
+
+
+def read_dcd(path, map_budget=MAP_BUDGET):
+    """Trajectory over a DCD file; the frame count comes from the file size"""
+    with open(path, "rb") as handle:
+        head = handle.read(8)
+        if head[4:] != DCD_MAGIC:
+            raise ValueError("%s is not a DCD file" % path)
+        endian = "<" if struct.unpack("<i", head[:4])[0] == 84 else ">"
+        handle.seek(0)
+        control = _dcd_record(handle, endian)
+        ints = struct.unpack(endian + "4s9if10i", control)[1:]
+        fixed, has_cell, four_d = ints[8], ints[10], ints[11]
+        timestep = ints[9]
+        if fixed or four_d:
+            raise ValueError("DCD files with fixed atoms or 4D coordinates are not supported")
+        _dcd_record(handle, endian)
+        (n_atoms,) = struct.unpack(endian + "i", _dcd_record(handle, endian))
+        offset = handle.tell()
+
+    # optional unit cell record (6 doubles), then x, y and z records, each with 4-byte markers
+    cell_words = (4 + 48 + 4) // 4 if has_cell else 0
+    block = n_atoms + 2
+    frame_words = cell_words + 3 * block
+    n_frames = (os.path.getsize(path) - offset) // (frame_words * 4)
+    columns = tuple(cell_words + 1 + axis * block for axis in range(3))
+    return Trajectory(path, n_frames, n_atoms, offset, frame_words, "planar", columns, endian + "f4", timestep,
+                      map_budget=map_budget)
+
+
+def read_raw(path, n_atoms, dtype="<f4", offset=0, map_budget=MAP_BUDGET):
+    """Trajectory over headerless (frames, n_atoms, 3) coordinates"""
+    frame_words = 3 * n_atoms
+    n_frames = (os.path.getsize(path) - offset) // (frame_words * np.dtype(dtype).itemsize)
+    return Trajectory(path, n_frames, n_atoms, offset, frame_words, dtype=dtype, map_budget=map_budget)
+
+
+def load(path, n_atoms=None, **options):
+    """Open a trajectory by extension (see the module docstring)"""
+    if path.lower().endswith(".dcd"):
+        return read_dcd(path, **options)
+    if n_atoms is None:
+        raise ValueError("raw trajectory %s needs n_atoms" % path)
+    return read_raw(path, n_atoms, **options)
+
+
+def write_raw(path, frames):
+    """Stream an iterable of (n_atoms, 3) frames to a raw float32 file; returns the frame count"""
+    count = 0
+    with open(path, "wb") as out:
+        for coords in frames:
+            out.write(np.ascontiguousarray(coords, dtype="<f4").tobytes())
+            count += 1
+    return count
+
+
+def write_dcd(path, frames, n_atoms, timestep=1.0, title="molviz"):
+    """Stream an iterable of (n_atoms, 3) frames to a little-endian DCD; returns the frame count"""
+
+    def record(data):
+        return struct.pack("<i", len(data)) + data + struct.pack("<i", len(data))
+
+    count = 0
+    with open(path, "wb") as out:
+        control = struct.pack("<4s9if10i", DCD_MAGIC, 0, 0, 1, 0, 0, 0, 0, 0, 0, timestep,
+                              0, 0, 0, 0, 0, 0, 0, 0, 0, 24)
+        out.write(record(control))
+        out.write(record(struct.pack("<i", 1) + title.encode("ascii")[:80].ljust(80)))
+        out.write(record(struct.pack("<i", n_atoms)))
+        for coords in frames:
+            coords = np.asarray(coords, dtype="<f4").reshape(n_atoms, 3)
+            for axis in range(3):
+                out.write(record(np.ascontiguousarray(coords[:, axis]).tobytes()))
+            count += 1
+        # the frame count lives in the header, which was written before it was known
+        out.seek(8)
+        out.write(struct.pack("<i", count))
+    return count
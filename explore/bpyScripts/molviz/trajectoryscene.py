@@ -0,0 +1,236 @@
+"""Play molviz.trajectory frames in Blender: streamed, or baked in bulk
+
+stream() hooks frame_change_pre and writes the current frame straight into
+the target's vertex buffer with one foreach_set: the point mesh of a
+pointcloud.build_atoms object, or a merged sphere mesh (every vertex of an
+atom moved by that atom's displacement).  Only one frame is resident.
+
+    traj = trajectory.load("psii_md.dcd")
+    atoms = pointcloud.build_atoms(traj.frame(0), radii, colors)
+    trajectoryscene.stream(atoms, traj, step=10)     # scene frame f shows frame 10 * f
+
+For renders that must not depend on handlers (render farms, saved .blend
+files) the motion can be baked instead, still without per-frame
+keyframe_insert calls:
+
+    bake_shape_keys(obj, traj, step=10)    one shape key per kept frame, values keyed in bulk
+    bake_locations(objects, traj, step=10) three fcurves per object, keyframes written in bulk
+
+Both refuse to bake more than max_bytes of coordinates; raise step instead.
+"""
+import bpy
+import numpy as np
+
+from molviz import ownership, profiling
+
+BAKE_BUDGET = 512 * 2**20
+
+_streams = {}
+
+
+def _vertices_per_atom(obj, trajectory):
+    """How many vertices of obj's mesh belong to each atom; ValueError unless a whole number >= 1"""
+    count = len(obj.data.vertices)
+    if count < trajectory.size or count % trajectory.size:
+        raise ValueError("%s has %d vertices, not a multiple of %d atoms" % (obj.name, count, trajectory.size))
+    return count // trajectory.size
+
+
+class _Stream:
+    def __init__(self, obj, trajectory, start, step, frame_start, reference):
+        self.obj = obj
+        self.trajectory = trajectory
+        self.start = start
+        self.step = step
+        self.frame_start = frame_start
+        mesh = obj.data
+        count = len(mesh.vertices)
+        self.per_atom = _vertices_per_atom(obj, trajectory)
+        self.base = None
+        if self.per_atom > 1:
+            # vertices move rigidly with their atom: base + (frame - reference)
+            self.base = np.empty(count * 3, dtype=np.float32)
+            mesh.vertices.foreach_get("co", self.base)
+            self.base = self.base.reshape(-1, 3)
+            self.reference = trajectory.frame(start) if reference is None else np.asarray(reference, np.float32)
+        self.buffer = np.empty((trajectory.size, 3), dtype=np.float32)
+        self.shown = None
+
+    def position(self, scene_frame):
+        return self.start + (scene_frame - self.frame_start) * self.step
+
+    def update(self, scene_frame):
+        position = self.position(scene_frame)
+        if position == self.shown:
+            return
+        coords = self.trajectory.sample(position, self.buffer)
+        if self.per_atom > 1:
+            coords = self.base + np.repeat(coords - self.reference, self.per_atom, axis=0)
+        mesh = self.obj.data
+        mesh.vertices.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+        mesh.update()
+        self.shown = position
+
+
+def _on_frame_change(scene, depsgraph=None):
+    for name, stream in list(_streams.items()):
+        try:
+            stream.update(scene.frame_current)
+        except ReferenceError:
+            # the object was removed out from under us
+            del _streams[name]
+
+
+def scene_range(trajectory, start=0, stop=None, step=1, frame_start=1, scene=None):
+    """Set the scene's frame range to cover trajectory frames start..stop at step per scene frame"""
+    if scene is None:
+        scene = bpy.context.scene
+    stop = trajectory.n_frames - 1 if stop is None else stop
+    scene.frame_start = frame_start
+    scene.frame_end = frame_start + int((stop - start) // step)
+    return scene.frame_start, scene.frame_end
+
+
+@profiling.profile
+def stream(obj, trajectory, start=0, step=1, frame_start=1, reference=None, set_range=True):
+    """Drive obj's vertices from trajectory on every frame change
+
+    Scene frame f shows trajectory position start + (f - frame_start) * step;
+    fractional positions (step < 1) are interpolated.  reference is the atom
+    centers obj was built from when it has several vertices per atom
+    (default: frame start).
+    """
+    _streams[obj.name] = _Stream(obj, trajectory, start, step, frame_start, reference)
+    if _on_frame_change not in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.append(_on_frame_change)
+    if set_range:
+        scene_range(trajectory, start, None, step, frame_start)
+    _streams[obj.name].update(bpy.context.scene.frame_current)
+    return _streams[obj.name]
+
+
+def stop(obj=None):
+    """Stop streaming into obj (default: every object)"""
+    if obj is None:
+        _streams.clear()
+    else:
+        _streams.pop(obj.name, None)
+    if not _streams and _on_frame_change in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.remove(_on_frame_change)
+
+
+ownership.on_teardown(stop)
+
+
+def _check_budget(frames, atoms, max_bytes):
+    needed = frames * atoms * 3 * 4
+    if needed > max_bytes:
+        raise ValueError("baking %d frames of %d atoms needs %.0f MB (budget %.0f MB); raise step"
+                         % (frames, atoms, needed / 2**20, max_bytes / 2**20))
+
+
+def _fcurve(action, owner, data_path, index, frames, values, interpolation=None):
+    """One fcurve with all its keyframes written by a single foreach_set
+
+    Keys stay Bezier (smooth, handles recomputed by update()) unless an
+    interpolation is given, which costs a Python assignment per keyframe.
+    """
+    if hasattr(action, "fcurve_ensure_for_datablock"):
+        # Blender 4.4+: layered actions keep fcurves in per-slot channelbags
+        fcurve = action.fcurve_ensure_for_datablock(owner, data_path, index=index)
+    else:
+        fcurve = action.fcurves.new(data_path, index=index)
+    points = fcurve.keyframe_points
+    points.add(len(frames))
+    points.foreach_set("co", np.column_stack([frames, values]).astype(np.float32).ravel())
+    if interpolation is not None:
+        for point in points:
+            point.interpolation = interpolation
+    fcurve.update()
+    return fcurve
+
+
+@profiling.profile
+def bake_shape_keys(obj, trajectory, start=0, stop=None, step=1, frame_start=1, reference=None,
+                    max_bytes=BAKE_BUDGET):
+    """Bake kept frames into relative shape keys of obj, keyed so they blend linearly
+
+    Key k peaks at scene frame frame_start + k * step, so decimated frames
+    keep the trajectory's timing and Blender interpolates between them.
+    Returns the shape keys.
+    """
+    indices = trajectory.indices(start, stop, step)
+    mesh = obj.data
+    count = len(mesh.vertices)
+    per_atom = _vertices_per_atom(obj, trajectory)
+    _check_budget(len(indices), count, max_bytes)
+    base = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", base)
+    base = base.reshape(-1, 3)
+    if reference is None:
+        reference = trajectory.frame(indices[0])
+
+    if mesh.shape_keys is None:
+        obj.shape_key_add(name="Basis", from_mix=False)
+    keys = []
+    out = np.empty((trajectory.size, 3), dtype=np.float32)
+    for index in indices:
+        coords = trajectory.frame(index, out)
+        if per_atom > 1:
+            coords = base + np.repeat(coords - reference, per_atom, axis=0)
+        key = obj.shape_key_add(name="frame_%05d" % index, from_mix=False)
+        key.data.foreach_set("co", np.ascontiguousarray(coords, dtype=np.float32).ravel())
+        keys.append(key)
+
+    shape_keys = mesh.shape_keys
+    shape_keys.use_relative = True
+    shape_keys.animation_data_create()
+    action = ownership.track(bpy.data.actions.new(obj.name + "_trajectory"))
+    shape_keys.animation_data.action = action
+    # each key rises from 0 at the previous kept frame to 1 at its own and back to 0 at the next
+    for k, key in enumerate(keys):
+        frame = frame_start + k * step
+        frames, values = [frame], [1.0]
+        if k > 0:
+            frames.insert(0, frame - step)
+            values.insert(0, 0.0)
+        if k < len(keys) - 1:
+            frames.append(frame + step)
+            values.append(0.0)
+        _fcurve(action, shape_keys, 'key_blocks["%s"].value' % key.name, 0, frames, values, 'LINEAR')
+    bpy.context.scene.frame_start = frame_start
+    bpy.context.scene.frame_end = frame_start + (len(keys) - 1) * step
+    return keys
+
+
+@profiling.profile
+def bake_locations(objects, trajectory, start=0, stop=None, step=1, frame_start=1, max_bytes=BAKE_BUDGET):
+    """Key each object's location to its atom's path: three bulk-written fcurves per object
+
+    objects[i] follows atom i of trajectory (select() it to match).  Frames
+    are read in chunks, so only the baked keyframes themselves grow with
+    the trajectory length.  Keys are Bezier, smooth between kept frames.
+    """
+    objects = list(objects)
+    if len(objects) != trajectory.size:
+        raise ValueError("%d objects for %d atoms" % (len(objects), trajectory.size))
+    indices = trajectory.indices(start, stop, step)
+    _check_budget(len(indices), len(objects), max_bytes)
+    # gathered per atom, since every fcurve needs all frames of one atom
+    paths = np.empty((len(objects), len(indices), 3), dtype=np.float32)
+    row = 0
+    for block, coords in trajectory.chunks(start, stop, step):
+        paths[:, row:row + len(block)] = coords.transpose(1, 0, 2)
+        row += len(block)
+    frames = frame_start + np.arange(len(indices)) * step
+    actions = []
+    for obj, path in zip(objects, paths):
+        obj.animation_data_create()
+        action = ownership.track(bpy.data.actions.new(obj.name + "_trajectory"))
+        obj.animation_data.action = action
+        for axis in range(3):
+            _fcurve(action, obj, "location", axis, frames, path[:, axis])
+        actions.append(action)
+    bpy.context.scene.frame_start = frame_start
+    bpy.context.scene.frame_end = int(frames[-1])
+    return actions
@@ -0,0 +1,175 @@
+"""Client side of the persistent Blender worker (no bpy needed)
+
+Starting Blender, importing bpy/numpy and tearing down the default scene
+costs more than building a small scene.  A worker (worker/blender_worker.py,
+running inside Blender) stays up and takes jobs over a local TCP socket; each
+job runs a script or renders a frame, and the worker tears down what the
+previous job created between jobs.
+
+    process, client = worker.launch(port=8765)
+    result = client.run({"type": "build", "script": "snowman/snowman-detailed.py"})
+    results = client.map([{"type": "build", "script": path, "args": [pdb]} for pdb in files])
+    client.shutdown()
+
+Messages are length-prefixed JSON.  map() pipelines: all jobs are sent
+before the first reply is read, so per-job latency is just the work itself.
+
+A connection starts with {"type": "auth", "token": ...}; the worker drops
+clients without its token.  launch() makes a fresh token and hands it to
+Blender in the MOLVIZ_WORKER_TOKEN environment variable; Client reads the
+same variable when no token is given.
+
+Job fields:
+
+    type     "build", "render", "ping", "stats", "wipe" (clear the whole scene) or "shutdown"
+    script   path under explore/bpyScripts (relative, or absolute inside it) run top to bottom
+    args     list passed after "--" in sys.argv, as on the blender command line
+    call     optional public function in the script to call afterward, with "kwargs"
+    render   optional {"output", "frame", "samples", "resolution", "engine"}
+    keep     leave the scene standing after the job (default: torn down)
+"""
+import json
+import os
+import secrets
+import socket
+import struct
+import subprocess
+import sys
+import time
+
+DEFAULT_PORT = 8765
+HEADER = struct.Struct(">I")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_SCRIPT = os.path.join(ROOT, "worker", "blender_worker.py")
+TOKEN_VARIABLE = "MOLVIZ_WORKER_TOKEN"
+
+
+class WorkerError(RuntimeError):
+    """A job failed inside the worker; the message carries its traceback"""
+
+
+def send_message(sock, message):
+    payload = json.dumps(message).encode("utf-8")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("worker closed the connection")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return json.loads(_recv_exactly(sock, size).decode("utf-8"))
+
+
+class Client:
+    """Connection to one worker; jobs on a connection run in order"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=None, token=None):
+        token = token or os.environ.get(TOKEN_VARIABLE)
+        if not token:
+            raise WorkerError("no worker token: pass token= or set %s" % TOKEN_VARIABLE)
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._next_id = 0
+        try:
+            send_message(self.sock, {"type": "auth", "token": token})
+            if not recv_message(self.sock).get("ok"):
+                raise WorkerError("worker rejected the token")
+        except BaseException:
+            self.sock.close()
+            raise
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, job):
+        """Send a job without waiting; returns its id"""
+        self._next_id += 1
+        job = dict(job, id=self._next_id)
+        send_message(self.sock, job)
+        return job["id"]
+
+    def receive(self, check=True):
+        """Next reply, in submission order"""
+        reply = recv_message(self.sock)
+        if check and not reply.get("ok"):
+            raise WorkerError("job %s failed:\n%s" % (reply.get("id"), reply.get("error")))
+        return reply
+
+    def run(self, job, check=True):
+        self.submit(job)
+        return self.receive(check)
+
+    def map(self, jobs, check=False):
+        """Run many jobs pipelined; replies in job order (failures included unless check)"""
+        ids = [self.submit(job) for job in jobs]
+        return [self.receive(check) for _ in ids]
+
+    def ping(self):
+        return self.run({"type": "ping"})
+
+    def stats(self):
+        return self.run({"type": "stats"})["result"]
+
+    def shutdown(self):
+        try:
+            self.run({"type": "shutdown"})
+        except (ConnectionError, OSError):
+            pass
+        self.close()
+
+
+def launch(port=DEFAULT_PORT, blender="blender", startup_timeout=60.0, log=None, token=None):
+    """Start a background Blender running the worker; returns (process, connected Client)
+
+    The worker clears the factory startup scene once, then only ever removes
+    what its jobs created.
+    """
+    token = token or secrets.token_hex(16)
+    command = [blender, "--background", "--factory-startup", "--python", WORKER_SCRIPT,
+               "--", "--port", str(port), "--wipe"]
+    process = subprocess.Popen(command, stdout=log or subprocess.DEVNULL, stderr=subprocess.STDOUT,
+                               env=dict(os.environ, **{TOKEN_VARIABLE: token}))
+    deadline = time.monotonic() + startup_timeout
+    while True:
+        if process.poll() is not None:
+            raise RuntimeError("worker exited during startup (code %d)" % process.returncode)
+        try:
+            client = Client(port=port, token=token)
+            client.ping()
+            return process, client
+        except OSError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("worker did not start within %.0f s" % startup_timeout)
+            time.sleep(0.1)
+
+
+def resolve_script(path):
+    """Absolute path of a script given relative to explore/bpyScripts; ValueError if it lies outside"""
+    root = os.path.realpath(ROOT)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError("script %r is outside %s" % (path, root))
+    return resolved
+
+
+if __name__ == "__main__":
+    # python -m molviz.worker ping|stats|wipe|shutdown [port]   (token from MOLVIZ_WORKER_TOKEN)
+    command = sys.argv[1] if len(sys.argv) > 1 else "ping"
+    with Client(port=int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT) as client:
+        print(client.run({"type": command}))
@@ -0,0 +1,206 @@
+"""Blender side of the persistent worker: serve build and render jobs
+
+Runs inside a background Blender (see worker/blender_worker.py).  Jobs run
+one at a time; between jobs everything the previous job created is removed
+with ownership.teardown() (tracked datablocks plus whatever bpy.ops made,
+caught by an ownership session around the job), so no .001 copies or
+orphan meshes pile up over hundreds of jobs.  Anything else in the session
+is left alone; a "wipe" job (or serve(wipe=True) at startup) clears the
+whole scene explicitly.
+
+Every connection must first send {"type": "auth", "token": ...} with the
+token serve() was given; scripts are only run from under worker.ROOT.
+Script sources are compiled once per modification time.
+"""
+import hmac
+import os
+import socket
+import sys
+import time
+import traceback
+
+import bpy
+import mathutils
+
+from molviz import lodscene, ownership, worker
+
+JOB_TYPES = ("ping", "stats", "wipe", "shutdown", "build", "render")
+
+_compiled = {}
+_stats = {"jobs": 0, "failed": 0, "busy_seconds": 0.0, "started": time.time()}
+
+
+def _code(path):
+    mtime = os.path.getmtime(path)
+    cached = _compiled.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as source:
+            cached = _compiled[path] = (mtime, compile(source.read(), path, "exec"))
+    return cached[1]
+
+
+def _purge_orphans():
+    if hasattr(bpy.data, "orphans_purge"):
+        bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=False, do_recursive=True)
+
+
+def reset(wipe=False):
+    """Tear down the previous job (its tracked datablocks and handlers); wipe=True also clears everything else"""
+    lodscene.disable_auto_update()
+    removed = ownership.teardown()
+    if not wipe:
+        return removed
+    stray = [obj for obj in bpy.data.objects]
+    if stray:
+        bpy.data.batch_remove(stray)
+    _purge_orphans()
+    bpy.context.scene.camera = None
+    return removed + len(stray)
+
+
+def _run_script(job):
+    path = worker.resolve_script(job["script"])
+    saved_argv = sys.argv
+    sys.argv = [bpy.app.binary_path, "--python", path, "--"] + [str(arg) for arg in job.get("args", ())]
+    namespace = {"__name__": "__main__", "__file__": path}
+    try:
+        exec(_code(path), namespace)
+    finally:
+        sys.argv = saved_argv
+    if job.get("call"):
+        function = namespace.get(job["call"])
+        if job["call"].startswith("_") or not callable(function):
+            raise ValueError("%s defines no public function %r" % (job["script"], job["call"]))
+        value = function(**job.get("kwargs", {}))
+        return value if isinstance(value, (str, int, float, bool, list, dict, type(None))) else repr(value)
+    return None
+
+
+def _aim_camera(scene, location, target):
+    camera = scene.camera
+    if camera is None:
+        camera = ownership.track(bpy.data.objects.new("Camera", ownership.track(bpy.data.cameras.new("Camera"))))
+        scene.collection.objects.link(camera)
+        scene.camera = camera
+    camera.location = location
+    direction = mathutils.Vector(target) - mathutils.Vector(location)
+    camera.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
+
+
+def render(output, frame=None, samples=None, resolution=None, engine=None, camera=None, threads=None,
+           **ignored):
+    """Render the current scene to output on the CPU, optionally from camera {"location", "target"}"""
+    scene = bpy.context.scene
+    if engine:
+        scene.render.engine = engine
+    if scene.render.engine == 'CYCLES':
+        scene.cycles.device = 'CPU'
+        if samples is not None:
+            scene.cycles.samples = samples
+    if threads:
+        scene.render.threads_mode = 'FIXED'
+        scene.render.threads = threads
+    if camera:
+        _aim_camera(scene, camera["location"], camera["target"])
+    if resolution:
+        scene.render.resolution_x, scene.render.resolution_y = resolution
+        scene.render.resolution_percentage = 100
+    if frame is not None:
+        scene.frame_set(frame)
+    scene.render.filepath = output
+    bpy.ops.render.render(write_still=True)
+    return output
+
+
+def handle(job):
+    """Run one job; returns the reply message"""
+    if not isinstance(job, dict):
+        return {"id": None, "ok": False, "error": "a job must be a JSON object, not %s" % type(job).__name__}
+    kind = job.get("type", "build")
+    reply = {"id": job.get("id"), "type": kind, "ok": True}
+    if kind not in JOB_TYPES:
+        reply.update(ok=False, error="unknown job type %r" % (kind,))
+        return reply
+    if kind in ("ping", "shutdown"):
+        return reply
+    if kind == "stats":
+        reply["result"] = dict(_stats, uptime=time.time() - _stats["started"],
+                               datablocks=ownership.report())
+        return reply
+    if kind == "wipe":
+        reply["result"] = reset(wipe=True)
+        return reply
+
+    start = time.perf_counter()
+    try:
+        # a render-only job renders whatever the last kept build left standing
+        if job.get("script"):
+            reset()
+        with ownership.session():
+            if job.get("script"):
+                reply["result"] = _run_script(job)
+            if job.get("render") or kind == "render":
+                reply["output"] = render(**(job.get("render") or job))
+        reply["objects"] = len(bpy.data.objects)
+        if job.get("script") and not job.get("keep"):
+            reset()
+    except Exception:
+        reply["ok"] = False
+        reply["error"] = traceback.format_exc()
+        _stats["failed"] += 1
+        reset()
+    reply["seconds"] = time.perf_counter() - start
+    _stats["jobs"] += 1
+    _stats["busy_seconds"] += reply["seconds"]
+    return reply
+
+
+def _authenticate(connection, token):
+    """Read the connection's auth message; True if it carries token"""
+    try:
+        message = worker.recv_message(connection)
+    except (ConnectionError, ValueError):
+        return False
+    given = message.get("token") if isinstance(message, dict) and message.get("type") == "auth" else None
+    ok = isinstance(given, str) and hmac.compare_digest(given.encode("utf-8"), token.encode("utf-8"))
+    worker.send_message(connection, {"type": "auth", "ok": ok})
+    return ok
+
+
+def serve(port=worker.DEFAULT_PORT, host="127.0.0.1", token=None, wipe=False):
+    """Accept connections that authenticate with token until a shutdown job arrives
+
+    wipe=True clears the whole scene once before serving (the factory
+    startup cube, light and camera when launched by worker.launch()).
+    """
+    if not token:
+        raise ValueError("the worker needs a shared token (%s)" % worker.TOKEN_VARIABLE)
+    reset(wipe=wipe)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(8)
+    print("molviz worker listening on %s:%d" % (host, port))
+    sys.stdout.flush()
+    try:
+        while True:
+            connection, _ = listener.accept()
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with connection:
+                if not _authenticate(connection, token):
+                    continue
+                while True:
+                    try:
+                        job = worker.recv_message(connection)
+                    except ConnectionError:
+                        break
+                    except ValueError as error:
+                        # the whole frame was read, so the connection is still in step
+                        worker.send_message(connection, {"id": None, "ok": False, "error": "bad message: %s" % error})
+                        continue
+                    reply = handle(job)
+                    worker.send_message(connection, reply)
+                    if reply.get("type") == "shutdown":
+                        return
+    finally:
+        listener.close()
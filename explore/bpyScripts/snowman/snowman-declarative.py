@@ -0,0 +1,47 @@
+# Declarative snowman: describe the parts, let the reconciler build them
+#
+# Unlike the other snowman scripts there is no clearScene() at the top.
+# Re-running after an edit (say, a new nose color) only touches the objects
+# whose description changed; everything else is left as it is.
+
+import bpy
+from math import radians
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import reconcile
+
+# every part shares one shader; a color edit rewrites only Object.color
+SNOW = {"material": reconcile.SHARED, "color": (0.98, 0.98, 1.0, 1.0), "roughness": 0.3}
+BLACK = {"material": reconcile.SHARED, "color": (0.0, 0.0, 0.0, 1.0), "roughness": 0.1}
+
+def snowman_description(location=(0, 0, 0)):
+    """Stable name -> spec for every part of the snowman"""
+    x, y, z = location
+    parts = {
+        "BottomSnowball": dict(SNOW, primitive="sphere", radius=1.0, location=(x, y, z + 1), subsurf=(2, 3)),
+        "MiddleSnowball": dict(SNOW, primitive="sphere", radius=0.75, location=(x, y, z + 2.25), subsurf=(2, 3)),
+        "HeadSnowball": dict(SNOW, primitive="sphere", radius=0.25, location=(x, y, z + 2.825), subsurf=(2, 3)),
+        "CarrotNose": dict(primitive="cone", vertices=8, radius1=0.08, radius2=0.01, depth=0.3,
+                           location=(x, y + 0.25, z + 2.8), rotation=(radians(10), radians(90), 0),
+                           material=reconcile.SHARED, color=(1.0, 0.5, 0.1, 1.0), roughness=0.4),
+        "LeftEye": dict(BLACK, primitive="sphere", radius=0.04, segments=16, ring_count=8,
+                        location=(x - 0.06, y + 0.08, z + 2.8)),
+        "RightEye": dict(BLACK, primitive="sphere", radius=0.04, segments=16, ring_count=8,
+                         location=(x + 0.06, y + 0.08, z + 2.8)),
+        "HatBrim": dict(primitive="cylinder", vertices=32, radius=0.25, depth=0.02,
+                        location=(x, y, z + 3.15), material=reconcile.SHARED,
+                        color=(0.05, 0.05, 0.05, 1.0), roughness=0.3),
+        "HatTop": dict(primitive="cylinder", vertices=32, radius=0.15, depth=0.2,
+                       location=(x, y, z + 3.26), material=reconcile.SHARED,
+                       color=(0.05, 0.05, 0.05, 1.0), roughness=0.3),
+    }
+    for i in range(3):
+        parts[f"Button_{i+1}"] = dict(BLACK, primitive="sphere", radius=0.03, segments=12, ring_count=6,
+                                      location=(x, y + 0.1, z + 2 - 0.05 * (i + 1)))
+    return parts
+
+report = reconcile.reconcile(snowman_description())
+print("created:", len(report["created"]), "updated:", report["updated"],
+      "deleted:", report["deleted"], "unchanged:", report["unchanged"])
@@ -7,23 +7,35 @@ from math import radians, sin, cos, pi
 import mathutils
 import pdb
 import numpy as np
+import os
+import sys
 
-# Clear existing objects
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import (consolidate, instancing, lodscene, materials, meshbuild, meshcache, ownership, profiling, scenegraph,
+                    scenegraphscene, shading)
+
+# Clear existing objects, and free the datablocks the previous run created
+ownership.teardown()
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete(use_global=False)
+ownership.begin()
 
-def create_snowball(location=(0, 0, 0), radius=1, name="Snowball"):
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        segments=32,
-        ring_count=16,
+def create_snowball(location=(0, 0, 0), radius=1, name="Snowball", cache=None):
+    if cache is not None:
+        # Subdivided mesh evaluated once, at the render level (3), and reused from the on-disk cache
+        params = {"primitive": "uv_sphere", "radius": radius, "segments": 32, "ring_count": 16, "subsurf": 3}
+        build = lambda: create_snowball(radius=radius, name=name + "_eval")
+        mesh = meshbuild.cached_mesh(cache, name, params, build)
+        return meshbuild.new_object(name, mesh, location=location)
+
+    # Smooth-shaded sphere; snowballs of the same size share one mesh
+    snowball = instancing.sphere_object(
+        name,
         radius=radius,
-        location=location
+        location=location,
+        segments=32,
+        ring_count=16
     )
-    snowball = bpy.context.active_object
-    snowball.name = name
-    
-    # Add smooth shading
-    bpy.ops.object.shade_smooth()
     
     # Add subdivision surface modifier
     snowball.modifiers.new(name="Subdivision", type='SUBSURF')
@@ -34,7 +46,8 @@ def create_snowball(location=(0, 0, 0), radius=1, name="Snowball"):
 
 def create_carrot_nose(location=(0, 0, 0)):
     """Create a carrot nose (cone)"""
-    bpy.ops.mesh.primitive_cone_add(
+    nose = meshbuild.cone_object(
+        "CarrotNose",
         vertices=8,
         radius1=0.08,
         radius2=0.01,
@@ -42,27 +55,13 @@ def create_carrot_nose(location=(0, 0, 0)):
         location=location,
         rotation=(0, radians(90), 0)
     )
-    nose = bpy.context.active_object
-    nose.name = "CarrotNose"
     
     # Rotate slightly downward
     nose.rotation_euler = (radians(10), radians(90), 0)
     
-    # Add orange material
-    mat = bpy.data.materials.new(name="CarrotMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    # Create simple orange material
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (1.0, 0.5, 0.1, 1.0)  # Orange
-    bsdf.inputs['Roughness'].default_value = 0.4
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    nose.data.materials.append(mat)
+    # Orange, through the shader every part shares
+    shading.assign(nose)
+    shading.write_objects([nose], colors=(1.0, 0.5, 0.1, 1.0), roughness=0.4)
     
     return nose
 
@@ -71,40 +70,28 @@ def create_eyes(location=(0, 0, 0), offset=0.1):
     eyes = []
     
     # Left eye
-    bpy.ops.mesh.primitive_uv_sphere_add(
+    left_eye = instancing.sphere_object(
+        "LeftEye",
         segments=16,
         ring_count=8,
         radius=0.04,
-        location=(location[0] - offset, location[1] + 0.08, location[2])
+        location=(location[0] - offset, location[1] + 0.08, location[2]),
+        smooth=False
     )
-    left_eye = bpy.context.active_object
-    left_eye.name = "LeftEye"
     
     # Right eye
-    bpy.ops.mesh.primitive_uv_sphere_add(
+    right_eye = instancing.sphere_object(
+        "RightEye",
         segments=16,
         ring_count=8,
         radius=0.04,
-        location=(location[0] + offset, location[1] + 0.08, location[2])
+        location=(location[0] + offset, location[1] + 0.08, location[2]),
+        smooth=False
     )
-    right_eye = bpy.context.active_object
-    right_eye.name = "RightEye"
-    
-    # Create black material for eyes
-    mat = bpy.data.materials.new(name="EyeMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
     
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (0.0, 0.0, 0.0, 1.0)  # Black
-    bsdf.inputs['Roughness'].default_value = 0.1
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    left_eye.data.materials.append(mat)
-    right_eye.data.materials.append(mat)
+    # Black eyes; both share one mesh and the shader, the color is per object
+    shading.assign(left_eye)
+    shading.write_objects([left_eye, right_eye], colors=(0.0, 0.0, 0.0, 1.0), roughness=0.1)
     
     return [left_eye, right_eye]
 
@@ -114,108 +101,92 @@ def create_buttons(location=(0, 0, 0), count=3):
     
     for i in range(count):
         button_z = location[2] - 0.05 * (i + 1)
-        bpy.ops.mesh.primitive_uv_sphere_add(
+        button = instancing.sphere_object(
+            f"Button_{i+1}",
             segments=12,
             ring_count=6,
             radius=0.03,
-            location=(location[0], location[1] + 0.1, button_z)
+            location=(location[0], location[1] + 0.1, button_z),
+            smooth=False
         )
-        button = bpy.context.active_object
-        button.name = f"Button_{i+1}"
         buttons.append(button)
     
-    # Use same black material as eyes
-    mat = bpy.data.materials.get("EyeMaterial") or bpy.data.materials.new(name="ButtonMaterial")
+    # Same black as the eyes
     for button in buttons:
-        if button.data.materials:
-            button.data.materials[0] = mat
-        else:
-            button.data.materials.append(mat)
+        shading.assign(button)
+    shading.write_objects(buttons, colors=(0.0, 0.0, 0.0, 1.0), roughness=0.1)
     
     return buttons
 
 def create_arm(start_loc, end_loc, thickness=0.02):
     """Create a tree branch arm using a cylinder"""
-    # Calculate direction and length
-    direction = mathutils.Vector(end_loc) - mathutils.Vector(start_loc)
-    length = direction.length
-    direction.normalize()
-    # pdb.set_trace()
-    # Create cylinder for arm
-    newLocation = tuple(np.array(start_loc) + direction * length / 2)
-    bpy.ops.mesh.primitive_cylinder_add(
+    return create_arms([start_loc], [end_loc], thickness)
+
+def create_arms(start_locs, end_locs, thickness=0.02, name="Arm"):
+    """Create any number of arms (or bond sticks) in one vectorized pass
+
+    Direction, length and orientation of every stick are computed together
+    and written into a single mesh, instead of one cylinder operator,
+    Vector and to_track_quat per arm.
+    """
+    # Brown, as point attributes read by the shared shader
+    arms = meshbuild.build_sticks(
+        np.asarray(start_locs, dtype=float),
+        np.asarray(end_locs, dtype=float),
+        radii=thickness,
+        colors=np.tile((0.4, 0.2, 0.1, 1.0), (len(start_locs), 1)),
         vertices=8,
-        radius=thickness,
-        depth=length,
-        location=newLocation
+        name=name,
+        smooth=False,
+        caps=True
     )
-    arm = bpy.context.active_object
-    arm.name = "Arm"
-    
-    # Rotate to point in correct direction
-    quat = direction.to_track_quat('Z', 'Y')
-    arm.rotation_euler = quat.to_euler()
-    
-    # Add brown material for arm
-    mat = bpy.data.materials.new(name="ArmMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (0.4, 0.2, 0.1, 1.0)  # Brown
-    bsdf.inputs['Roughness'].default_value = 0.8
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    arm.data.materials.append(mat)
-    
-    return arm
+    shading.write(arms.data, roughness=0.8)
+    return arms
 
 def create_hat(location=(0, 0, 0)):
     """Create a top hat for the snowman"""
     # Create hat brim (cylinder)
-    bpy.ops.mesh.primitive_cylinder_add(
+    brim = meshbuild.cylinder_object(
+        "HatBrim",
         vertices=32,
         radius=0.25,
         depth=0.02,
         location=(location[0], location[1], location[2] + 0.35)
     )
-    brim = bpy.context.active_object
-    brim.name = "HatBrim"
     
     # Create hat top (cylinder)
-    bpy.ops.mesh.primitive_cylinder_add(
+    top = meshbuild.cylinder_object(
+        "HatTop",
         vertices=32,
         radius=0.15,
         depth=0.2,
         location=(location[0], location[1], location[2] + 0.46)
     )
-    top = bpy.context.active_object
-    top.name = "HatTop"
     
-    # Add black material for hat
-    mat = bpy.data.materials.new(name="HatMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (0.05, 0.05, 0.05, 1.0)  # Very dark gray/black
-    bsdf.inputs['Roughness'].default_value = 0.3
-    # bsdf.inputs['Specular'].default_value = 0.5
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    brim.data.materials.append(mat)
-    top.data.materials.append(mat)
+    # Very dark gray/black
+    shading.assign(brim)
+    shading.assign(top)
+    shading.write_objects([brim, top], colors=(0.05, 0.05, 0.05, 1.0), roughness=0.3)
     
     return [brim, top]
 
-def create_ground(size=10):
+def create_ground(size=10, cache=None, procedural=True):
     """Create a ground plane"""
+    if procedural:
+        # Snowy bumps baked from NumPy noise; no modifier stack to re-evaluate
+        mat = materials.principled("SnowMaterial", (0.95, 0.95, 1.0, 1.0), roughness=0.7)
+        return meshbuild.build_terrain(size, resolution=64, name="Ground", material=mat,
+                                       strength=0.1, noise_scale=0.5)
+
+    if cache is not None:
+        params = {"primitive": "plane", "size": size, "subsurf": 2,
+                  "displace": {"texture": "CLOUDS", "noise_scale": 0.5, "strength": 0.1}}
+        mesh = meshbuild.cached_mesh(cache, "Ground", params, lambda: create_ground(size, procedural=False))
+        ground = meshbuild.new_object("Ground", mesh)
+        mat = materials.principled("SnowMaterial", (0.95, 0.95, 1.0, 1.0), roughness=0.7)
+        ground.data.materials.append(mat)
+        return ground
+
     bpy.ops.mesh.primitive_plane_add(size=size, location=(0, 0, 0))
     ground = bpy.context.active_object
     ground.name = "Ground"
@@ -223,6 +194,7 @@ def create_ground(size=10):
     # Add subdivision and displacement for snow-like ground
     ground.modifiers.new(name="Subdivision", type='SUBSURF')
     ground.modifiers["Subdivision"].levels = 2
+    ground.modifiers["Subdivision"].render_levels = 2
     
     displace = ground.modifiers.new(name="Displace", type='DISPLACE')
     tex = bpy.data.textures.new(name="SnowDisplacement", type='CLOUDS')
@@ -231,55 +203,28 @@ def create_ground(size=10):
     displace.strength = 0.1
     
     # Add white material for snow
-    mat = bpy.data.materials.new(name="SnowMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (0.95, 0.95, 1.0, 1.0)  # Slightly blue white
-    bsdf.inputs['Roughness'].default_value = 0.7
-    #bsdf.inputs['Subsurface'].default_value = 0.1
-    #bsdf.inputs['Subsurface Color'].default_value = (0.9, 0.95, 1.0, 1.0)
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
+    mat = materials.principled("SnowMaterial", (0.95, 0.95, 1.0, 1.0), roughness=0.7)  # Slightly blue white
     ground.data.materials.append(mat)
     
     return ground
 
 def add_snowman_material(obj):
     """Add snow material to snowballs"""
-    mat = bpy.data.materials.new(name="SnowmanMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    nodes.clear()
-    
-    # Create principled BSDF
-    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    bsdf.inputs['Base Color'].default_value = (0.98, 0.98, 1.0, 1.0)  # Slightly blue white
-    bsdf.inputs['Roughness'].default_value = 0.3
-    #bsdf.inputs['Specular'].default_value = 0.5
-    #bsdf.inputs['Subsurface'].default_value = 0.05
-    #bsdf.inputs['Subsurface Color'].default_value = (0.9, 0.95, 1.0, 1.0)
-    
-    output = nodes.new(type='ShaderNodeOutputMaterial')
-    mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-    
-    obj.data.materials.append(mat)
+    # the shader every part shares; snow color and roughness are set per object
+    mat = shading.assign(obj)
+    shading.write_objects([obj], colors=(0.98, 0.98, 1.0, 1.0), roughness=0.3)  # Slightly blue white
     return mat
 
 def create_snowman():
     """Main function to create the complete snowman"""
     
     # Create ground
-    ground = create_ground()
+    ground = create_ground(cache=mesh_cache)
     
     # Create three snowballs (bottom to top)
-    bottom = create_snowball(location=(0, 0, 1), radius=1.0, name="BottomSnowball")
-    middle = create_snowball(location=(0, 0, 2.25), radius=0.75, name="MiddleSnowball")
-    head = create_snowball(location=(0, 0, 2.825), radius=0.25, name="HeadSnowball")
+    bottom = create_snowball(location=(0, 0, 1), radius=1.0, name="BottomSnowball", cache=mesh_cache)
+    middle = create_snowball(location=(0, 0, 2.25), radius=0.75, name="MiddleSnowball", cache=mesh_cache)
+    head = create_snowball(location=(0, 0, 2.825), radius=0.25, name="HeadSnowball", cache=mesh_cache)
     
     # Add snow material to all snowballs
     for snowball in [bottom, middle, head]:
@@ -364,19 +309,72 @@ def setup_scene():
     bpy.context.scene.world.node_tree.links.new(bg.outputs['Background'], output.inputs['Surface'])
 
 # Create the snowman
+# Reuse evaluated snowball/ground meshes across runs instead of re-running
+# SUBSURF and DISPLACE every time
+USE_MESH_CACHE = False
+mesh_cache = meshcache.MeshCache("~/.cache/molviz/meshes") if USE_MESH_CACHE else None
+
+# Record where build time goes (MOLVIZ_PROFILE=1 turns this on too)
+PROFILE = False
+
+if PROFILE:
+    profiling.enable()
+profiling.instrument(globals())
+
 snowman_parts = create_snowman()
 
 # Setup the scene
 setup_scene()
 
-# Select all snowman parts for easy viewing
-for obj in snowman_parts.values():
-    if isinstance(obj, list):
-        for item in obj:
-            item.select_set(True)
-    else:
-        obj.select_set(True)
+# Pick snowball resolution from their size under the camera instead of a
+# fixed 32x16 + SUBSURF, and keep re-picking when the camera moves
+USE_LOD = False
+
+if USE_LOD:
+    snowballs = lambda: [snowman_parts[key] for key in ('bottom', 'middle', 'head')]
+    print("LOD:", lodscene.apply_sphere_lod(snowballs()))
+    lodscene.enable_auto_update(spheres=snowballs)
+
+# Group the snowballs under one scene-graph node (instead of parent_set to
+# the head) and move the whole snowman with a single batched update
+USE_SCENE_GRAPH = False
+
+if USE_SCENE_GRAPH:
+    graph = scenegraph.SceneGraph()
+    body = graph.add(name=None)
+    scenegraphscene.add_objects(graph, [snowman_parts[key] for key in ('bottom', 'middle', 'head')], parent=body)
+    bvh = scenegraphscene.bvh(graph)
+    graph.transform(body, scenegraph.rotation((0, 0, 1), radians(20)))
+    print("scene graph: moved", len(scenegraphscene.apply(graph, tree=bvh)), "nodes")
+    render = bpy.context.scene.render
+    picked = scenegraphscene.pick(graph, bvh, (render.resolution_x / 2, render.resolution_y / 2))
+    print("scene graph: at the image center:", picked.name if picked else None)
+
+# Merge static parts by material (one object and draw call per material)
+CONSOLIDATE = False
+
+if CONSOLIDATE:
+    report = consolidate.consolidate()
+    print("before:", report["before"])
+    print("after: ", report["after"])
+else:
+    # Select all snowman parts for easy viewing
+    for obj in snowman_parts.values():
+        if isinstance(obj, list):
+            for item in obj:
+                item.select_set(True)
+        else:
+            obj.select_set(True)
 
+ownership.end()
+print("materials:", materials.registry.stats())
+print("meshes:", instancing.library.stats())
+if mesh_cache is not None:
+    print("mesh cache:", mesh_cache.stats())
+print(ownership.format_report(ownership.report()))
+if profiling.enabled():
+    print(profiling.format_summary(limit=20))
+    profiling.write_chrome_trace(os.path.join(bpy.app.tempdir, "snowman-trace.json"))
 print("Snowman scene created! Run this script in Blender's Scripting workspace.")
 ##```
 
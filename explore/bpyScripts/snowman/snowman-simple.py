@@ -2,10 +2,17 @@
 
 #```python
 import bpy
+import os
+import sys
 
-# Clear the default scene
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import ownership, shading
+
+# Clear the default scene (and whatever the previous run left in bpy.data)
+ownership.teardown()
 bpy.ops.object.select_all(action='SELECT')
 bpy.ops.object.delete()
+ownership.begin()
 
 def create_simple_snowman():
     bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, location=(0, 0, 1))
@@ -28,11 +35,10 @@ def create_simple_snowman():
     eye_right = bpy.context.active_object
     eye_right.name = "Eye_Right"
     
-    # Make eyes black
+    # Make eyes black (one shared shader; the color lives on each object)
     for eye in [eye_left, eye_right]:
-        mat = bpy.data.materials.new(name="Black")
-        mat.diffuse_color = (0, 0, 0, 1)  # Black color
-        eye.data.materials.append(mat)
+        shading.assign(eye)
+    shading.write_objects([eye_left, eye_right], colors=(0, 0, 0, 1))  # Black color
     
     # Create carrot nose (cone)
     bpy.ops.mesh.primitive_cone_add(
@@ -46,9 +52,8 @@ def create_simple_snowman():
     nose.name = "Nose"
     
     # Make nose orange
-    mat = bpy.data.materials.new(name="Orange")
-    mat.diffuse_color = (1, 0.5, 0.1, 1)  # Orange color
-    nose.data.materials.append(mat)
+    shading.assign(nose)
+    shading.write_objects([nose], colors=(1, 0.5, 0.1, 1))  # Orange color
     
     print("Simple snowman created!")
     return {
@@ -61,6 +66,7 @@ def create_simple_snowman():
 
 # Create the snowman
 snowman = create_simple_snowman()
+ownership.end()
 
 # Select all snowman parts
 for part in snowman.values():
@@ -88,7 +94,7 @@ print("Done! Run this in Blender's Scripting tab.")
 #     - `location` - (X, Y, Z) position
 #     - `rotation` - Rotation in radians
 #  5. **Naming objects** - Setting `object.name` property
-#  6. **Simple materials** - Creating materials with `diffuse_color`
+#  6. **Shared shader** - One material for every part, colors set per object
 #  
 #  To understand what's happening step by step:
 #  
@@ -1,80 +1,56 @@
 import bpy
 import pdb
 import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import materials, meshbuild, ownership, profiling, shading
 
 def clearScene():
+   # free meshes/materials from earlier runs, not just their objects
+   ownership.teardown()
    bpy.ops.object.select_all(action='SELECT')
    bpy.ops.object.delete()
 
 
 def createSnowball(radius, x, y, z, name):
-   bpy.ops.mesh.primitive_uv_sphere_add(radius=radius, location=(x, y, z))
-   bpy.ops.object.shade_smooth()
-   snowball = bpy.context.active_object
-   snowball.name = name
+   snowball = meshbuild.sphere_object(name, radius=radius, location=(x, y, z))
    return snowball
     
+# every part shares one shader; color and roughness are set per object
 def addSnowMaterial(obj):
-   mat = bpy.data.materials.new(name="SnowMaterial")
-   mat.use_nodes = True
-   nodes = mat.node_tree.nodes
-   nodes.clear()
-   bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-   bsdf.inputs['Base Color'].default_value = (0.8, 0.8, 1, 1.0)  # Slightly blue white
-   bsdf.inputs['Roughness'].default_value = 0.3
-   output = nodes.new(type='ShaderNodeOutputMaterial')
-   mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-   obj.data.materials.append(mat)
+   shading.assign(obj)
+   shading.write_objects([obj], colors=(0.8, 0.8, 1, 1.0), roughness=0.3)  # Slightly blue white
 
 def addNoseMaterial(obj):
-   mat = bpy.data.materials.new(name="NoseMaterial")
-   mat.use_nodes = True
-   nodes = mat.node_tree.nodes
-   nodes.clear()
-   bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-   bsdf.inputs['Base Color'].default_value = (1, 0.4, 0, 1.0)
-   bsdf.inputs['Roughness'].default_value = 0.3
-   output = nodes.new(type='ShaderNodeOutputMaterial')
-   mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-   obj.data.materials.append(mat)
+   shading.assign(obj)
+   shading.write_objects([obj], colors=(1, 0.4, 0, 1.0), roughness=0.3)
 
 def addHatMaterial(obj):
-   mat = bpy.data.materials.new(name="HatMaterial")
-   mat.use_nodes = True
-   nodes = mat.node_tree.nodes
-   nodes.clear()
-   bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-   bsdf.inputs['Base Color'].default_value = (0, 0, 0, 1.0)
-   bsdf.inputs['Roughness'].default_value = 0.3
-   output = nodes.new(type='ShaderNodeOutputMaterial')
-   mat.node_tree.links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
-   obj.data.materials.append(mat)
+   shading.assign(obj)
+   shading.write_objects([obj], colors=(0, 0, 0, 1.0), roughness=0.3)
 
     
 def addHat():
-   bpy.ops.mesh.primitive_cylinder_add(location=(0,0,3.40),
-                                       scale=(0.9, 0.9, 0.05))
-   hatBrim = bpy.context.active_object
-   hatBrim.name = "hatBrim"
+   hatBrim = meshbuild.cylinder_object("hatBrim", location=(0,0,3.40))
+   hatBrim.scale = (0.9, 0.9, 0.05)
 
-   bpy.ops.mesh.primitive_cylinder_add(location=(0,0,3.7),
-                                       scale=(0.54, 0.54, 0.3))
-   stovepipe = bpy.context.active_object
-   stovepipe.name = "stovepipe"
+   stovepipe = meshbuild.cylinder_object("stovepipe", location=(0,0,3.7))
+   stovepipe.scale = (0.54, 0.54, 0.3)
 
    return (stovepipe, hatBrim)
 
 
 def addNose():
-   bpy.ops.mesh.primitive_cone_add(location=(0.8, 0.0, 3.0),
-                                    rotation=(0.0, math.radians(90.0), 0.0),
-                                    radius1=0.1,
-                                    radius2=0,
-                                    depth=0.8,
-                                    vertices=16
-                                    )
-   nose = bpy.context.active_object
-   nose.name = "nose"
+   nose = meshbuild.cone_object("nose",
+                                location=(0.8, 0.0, 3.0),
+                                rotation=(0.0, math.radians(90.0), 0.0),
+                                radius1=0.1,
+                                radius2=0,
+                                depth=0.8,
+                                vertices=16
+                                )
    return nose
 
    #bpy.ops.mesh.primitive_cone_add(location=(1,0,3),
@@ -96,8 +72,13 @@ def createSnowman():
     addNoseMaterial(nose)
     return [body, torso, head]
 
+# timings are recorded when run with MOLVIZ_PROFILE=1
+profiling.instrument(globals())
 clearScene()
 createSnowman()
+print("materials:", materials.registry.stats())
+if profiling.enabled():
+   print(profiling.format_summary())
 
 #addSnowballMaterial(torso)
 
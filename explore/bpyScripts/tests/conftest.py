@@ -0,0 +1,11 @@
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.append(os.path.join(HERE, ".."))
+# plain Python runs get the benchmarks' stand-in for Blender's bpy
+try:
+    import bpy  # noqa: F401
+except ImportError:
+    sys.path.insert(0, os.path.join(HERE, "..", "benchmarks", "fakebpy"))
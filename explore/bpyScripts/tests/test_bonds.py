@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from molviz import bonds, neighbors
+
+
+def as_set(i, j):
+    return set(zip(np.minimum(i, j).tolist(), np.maximum(i, j).tolist()))
+
+
+def random_atoms(count, seed, duplicates=0):
+    rng = np.random.default_rng(seed)
+    side = max(count * 11.0, 1.0) ** (1.0 / 3.0)
+    coords = rng.uniform(-side / 2, side / 2, size=(count, 3))
+    if duplicates and count:
+        # exact copies of existing atoms
+        coords = np.concatenate([coords, coords[rng.integers(0, count, duplicates)]])
+    elements = rng.choice(np.array(["C", "N", "O", "S", "H", "Xx"]), size=len(coords))
+    return coords, elements
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 17, 300])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, neighbors.CHUNK_SIZE])
+def test_pairs_match_brute_force(count, chunk_size):
+    coords, _ = random_atoms(count, seed=count, duplicates=count // 5)
+    cutoff = 2.5
+    i, j, distance = neighbors.CellGrid(coords, cutoff).pairs(cutoff, chunk_size)
+    bi, bj, _ = neighbors.brute_force_pairs(coords, cutoff)
+    assert len(i) == len(bi)
+    assert as_set(i, j) == as_set(bi, bj)
+    np.testing.assert_allclose(distance, np.linalg.norm(coords[i] - coords[j], axis=1))
+
+
+def test_pairs_on_cell_boundaries():
+    # a lattice whose spacing equals the cutoff and the cell size: every neighbour sits on a cell face
+    span = np.arange(-3, 4, dtype=np.float64)
+    coords = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape(-1, 3)
+    i, j, _ = neighbors.CellGrid(coords, 1.0).pairs(1.0, chunk_size=11)
+    bi, bj, _ = neighbors.brute_force_pairs(coords, 1.0)
+    assert as_set(i, j) == as_set(bi, bj) and len(i) == 3 * 7 * 7 * 6
+
+
+@pytest.mark.parametrize("count, duplicates", [(0, 0), (1, 1), (40, 10), (500, 60)])
+@pytest.mark.parametrize("chunk_size", [1, 13, 100])
+def test_bonds_match_brute_force(count, duplicates, chunk_size):
+    coords, elements = random_atoms(count, seed=count + 1, duplicates=duplicates)
+    pairs = bonds.infer_bonds(coords, elements, chunk_size=chunk_size)
+    expected = bonds.brute_force_bonds(coords, elements)
+    assert len(pairs) == len(expected)
+    assert as_set(*pairs.T) == as_set(*expected.T)
+    assert np.all(pairs[:, 0] < pairs[:, 1])
+    # exact duplicates are closer than MIN_DISTANCE, so never bonded
+    assert np.all(np.linalg.norm(coords[pairs[:, 0]] - coords[pairs[:, 1]], axis=1) >= bonds.MIN_DISTANCE)
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import bpy
+import pytest
+
+from molviz import consolidate, instancing, materials, ownership
+
+
+@pytest.fixture
+def scene():
+    ownership.begin()
+    objects = instancing.sphere_objects(["Part_%d" % i for i in range(7)], [(i, 0.0, 0.0) for i in range(7)], 0.5,
+                                        segments=8, ring_count=4)
+    snow = materials.principled("ConsolidateTestSnow", (1.0, 1.0, 1.0, 1.0))
+    for obj in objects:
+        materials.assign(obj, snow, per_object=True)
+    yield {obj.name: obj for obj in objects}
+    ownership.end()
+    ownership.teardown()
+    instancing.library.clear()
+
+
+def merged_names():
+    return {name for obj in bpy.data.objects if consolidate.PART_NAMES in obj for name in obj[consolidate.PART_NAMES]}
+
+
+def test_parents_of_animated_objects_and_targets_stay(scene):
+    grandparent, parent, child = scene["Part_0"], scene["Part_1"], scene["Part_2"]
+    parent.parent, child.parent = grandparent, parent
+    child.animation_data_create().action = bpy.data.actions.new("Spin")
+    follower = scene["Part_3"]
+    follower.constraints.new('COPY_LOCATION').target = scene["Part_4"]
+
+    assert consolidate.pinned() == {"Part_0", "Part_1", "Part_4"}
+    consolidate.consolidate()
+    assert merged_names() == {"Part_5", "Part_6"}
+    for name in ("Part_0", "Part_1", "Part_2", "Part_3", "Part_4"):
+        assert name in bpy.data.objects
+
+
+def test_driver_targets_stay(scene):
+    # the fake bpy has no driver API; these stand in for an FCurve's driver variables
+    target = SimpleNamespace(id_type='OBJECT', id=scene["Part_1"])
+    driver = SimpleNamespace(variables=[SimpleNamespace(targets=[target])])
+    scene["Part_0"].animation_data_create().drivers.append(SimpleNamespace(driver=driver))
+    assert consolidate.pinned() == {"Part_1"}
+
+
+def test_parents_of_unmerged_children_stay(scene):
+    lamp = bpy.data.objects.new("ConsolidateTestLamp", bpy.data.lights.new("ConsolidateTestLamp", 'POINT'))
+    bpy.context.collection.objects.link(lamp)
+    lamp.parent = scene["Part_0"]
+    # alone in its material group, so it is never merged
+    loner = scene["Part_2"]
+    materials.assign(loner, materials.principled("ConsolidateTestCoal", (0.0, 0.0, 0.0, 1.0)), per_object=True)
+    loner.parent = scene["Part_1"]
+    scene["Part_1"].parent = scene["Part_3"]
+    scene["Part_5"].parent = scene["Part_4"]
+
+    consolidate.consolidate()
+    assert merged_names() == {"Part_4", "Part_5", "Part_6"}
+    for name in ("Part_0", "Part_1", "Part_2", "Part_3", "ConsolidateTestLamp"):
+        assert name in bpy.data.objects
+    assert lamp.parent.name == "Part_0" and loner.parent.name == "Part_1"
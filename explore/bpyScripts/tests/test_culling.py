@@ -0,0 +1,45 @@
+import numpy as np
+
+from molviz import culling, lod
+
+
+def globule(n, spacing=1.6, seed=0):
+    """Jittered lattice packed tighter than the bench's, so many atoms are buried"""
+    rng = np.random.default_rng(seed)
+    radius = (3.0 * n / (4.0 * np.pi)) ** (1 / 3.0) * spacing
+    side = int(np.ceil(radius / spacing)) + 1
+    span = np.arange(-side, side + 1) * spacing
+    points = np.stack(np.meshgrid(span, span, span, indexing="ij"), axis=-1).reshape(-1, 3)
+    points = points[np.linalg.norm(points, axis=1) < radius]
+    points += rng.normal(0, 0.35, points.shape)
+    return points, rng.choice([1.7, 1.55, 1.52, 1.8], len(points))
+
+
+def framing_camera(centers, resolution=(320, 180), fov=np.radians(39.6)):
+    extent = np.abs(centers).max()
+    matrix = np.eye(4)
+    matrix[:3, 3] = (0.0, 0.0, 1.2 * extent / np.tan(fov / 2.0) + extent)
+    return lod.Camera(matrix, fov, resolution)
+
+
+def test_buried_atoms_are_never_visible():
+    for spacing in (1.4, 1.6):
+        centers, radii = globule(800, spacing)
+        buried = culling.buried(centers, radii)
+        assert buried.any()
+        assert not np.any(buried & culling.visible(centers, radii, framing_camera(centers)))
+        # no point of a buried sphere, sampled far more densely, is left uncovered
+        assert np.all(culling.exposure(centers, radii, count=512)[buried] == 0.0)
+
+
+def test_a_sphere_inside_a_larger_one_is_buried():
+    centers = np.array([(0.0, 0.0, 0.0), (0.3, -0.2, 0.1)])
+    assert list(culling.buried(centers, [2.0, 0.5])) == [False, True]
+
+
+def test_isolated_and_barely_exposed_spheres_are_not_buried():
+    assert not culling.buried(np.zeros((1, 3)), [1.0]).any()
+    assert not culling.buried(np.array([(0.0, 0.0, 0.0), (10.0, 0.0, 0.0)]), [1.0, 1.0]).any()
+    # a small cap of the small sphere pokes out of the large one
+    centers = np.array([(0.0, 0.0, 0.0), (1.55, 0.0, 0.0)])
+    assert list(culling.buried(centers, [2.0, 0.5])) == [False, False]
@@ -0,0 +1,81 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from molviz import pipeline
+
+MAIN = os.getpid()
+
+
+def square(value):
+    return {"values": np.arange(value, dtype=np.float64) ** 2, "value": value}
+
+
+def dies_in_worker(value):
+    """Kills the worker process it runs in; computes normally in the main process"""
+    if os.getpid() != MAIN:
+        os._exit(1)
+    return square(value)
+
+
+def dies_later_in_worker(value):
+    """Like dies_in_worker, but only after the first result has been handed over"""
+    if os.getpid() != MAIN:
+        time.sleep(0.2)
+    return dies_in_worker(value)
+
+
+def collect(pipe, tasks):
+    return {part.key: (part.arrays["values"].copy(), part.meta["value"]) for part in pipe.run(tasks)}
+
+
+def test_serial_and_pool_agree():
+    tasks = [(value, square, (value,)) for value in range(1, 9)]
+    serial = collect(pipeline.Pipeline(workers=1), tasks)
+    pipe = pipeline.Pipeline(workers=2)
+    pooled = collect(pipe, tasks)
+    assert sorted(serial) == sorted(pooled)
+    for key in serial:
+        np.testing.assert_array_equal(serial[key][0], pooled[key][0])
+    assert pipe.report["fallback"] is None or pipe.report["mode"] == "serial"
+
+
+@pytest.mark.skipif(pipeline._context() is None, reason="no process pool here")
+def test_dead_worker_falls_back_to_serial():
+    tasks = [(value, dies_in_worker, (value,)) for value in range(1, 13)]
+    pipe = pipeline.Pipeline(workers=2, max_in_flight=2)
+    results = collect(pipe, tasks)
+    assert sorted(results) == list(range(1, 13))
+    for value, (values, meta) in results.items():
+        np.testing.assert_array_equal(values, np.arange(value) ** 2)
+        assert meta == value
+    assert pipe.report["mode"] == "pool"
+    assert pipe.report["fallback"].startswith("pool failed")
+
+
+@pytest.mark.skipif(pipeline._context() is None, reason="no process pool here")
+def test_pool_breaking_between_submits_falls_back():
+    # the worker dies while the consumer holds the first part, so the next submit finds the pool broken
+    tasks = [(1, square, (1,))] + [(value, dies_later_in_worker, (value,)) for value in range(2, 8)]
+    pipe = pipeline.Pipeline(workers=2, max_in_flight=2)
+    results = {}
+    for part in pipe.run(tasks):
+        if part.key == 1:
+            time.sleep(1.0)
+        results[part.key] = part.arrays["values"].copy()
+    assert sorted(results) == list(range(1, 8))
+    for value, values in results.items():
+        np.testing.assert_array_equal(values, np.arange(value) ** 2)
+    assert pipe.report["fallback"].startswith("pool failed")
+
+
+def test_no_fork_inside_blender_on_macos(monkeypatch):
+    monkeypatch.setitem(pipeline.sys.modules, "bpy", object())
+    monkeypatch.setattr(pipeline.sys, "platform", "darwin")
+    assert pipeline._context() is None
+    pipe = pipeline.Pipeline(workers=4)
+    assert collect(pipe, [(1, square, (3,))])[1][1] == 3
+    assert pipe.report["mode"] == "serial"
+    assert "inside Blender" in pipe.report["fallback"]
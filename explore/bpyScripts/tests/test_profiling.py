@@ -0,0 +1,38 @@
+import bpy
+import pytest
+
+from molviz import profiling
+
+
+@pytest.fixture
+def recording():
+    profiling.reset()
+    yield
+    profiling.disable()
+    profiling.reset()
+    for obj in list(bpy.data.objects):
+        if obj.name.startswith("ProfiledEmpty"):
+            bpy.data.objects.remove(obj)
+
+
+def build(count):
+    with profiling.span("outer"):
+        for index in range(count):
+            with profiling.span("inner"):
+                bpy.data.objects.new("ProfiledEmpty", None)
+
+
+def test_datablocks_are_not_counted_by_default(recording):
+    profiling.enable(ops=False)
+    build(3)
+    assert all(event["datablocks"] is None for event in profiling.events())
+    assert profiling.summary()["inner"]["datablocks"] is None
+    assert " - " in profiling.format_summary()
+
+
+def test_datablocks_counted_when_asked(recording):
+    profiling.enable(ops=False, datablocks=True)
+    build(3)
+    rows = profiling.summary()
+    assert rows["inner"]["calls"] == 3 and rows["inner"]["datablocks"] == 3
+    assert rows["outer"]["datablocks"] == 3
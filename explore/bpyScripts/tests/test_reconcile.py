@@ -0,0 +1,78 @@
+import bpy
+import pytest
+
+from molviz import instancing, ownership, reconcile
+
+
+def description(count):
+    return {"Atom_%d" % i: {"primitive": "sphere", "radius": 1.5, "segments": 8, "ring_count": 4,
+                            "location": (float(i), 0.0, 0.0), "material": "ReconcileTestCarbon",
+                            "color": (0.3, 0.3, 0.3, 1.0), "roughness": 0.4}
+            for i in range(count)}
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Names of the objects reconcile() writes to, per call"""
+    calls = []
+    apply = reconcile._apply
+    monkeypatch.setattr(reconcile, "_apply", lambda obj, spec, groups: (calls.append(obj.name),
+                                                                        apply(obj, spec, groups)))
+    yield calls
+    ownership.teardown()
+    instancing.library.clear()
+
+
+@pytest.mark.parametrize("count", [10, 200])
+def test_edits_touch_only_the_objects_they_name(applied, count):
+    desc = description(count)
+    report = reconcile.reconcile(desc)
+    assert len(report["created"]) == count and reconcile.touched(report) == count
+    assert len(applied) == count
+
+    applied.clear()
+    report = reconcile.reconcile(desc)
+    assert reconcile.touched(report) == 0 and report["unchanged"] == count and applied == []
+
+    desc["Atom_3"] = dict(desc["Atom_3"], roughness=0.9)
+    report = reconcile.reconcile(desc)
+    assert report["updated"] == {"Atom_3": ["shading"]} and reconcile.touched(report) == 1
+    assert applied == ["Atom_3"]
+
+    applied.clear()
+    desc["Atom_4"] = dict(desc["Atom_4"], location=(0.0, 5.0, 0.0))
+    report = reconcile.reconcile(desc)
+    assert report["updated"] == {"Atom_4": ["transform"]} and applied == ["Atom_4"]
+    assert tuple(bpy.data.objects["Atom_4"].location) == (0.0, 5.0, 0.0)
+
+    applied.clear()
+    desc["Atom_new"] = dict(desc["Atom_0"], location=(0.0, 0.0, 9.0))
+    report = reconcile.reconcile(desc)
+    assert report["created"] == ["Atom_new"] and reconcile.touched(report) == 1 and applied == ["Atom_new"]
+
+    applied.clear()
+    del desc["Atom_5"]
+    report = reconcile.reconcile(desc)
+    assert report["deleted"] == ["Atom_5"] and reconcile.touched(report) == 1 and applied == []
+    assert "Atom_5" not in bpy.data.objects
+    assert sum(reconcile.SPEC_PROPERTY in obj for obj in bpy.data.objects) == count
+
+
+@pytest.mark.parametrize("material", ["ReconcileTestCarbon", reconcile.SHARED])
+def test_geometry_edits_keep_the_material(applied, material):
+    desc = {name: dict(spec, material=material) for name, spec in description(2).items()}
+    reconcile.reconcile(desc)
+    obj = bpy.data.objects["Atom_0"]
+    before = obj.active_material
+    assert before is not None
+
+    desc["Atom_0"] = dict(desc["Atom_0"], radius=2.5)
+    report = reconcile.reconcile(desc)
+    assert report["updated"] == {"Atom_0": ["geometry"]}
+    assert obj.active_material == before
+    assert bpy.data.objects["Atom_1"].active_material == before
+
+    desc["Atom_0"] = dict(desc["Atom_0"], material=None)
+    reconcile.reconcile(desc)
+    assert obj.active_material is None
+    assert bpy.data.objects["Atom_1"].active_material == before
@@ -0,0 +1,75 @@
+import json
+import os
+import random
+
+from molviz import renderfarm
+
+
+def journal(output_dir):
+    with open(os.path.join(output_dir, renderfarm.JOURNAL)) as lines:
+        return [json.loads(line) for line in lines]
+
+
+def test_crashed_renders_are_retried(tmp_path):
+    tasks = renderfarm.turntable_tasks(10, str(tmp_path))
+    farm = renderfarm.RenderFarm(renderfarm.FakeRenderer.factory(cost=lambda task: 0, fail_every=3), workers=2)
+    report = farm.run(tasks, str(tmp_path))
+    assert report["rendered"] == 10 and report["failed"] == {}
+    assert all(os.path.exists(task["output"]) for task in tasks)
+
+
+def test_retries_run_out(tmp_path):
+    renderers = []
+
+    def factory(slot, threads):
+        renderers.append(renderfarm.FakeRenderer(cost=lambda task: 0, fail_every=1))
+        return renderers[-1]
+
+    tasks = renderfarm.turntable_tasks(2, str(tmp_path))
+    report = renderfarm.RenderFarm(factory, workers=1, max_retries=2).run(tasks, str(tmp_path))
+    assert report["rendered"] == 0 and sorted(report["failed"]) == [task["key"] for task in tasks]
+    assert len(renderers) == 2 * 3
+
+
+def test_a_second_run_resumes_from_the_journal(tmp_path):
+    tasks = renderfarm.turntable_tasks(6, str(tmp_path))
+    factory = renderfarm.FakeRenderer.factory(cost=lambda task: 0)
+    assert renderfarm.RenderFarm(factory, workers=2).run(tasks, str(tmp_path))["rendered"] == 6
+
+    report = renderfarm.RenderFarm(factory, workers=2).run(tasks, str(tmp_path))
+    assert report["resumed"] == 6 and report["rendered"] == 0
+    assert sorted(report["outputs"]) == [task["key"] for task in tasks]
+
+    os.remove(tasks[2]["output"])
+    report = renderfarm.RenderFarm(factory, workers=2).run(tasks, str(tmp_path))
+    assert report["resumed"] == 5 and report["rendered"] == 1
+    assert os.path.exists(tasks[2]["output"])
+    assert [entry["key"] for entry in journal(str(tmp_path))].count(tasks[2]["key"]) == 2
+
+
+def test_the_costliest_task_starts_first(tmp_path):
+    tasks = renderfarm.turntable_tasks(10, str(tmp_path))
+    costs = renderfarm.CostModel()
+    costs.record(tasks[0], 1.0)
+    costs.record(tasks[9], 5.0)
+    farm = renderfarm.RenderFarm(renderfarm.FakeRenderer.factory(cost=lambda task: 0), workers=1, cost_model=costs)
+    farm.run(tasks[1:9], str(tmp_path))
+    assert journal(str(tmp_path))[0]["key"] == tasks[5]["key"]
+
+
+def test_prediction_is_the_nearest_measured_frame():
+    rng = random.Random(0)
+    costs = renderfarm.CostModel()
+    assert costs.predict({"view": "a", "frame": 3}) == renderfarm.DEFAULT_COST
+    measured = {}
+    for frame in rng.sample(range(200), 40):
+        measured[frame] = rng.random()
+        costs.record({"view": "a", "frame": frame}, measured[frame])
+    costs.record({"view": "a", "frame": frame}, 7.0)
+    measured[frame] = 7.0
+    for frame in range(-5, 205):
+        nearest = min(abs(other - frame) for other in measured)
+        assert costs.predict({"view": "a", "frame": frame}) in {seconds for other, seconds in measured.items()
+                                                                if abs(other - frame) == nearest}
+    mean = sum(measured.values()) / len(measured)
+    assert abs(costs.predict({"view": "b", "frame": 0}) - mean) < 1e-9
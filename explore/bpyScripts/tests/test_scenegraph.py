@@ -0,0 +1,109 @@
+import numpy as np
+
+from molviz import scenegraph, scenegraphscene
+
+
+def world_by_walking(graph):
+    world = np.zeros((len(graph), 4, 4))
+    for node, parent in enumerate(graph.parent):
+        world[node] = graph.local[node] if parent < 0 else world[parent] @ graph.local[node]
+    return world
+
+
+def test_update_matches_a_walk_and_reports_the_moved_subtree():
+    rng = np.random.default_rng(0)
+    graph = scenegraph.SceneGraph(capacity=2)
+    root = graph.add()
+    groups = graph.add_many(scenegraph.translations(rng.uniform(-5, 5, (4, 3))), parent=root)
+    leaves = graph.add_many(scenegraph.translations(rng.uniform(-1, 1, (40, 3))), parent=rng.choice(groups, 40))
+    graph.update()
+    graph.transform(groups[1], scenegraph.rotation((0, 0, 1), 0.4, pivot=(1, 2, 3)), space="world")
+    graph.transform(groups[2], scenegraph.rotation((1, 0, 0), 0.2))
+    changed = graph.update()
+    np.testing.assert_allclose(graph.world, world_by_walking(graph))
+    assert set(changed) == set(graph.subtree([groups[1], groups[2]]))
+    assert set(leaves[np.isin(graph.parent[leaves], groups[[1, 2]])]) <= set(changed)
+    assert len(graph.update()) == 0
+
+
+def test_refresh_leaves_the_changed_set_for_update():
+    graph = scenegraph.SceneGraph()
+    group = graph.add()
+    leaves = graph.add_many(scenegraph.translations(np.eye(3)), parent=group, bounds=scenegraph.sphere_bounds(0.5, 3))
+    graph.update()
+    graph.translate(group, (1.0, 0.0, 0.0))
+    scenegraphscene.bvh(graph)
+    np.testing.assert_allclose(graph.world[leaves, :3, 3], np.eye(3) + [1.0, 0.0, 0.0])
+    assert set(graph.update()) == {group, *leaves}
+
+
+def test_pick_and_frustum_match_brute_force():
+    rng = np.random.default_rng(1)
+    graph = scenegraph.SceneGraph()
+    radii = rng.uniform(0.5, 1.5, 300)
+    atoms = graph.add_many(scenegraph.translations(rng.uniform(-20, 20, (300, 3))), bounds=scenegraph.sphere_bounds(radii))
+    graph.update()
+    tree = scenegraph.BVH(graph.world_bounds(atoms), atoms)
+    graph.translate(atoms[:50], (3.0, -2.0, 1.0))
+    changed = graph.update()
+    tree.refit(changed, graph.world_bounds(changed))
+    hit = scenegraph.sphere_intersector(lambda ids: graph.world[ids, :3, 3], lambda ids: radii[ids])
+    for origin, direction in zip(rng.uniform(-30, 30, (50, 3)), rng.normal(size=(50, 3))):
+        direction /= np.linalg.norm(direction)
+        distances = hit(atoms, origin, direction)
+        expected = atoms[np.argmin(distances)] if np.isfinite(distances.min()) else -1
+        assert tree.pick(origin, direction, hit)[0] == expected
+    planes = np.array([[1.0, 0.0, 0.0, 5.0], [0.0, -1.0, 0.0, 10.0]])
+    boxes = graph.world_bounds(atoms)
+    corner = np.where(planes[None, :, :3] > 0, boxes[:, None, 1], boxes[:, None, 0])
+    inside = np.all(np.einsum("npk,pk->np", corner, planes[:, :3]) + planes[:, 3] >= 0, axis=1)
+    assert set(tree.frustum(planes)) == set(atoms[inside])
+
+
+def test_apply_writes_objects_moved_before_a_bvh_build():
+    import bpy
+
+    objects = []
+    for index in range(3):
+        obj = bpy.data.objects.new("SceneGraphTest_%d" % index, None)
+        obj.location = (float(index), 0.0, 0.0)
+        objects.append(obj)
+    try:
+        graph = scenegraph.SceneGraph()
+        body = graph.add()
+        nodes = scenegraphscene.add_objects(graph, objects, parent=body)
+        scenegraphscene.apply(graph)
+        graph.translate(body, (0.0, 0.0, 2.0))
+        scenegraphscene.bvh(graph)
+        assert set(scenegraphscene.apply(graph)) == {body, *nodes}
+        assert [tuple(obj.location) for obj in objects] == [(float(index), 0.0, 2.0) for index in range(3)]
+    finally:
+        for obj in objects:
+            bpy.data.objects.remove(obj)
+
+
+def test_apply_refits_the_tree_it_is_given():
+    import bpy
+
+    from molviz import instancing, ownership
+
+    ownership.begin()
+    objects = instancing.sphere_objects(["SceneGraphTest_%d" % i for i in range(3)],
+                                        [(2.0 * i, 0.0, 0.0) for i in range(3)], 0.5, segments=8, ring_count=4)
+    ownership.end()
+    try:
+        graph = scenegraph.SceneGraph()
+        body = graph.add()
+        scenegraphscene.add_objects(graph, objects, parent=body)
+        tree = scenegraphscene.bvh(graph)
+        graph.translate(body, (0.0, 5.0, 0.0))
+        scenegraphscene.apply(graph, tree=tree)
+
+        down = (0.0, 0.0, -1.0)
+        node, _ = tree.pick((2.0, 5.0, 10.0), down)
+        assert graph.names[node] == "SceneGraphTest_1"
+        assert tree.pick((2.0, 0.0, 10.0), down)[0] == -1
+        assert bpy.data.objects["SceneGraphTest_1"].location[1] == 5.0
+    finally:
+        ownership.teardown()
+        instancing.library.clear()
@@ -0,0 +1,25 @@
+import numpy as np
+
+from molviz import structure
+
+
+def pdb_line(serial, x):
+    return "%-6s%5s %-4s %3s %1s%4d    %8.3f%8.3f%8.3f%6.2f%6.2f          %2s\n" % (
+        "ATOM", serial, "CA", "GLY", "A", 1, x, 0.0, 0.0, 1.0, 20.0, "C")
+
+
+def test_overflowed_serials_fall_back_to_the_running_index(tmp_path):
+    path = tmp_path / "big.pdb"
+    # past 99999 atoms writers put ***** or hex there; hex can look like a plain number
+    serials = ["1", "2", "*****", "186a0", "20000"]
+    path.write_text("".join(pdb_line(serial, float(i)) for i, serial in enumerate(serials)) + "END\n")
+    atoms = structure.load(str(path))
+    assert list(atoms.serial) == [1, 2, 3, 4, 5]
+    np.testing.assert_array_equal(atoms.coords[:, 0], np.arange(5))
+    assert list(atoms.element) == ["C"] * 5
+
+
+def test_plain_serials_are_kept(tmp_path):
+    path = tmp_path / "small.pdb"
+    path.write_text(pdb_line("7", 0.0) + pdb_line("99999", 1.0) + "END\n")
+    assert list(structure.load(str(path)).serial) == [7, 99999]
@@ -0,0 +1,35 @@
+import bpy
+import numpy as np
+import pytest
+
+from molviz import trajectory, trajectoryscene
+
+
+@pytest.fixture
+def frames(tmp_path):
+    path = str(tmp_path / "walk.raw")
+    trajectory.write_raw(path, np.random.default_rng(0).normal(size=(4, 5, 3)).astype(np.float32))
+    loaded = trajectory.load(path, n_atoms=5)
+    yield loaded
+    loaded.close()
+
+
+def mesh_object(vertices):
+    mesh = bpy.data.meshes.new("TrajectoryTest")
+    mesh.vertices.add(vertices)
+    return bpy.data.objects.new("TrajectoryTest", mesh)
+
+
+@pytest.mark.parametrize("vertices", [0, 3, 7, 12])
+def test_vertex_counts_that_are_not_whole_atoms_are_refused(frames, vertices):
+    obj = mesh_object(vertices)
+    try:
+        with pytest.raises(ValueError, match="not a multiple of 5 atoms"):
+            trajectoryscene.bake_shape_keys(obj, frames)
+        with pytest.raises(ValueError, match="not a multiple of 5 atoms"):
+            trajectoryscene.stream(obj, frames)
+        assert trajectoryscene._streams == {}
+    finally:
+        mesh = obj.data
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
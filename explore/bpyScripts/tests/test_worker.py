@@ -0,0 +1,86 @@
+import os
+import socket
+import threading
+
+import bpy
+import pytest
+
+from molviz import ownership, worker, workerserver
+
+TOKEN = "test-token"
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+@pytest.fixture
+def server():
+    port = free_port()
+    thread = threading.Thread(target=workerserver.serve, args=(port,), kwargs={"token": TOKEN}, daemon=True)
+    thread.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            break
+        except OSError:
+            threading.Event().wait(0.02)
+    yield port
+    with worker.Client(port=port, token=TOKEN) as client:
+        client.shutdown()
+    thread.join(5)
+
+
+def test_serve_requires_a_token():
+    with pytest.raises(ValueError):
+        workerserver.serve(free_port(), token=None)
+
+
+def test_wrong_token_is_rejected(server):
+    with pytest.raises(worker.WorkerError):
+        worker.Client(port=server, token="wrong")
+    with worker.Client(port=server, token=TOKEN) as client:
+        assert client.ping()["ok"]
+
+
+def test_scripts_outside_the_root_are_refused(server, tmp_path):
+    outside = tmp_path / "evil.py"
+    outside.write_text("raise SystemExit('ran')\n")
+    with pytest.raises(ValueError):
+        worker.resolve_script(str(outside))
+    with pytest.raises(ValueError):
+        worker.resolve_script("../../evil.py")
+    assert worker.resolve_script("snowman/snowman-simple.py") == os.path.join(
+        os.path.realpath(worker.ROOT), "snowman", "snowman-simple.py")
+    with worker.Client(port=server, token=TOKEN) as client:
+        reply = client.run({"type": "build", "script": str(outside)}, check=False)
+    assert not reply["ok"] and "outside" in reply["error"]
+
+
+def test_reset_removes_only_tracked_datablocks():
+    bpy.data.objects.new("UserLoaded", None)
+    ownership.track(bpy.data.objects.new("JobBuilt", None))
+    assert workerserver.reset() == 1
+    assert "UserLoaded" in bpy.data.objects and "JobBuilt" not in bpy.data.objects
+    workerserver.reset(wipe=True)
+    assert "UserLoaded" not in bpy.data.objects
+
+
+def test_bad_messages_fail_without_killing_the_worker(server):
+    with socket.create_connection(("127.0.0.1", server)) as sock:
+        worker.send_message(sock, {"type": "auth", "token": TOKEN})
+        assert worker.recv_message(sock)["ok"]
+        payload = b"{not json"
+        sock.sendall(worker.HEADER.pack(len(payload)) + payload)
+        assert not worker.recv_message(sock)["ok"]
+        worker.send_message(sock, [1, 2, 3])
+        assert not worker.recv_message(sock)["ok"]
+        worker.send_message(sock, {"type": "bogus"})
+        reply = worker.recv_message(sock)
+        assert not reply["ok"] and "bogus" in reply["error"]
+        worker.send_message(sock, {"type": "ping"})
+        assert worker.recv_message(sock)["ok"]
+    with worker.Client(port=server, token=TOKEN) as client:
+        assert client.ping()["ok"]
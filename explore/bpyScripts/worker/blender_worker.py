@@ -0,0 +1,27 @@
+# Long-lived Blender worker: keeps bpy, numpy and molviz loaded and runs
+# scene-build/render jobs sent over a local socket (client: molviz.worker)
+#
+#   MOLVIZ_WORKER_TOKEN=... blender --background --factory-startup --python blender_worker.py -- --port 8765 [--wipe]
+#
+# Clients must present the token from MOLVIZ_WORKER_TOKEN (molviz.worker.launch
+# sets it).  --wipe clears the startup scene once; jobs otherwise only remove
+# what they created.
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import worker, workerserver
+
+argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+parser = argparse.ArgumentParser()
+parser.add_argument("--port", type=int, default=worker.DEFAULT_PORT)
+parser.add_argument("--host", default="127.0.0.1")
+parser.add_argument("--wipe", action="store_true", help="clear the whole scene before serving")
+args = parser.parse_args(argv)
+
+token = os.environ.get(worker.TOKEN_VARIABLE)
+if not token:
+    sys.exit("blender_worker: set %s to the token clients will present" % worker.TOKEN_VARIABLE)
+workerserver.serve(args.port, args.host, token=token, wipe=args.wipe)
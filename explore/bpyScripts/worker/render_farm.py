@@ -0,0 +1,48 @@
+# Render a turntable or multi-view stills of a scene script on a pool of
+# local Blender workers; re-running with the same --out resumes
+#
+#   python render_farm.py ../snowman/snowman-detailed.py --turntable 120 --workers 4 --out /tmp/turntable
+#   python render_farm.py ../snowman/snowman-detailed.py --views 0,20 90,20 180,20 270,20 --out /tmp/views
+#   python render_farm.py scene.py --turntable 60 --fake 0.05 --out /tmp/fake    # no Blender needed
+#
+# Scene scripts must live under explore/bpyScripts; the workers refuse others.
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from molviz import renderfarm
+
+parser = argparse.ArgumentParser()
+parser.add_argument("script")
+parser.add_argument("--out", required=True)
+parser.add_argument("--turntable", type=int, metavar="FRAMES")
+parser.add_argument("--views", nargs="+", metavar="AZIMUTH,ELEVATION")
+parser.add_argument("--distance", type=float, default=10.0)
+parser.add_argument("--height", type=float, default=4.0)
+parser.add_argument("--target", type=float, nargs=3, default=(0.0, 0.0, 1.5))
+parser.add_argument("--workers", type=int)
+parser.add_argument("--samples", type=int, default=128)
+parser.add_argument("--resolution", type=int, nargs=2, default=(1920, 1080))
+parser.add_argument("--blender", default="blender")
+parser.add_argument("--fake", type=float, metavar="SECONDS", help="fake renderer taking this long per frame")
+args = parser.parse_args()
+
+if args.views:
+    views = [tuple(float(v) for v in view.split(",")) for view in args.views]
+    tasks = renderfarm.multiview_tasks(views, args.out, distance=args.distance, target=args.target)
+else:
+    tasks = renderfarm.turntable_tasks(args.turntable or 36, args.out, radius=args.distance,
+                                       height=args.height, target=args.target)
+
+if args.fake is not None:
+    factory = renderfarm.FakeRenderer.factory(cost=lambda task: args.fake)
+else:
+    factory = renderfarm.WorkerRenderer.factory(os.path.abspath(args.script), blender=args.blender,
+                                                samples=args.samples, resolution=args.resolution)
+
+report = renderfarm.RenderFarm(factory, workers=args.workers).run(tasks, args.out)
+print(renderfarm.format_report(report))
+for key, error in report["failed"].items():
+    print("failed:", key, error)